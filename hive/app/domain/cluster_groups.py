@@ -8,18 +8,21 @@ import uuid
 
 from typing import Tuple, Optional, List, Dict, Any
 
+from scipy import sparse
 from tabulate import tabulate
 
 import numpy as np
 import pandas as pd
 import type_hints as th
-import hive_simulation as hs
 import environment_settings as es
 import domain.master_servers as ms
 import domain.helpers.enums as e
 import domain.helpers.matrices as mm
+import domain.helpers.scenarios as sc
 import domain.helpers.smart_dataclasses as sd
 
+from domain.helpers.exceptions import MatrixError
+
 
 class Cluster:
     """Represents a group of network nodes ensuring the durability of a file.
@@ -117,8 +120,7 @@ class Cluster:
         self.members: th.NodeDict = members
         self._members_view: List[th.NodeType] = list(self.members.values())
 
-        _ = f"{self.__class__.__name__}{origin}".replace("Cluster", "-")
-        self.file: sd.FileData = sd.FileData(file_name, sim_id, _)
+        self.file: sd.FileData = self._new_file_data(file_name, sim_id, origin)
 
         expected_fails = math.ceil(len(self.members) * 0.34)
         self.critical_size: int = es.REPLICATION_LEVEL
@@ -382,6 +384,27 @@ class Cluster:
     # endregion
 
     # region Helpers
+    def _new_file_data(
+            self, file_name: str, sim_id: int, origin: str) -> sd.FileData:
+        """Creates the :py:class:`~app.domain.helpers.smart_dataclasses.FileData`
+        of the file persisted by the ``Cluster``.
+
+        Args:
+            file_name:
+                The name of the file.
+            sim_id:
+                Identifier that generates unique output file names.
+            origin:
+                The name of the simulation file name that started
+                the simulation process.
+
+        Returns:
+            :py:class:`~app.domain.helpers.smart_dataclasses.FileData`:
+                The logging and replica tracking structure of the file.
+        """
+        _ = f"{self.__class__.__name__}{origin}".replace("Cluster", "-")
+        return sd.FileData(file_name, sim_id, _)
+
     def _log_evaluation(self, plive: int, ptotal: int = -1) -> None:
         """Helper that collects ``Cluster`` data and registers it on a
         :py:class:`logger <app.domain.helpers.smart_dataclasses.LoggingData>`
@@ -494,6 +517,21 @@ class SGCluster(Cluster):
         _timer (int):
             Used as a logical clock to divide the entries of :py:attr:`avg_`
             when a topology changes.
+        _transition_matrix (:py:class:`~scipy:scipy.sparse.csc_matrix`):
+            The column major transition matrix most recently broadcasted to
+            the :py:attr:`~Cluster.members`. Its columns are shared with
+            the :py:attr:`routing tables
+            <app.domain.network_nodes.SGNode.routing_table>` of the members.
+        _labels (:py:class:`~np:numpy.ndarray`):
+            The :py:attr:`identifiers <app.domain.network_nodes.Node.id>` of
+            the members at each row and column of
+            :py:attr:`_transition_matrix`.
+        _matrix_epoch (int):
+            The epoch at which :py:attr:`_transition_matrix` was last
+            created from scratch.
+        _matrix_drift (int):
+            How many members left or joined the ``SGCluster`` since
+            :py:attr:`_transition_matrix` was last created from scratch.
     """
     def __init__(self,
                  master: th.MasterType,
@@ -506,6 +544,10 @@ class SGCluster(Cluster):
         self.v_: pd.DataFrame = pd.DataFrame()
         self.avg_: pd.DataFrame = pd.DataFrame()
         self._timer: int = 0
+        self._transition_matrix: Optional[sparse.csc_matrix] = None
+        self._labels: np.ndarray = np.empty(0, dtype=object)
+        self._matrix_epoch: int = 0
+        self._matrix_drift: int = 0
         self.create_and_bcast_new_transition_matrix()
 
     # region Simulation setup
@@ -679,7 +721,10 @@ class SGCluster(Cluster):
 
         new_members = super().membership_maintenance()
         if self._membership_changed:
-            self.create_and_bcast_new_transition_matrix()
+            if self._can_repair_transition_matrix(new_members):
+                self.repair_and_bcast_transition_matrix(new_members)
+            else:
+                self.create_and_bcast_new_transition_matrix()
 
         return new_members
     # endregion
@@ -722,13 +767,19 @@ class SGCluster(Cluster):
 
         return u_
 
-    def new_transition_matrix(self) -> pd.DataFrame:
+    def new_transition_matrix(self) -> Tuple[np.ndarray, List[str]]:
         """Creates a new transition matrix that is likely to be a Markov Matrix.
 
+        :py:const:`~app.environment_settings.CANDIDATE_TOPOLOGIES` random
+        adjacency matrices are considered. See
+        :py:meth:`select_candidate_topology`.
+
         Returns:
-            :py:class:`~pd:pandas.DataFrame`:
-                The labeled matrix that has the fastests mixing rate from all
-                the pondered strategies.
+            Tuple[:py:class:`~np:numpy.ndarray`, List[str]]:
+                The matrix that has the fastests mixing rate from all the
+                pondered topologies and strategies and the
+                :py:attr:`identifiers <app.domain.network_nodes.Node.id>` of
+                the members at each of its rows and columns.
         """
         node_uptimes: List[float] = []
         node_ids: List[str] = []
@@ -738,66 +789,214 @@ class SGCluster(Cluster):
             node_ids.append(node.id)
 
         size = len(node_ids)
-        a = mm.new_symmetric_connected_matrix(size)
+        candidates = mm.new_symmetric_connected_matrices(
+            es.CANDIDATE_TOPOLOGIES, size)
         v_ = np.asarray(self.new_desired_distribution(node_ids, node_uptimes))
 
-        t = self.select_fastest_topology(a, v_)
+        t = self.select_candidate_topology(candidates, v_)
+
+        return t, node_ids
 
-        return pd.DataFrame(t, index=node_ids, columns=node_ids)
+    def broadcast_transition_matrix(
+            self, m: th.TransitionMatrix, labels: List[str]) -> None:
+        """Stores a matrix and delivers the position of their columns to the
+        respective :py:class:`network nodes <app.domain.network_nodes.SGNode>`.
 
-    def broadcast_transition_matrix(self, m: pd.DataFrame) -> None:
-        """Slices a  matrix and delivers columns to the respective
-        :py:class:`network nodes <app.domain.network_nodes.SGNode>`.
+        The matrix is kept once, in compressed sparse column format, by the
+        ``SGCluster`` and all members reference it, thus broadcasting does
+        not copy any column. Matrices that already are in that format, e.g.,
+        :py:meth:`repaired <repair_and_bcast_transition_matrix>` ones, are
+        stored as they are.
 
         Args:
-            m (:py:class:`~pd:pandas.DataFrame`)
-                A matrix to be broadcasted to the network nodes
-                belonging who are currently members of the Cluster instance.
+            m (:py:class:`~app.type_hints.TransitionMatrix`)
+                A column major matrix, dense or ``scipy.sparse``, to be
+                broadcasted to the network nodes belonging who are currently
+                members of the Cluster instance.
+            labels:
+                The :py:attr:`identifiers <app.domain.network_nodes.Node.id>`
+                of the members at each row and column of ``m``.
 
         Note:
-            An optimization could be made that configures a transition matrix
-            for the cluster, independent of of file names, i.e., turn cluster
-            groups into groups persisting multiple files instead of only one,
-            thus reducing simulation spaceoverheads and in real-life
+            Each ``SGCluster`` only manages one file. See
+            :py:class:`~app.domain.cluster_groups.SGClusterMulti` for
+            cluster groups that share one transition matrix between multiple
+            files, thus reducing simulation space overheads and in real-life
             scenarios, decreasing the load done to metadata servers, through
-            queries and matrix calculations. For simplicity of implementation
-            each cluster only manages one file.
+            queries and matrix calculations.
         """
         nodes_degrees: Dict[str, str] = {}
-        out_degrees: pd.Series = m.apply(np.count_nonzero, axis=0)  # columns
-        in_degrees: pd.Series = m.apply(np.count_nonzero, axis=1)  # rows
-        for node in self.members.values():
-            nid = node.id
-            nodes_degrees[nid] = f"{in_degrees[nid]}i#o{out_degrees[nid]}"
-            transition_vector: pd.DataFrame = m.loc[:, nid]
-            node.set_file_routing(self.file.name, transition_vector)
-        self.file.logger.log_matrices_degrees(nodes_degrees)
+        labels = np.asarray(labels, dtype=object)
+        t = sparse.csc_matrix(m)
+        t.eliminate_zeros()
+        out_degrees = np.diff(t.indptr)  # columns
+        in_degrees = np.bincount(t.indices, minlength=len(labels))  # rows
+        files = self._routed_files()
+        for j, nid in enumerate(labels):
+            node = self.members.get(nid)
+            if node is None:
+                continue
+            nodes_degrees[nid] = f"{in_degrees[j]}i#o{out_degrees[j]}"
+            for file in files:
+                node.set_file_routing(file.name, t, labels, j)
+        for file in files:
+            file.logger.log_matrices_degrees(nodes_degrees)
+        self._transition_matrix = t
+        self._labels = labels
 
     def create_and_bcast_new_transition_matrix(self) -> None:
         """Helper method that attempts to generate a markov matrix to be
         sliced and distributed to the ``SGCluster``
         :py:attr:`~Cluster.members`.
 
-        At most three transition matrices will be generated. The first to be
-        successfully :py:meth:`validated <_validate_transition_matrix>` is
+        The matrix created by :py:meth:`new_transition_matrix` is
         distributed to the :py:class:`network nodes
-        <app.domain.network_nodes.SGNode>`. If all matrices are invalid,
-        the last matrix will be used to prevent infinite loops in the
-        simulation. This is not an issue as eventually the membership of the
-        ``SGCluster`` will change, thus, more opportunities to perform a
-        correct swarm guidance behavior will be possible.
+        <app.domain.network_nodes.SGNode>` even if no candidate topology
+        could be :py:meth:`validated <_validate_transition_matrices>`, to
+        prevent infinite loops in the simulation. This is not an issue as
+        eventually the membership of the ``SGCluster`` will change, thus,
+        more opportunities to perform a correct swarm guidance behavior will
+        be possible.
+        """
+        print("Creating new transition matrix...")
+        self.broadcast_transition_matrix(*self.new_transition_matrix())
+        self._matrix_epoch = self.current_epoch
+        self._matrix_drift = 0
+
+    def repair_and_bcast_transition_matrix(self, new_members: th.NodeDict) -> None:
+        """Incrementally repairs the current transition matrix after a
+        membership change and distributes it to the ``SGCluster``
+        :py:attr:`~Cluster.members`.
+
+        Rows and columns of members who left the ``SGCluster`` are removed
+        and their former neighbours reject moves towards them. Each new
+        member is connected to as many random members as the average
+        degree of the current matrix, chosen among those whose probability
+        of staying in their state is not zero, since only they can send
+        flow to the new member. The :py:attr:`desired distribution <v_>` of
+        the remaining members is renormalized and the new members are given
+        shares proportional to their uptimes. If any member ends up
+        isolated, a new matrix is created from scratch instead. The matrix
+        is never densified. See
+        :py:func:`~app.domain.helpers.matrices.remove_reversible_states`
+        and :py:func:`~app.domain.helpers.matrices.add_reversible_states`.
+
+        Args:
+            new_members (:py:class:`~app.type_hints.NodeDict`):
+                The members who joined the ``SGCluster`` during the current
+                epoch.
+        """
+        labels: List[str] = self._labels.tolist()
+        departed = np.asarray([
+            i for i, nid in enumerate(labels) if nid not in self.members
+        ], dtype=int)
+
+        t = mm.remove_reversible_states(self._transition_matrix, departed)
+        pi = np.delete(self.v_.loc[labels, 0].to_numpy(), departed)
+        labels = [nid for nid in labels if nid in self.members]
+
+        if new_members:
+            uptimes = sum(self.members[nid].uptime for nid in labels)
+            scale = np.sum(pi) / uptimes if uptimes > 0 else 1.0
+            k = max(1, int(round(t.nnz / t.shape[0])) - 1)
+            slack = np.flatnonzero(t.diagonal() > 0)
+            pi_new: List[float] = []
+            neighbours: List[np.ndarray] = []
+            for i, node in enumerate(new_members.values()):
+                # Members that joined before this one always have slack.
+                candidates = np.append(
+                    slack, np.arange(len(labels), len(labels) + i))
+                neighbours.append(np.random.choice(
+                    candidates, size=min(k, candidates.size), replace=False))
+                pi_new.append(max(node.uptime * scale, np.finfo(float).eps))
+            try:
+                t = mm.add_reversible_states(
+                    t, pi, np.asarray(pi_new), neighbours)
+            except MatrixError:
+                print(" [x] New member without neighbours, recreating matrix.")
+                self.create_and_bcast_new_transition_matrix()
+                return
+            pi = np.append(pi, pi_new)
+            labels.extend(new_members)
+
+        if np.any(t.diagonal() >= 1.0):
+            # Some member is isolated from the remaining members.
+            self.create_and_bcast_new_transition_matrix()
+            return
+
+        self._matrix_drift += len(departed) + len(new_members)
+        self.new_desired_distribution(labels, pi.tolist())
+        self.broadcast_transition_matrix(t, labels)
+
+    def _can_repair_transition_matrix(self, new_members: th.NodeDict) -> bool:
+        """Decides if the current transition matrix can be incrementally
+        repaired instead of created from scratch.
+
+        Args:
+            new_members (:py:class:`~app.type_hints.NodeDict`):
+                The members who joined the ``SGCluster`` during the current
+                epoch.
+
+        Returns:
+            ``True`` if :py:const:`~app.environment_settings.REPAIR_DRIFT`
+            and :py:const:`~app.environment_settings.REPAIR_EPOCHS` allow a
+            repair, otherwise ``False``.
         """
-        tries = 0
-        result: pd.DataFrame = pd.DataFrame()
-        while tries <= 5:
-            print(f"Creating new transition matrix... try #{tries + 1}.")
-            tries += 1
-            result = self.new_transition_matrix()
-            if self._validate_transition_matrix(result, self.v_):
-                break
-            print(" [x] Invalid matrix.")
-        # Only tries to create a valid matrix up to five times before proceeding
-        self.broadcast_transition_matrix(result)
+        if es.REPAIR_DRIFT <= 0 or self._transition_matrix is None:
+            return False
+
+        if es.REPAIR_EPOCHS is not None and \
+                self.current_epoch - self._matrix_epoch > es.REPAIR_EPOCHS:
+            return False
+
+        remaining = sum(nid in self.members for nid in self._labels)
+        if remaining == 0:
+            return False
+
+        departed = len(self._labels) - remaining
+        drift = self._matrix_drift + departed + len(new_members)
+        return drift <= es.REPAIR_DRIFT * self.original_size
+
+    # noinspection PyIncorrectDocstring
+    def select_candidate_topology(
+            self, candidates: np.ndarray, v_: np.ndarray) -> np.ndarray:
+        """Selects the fastest of many candidate topologies and optimizes it.
+
+        The metropolis-hastings matrices of all ``candidates`` are built,
+        :py:meth:`validated <_validate_transition_matrices>` and have their
+        mixing rates computed as a batch. Only the topology whose valid
+        matrix mixes faster is handed to :py:meth:`select_fastest_topology`.
+        If the optimized matrix turns out to be invalid, the
+        metropolis-hastings matrix of the selected topology is returned
+        instead.
+
+        Args:
+            candidates (:py:class:`~np:numpy.ndarray`)
+                A stack of adjacency matrices with shape ``(k, n, n)`` that
+                represent possible network topologies.
+            `v_` (:py:class:`~np:numpy.ndarray`):
+                A desired distribution vector that defines the returned
+                matrix steady state property.
+
+        Returns:
+            :py:class:`~np:numpy.ndarray`:
+                A transition matrix that is likely to be a markov matrix whose
+                steady state is ``v_``. When no candidate is valid, the
+                fastest metropolis-hastings matrix is returned.
+        """
+        mh, rates = mm.new_mh_transition_matrices(candidates, v_)
+        valid = self._validate_transition_matrices(mh, v_)
+        if np.any(valid):
+            rates = np.where(valid, rates, np.inf)
+        else:
+            print(" [x] No valid candidate topology.")
+        best = int(np.argmin(rates))
+
+        t = self.select_fastest_topology(candidates[best], v_)
+        if not self._validate_transition_matrices(t[None], v_)[0]:
+            print(" [x] Invalid matrix, using metropolis-hastings.")
+            return mh[best]
+        return t
 
     # noinspection PyIncorrectDocstring
     def select_fastest_topology(
@@ -807,6 +1006,14 @@ class SGCluster(Cluster):
         The fastest of the created transition matrices corresponds to the one
         with a faster mixing rate.
 
+        Note:
+            The optimized strategies run concurrently in the
+            :py:mod:`solver service <app.domain.helpers.solver_service>`,
+            shared by all simulations of the process. When
+            :py:const:`~app.environment_settings.TOPOLOGY_RACE_DEADLINE` is
+            set, only the matrices available at the deadline are considered.
+            The metropolis-hastings matrix is always available.
+
         Args:
             a (:py:class:`~np:numpy.ndarray`)
                 An adjacency matrix that represents the network topology.
@@ -820,28 +1027,45 @@ class SGCluster(Cluster):
                 steady state is ``v_``, but is not yet validated. See
                 :py:meth:`_validate_transition_matrix`.
         """
+        optimizers = [getattr(mm, name) for name in mm.OPTIMIZATION_STRATEGIES]
+
         results: List[Tuple[Optional[np.ndarray], float]] = [
-            mm.new_mh_transition_matrix(a, v_),
-            mm.new_sdp_mh_transition_matrix(a, v_),
-            mm.new_go_transition_matrix(a, v_),
-            mm.new_mgo_transition_matrix(a, v_)
+            mm.new_mh_transition_matrix(a, v_)
         ]
+        results.extend(mm.race_transition_matrices(
+            a, v_, optimizers, es.TOPOLOGY_RACE_DEADLINE))
+
+        return self._select_fastest_result(results)
+
+    def _select_fastest_result(
+            self, results: List[Tuple[Optional[np.ndarray], float]]
+    ) -> np.ndarray:
+        """Selects the transition matrix with the fastest mixing rate.
 
+        Args:
+            results:
+                The matrices created by each strategy and their mixing
+                rates, starting with the metropolis-hastings matrix, which
+                is selected if no other matrix mixes faster.
+
+        Returns:
+            :py:class:`~np:numpy.ndarray`:
+                A copy of the fastest matrix whose entries are made
+                non-negative and whose columns are normalized.
+        """
         size = len(results)
         min_mr = float('inf')
-        fastest_matrix = None
+        # Worse case scenario fastest matrix will be the unoptmized MH.
+        fastest_matrix = results[0][0]
         for i in range(size):
             i_mr = results[i][1]
             if i_mr < min_mr:
                 # print(f"currently selected matrix {i}")
                 min_mr = i_mr
-                # Worse case scenario fastest matrix will be the unoptmized MH.
                 fastest_matrix = results[i][0]
 
-        size = fastest_matrix.shape[0]
-        for j in range(size):
-            fastest_matrix[:, j] = np.absolute(fastest_matrix[:, j])
-            fastest_matrix[:, j] /= fastest_matrix[:, j].sum()
+        fastest_matrix = np.absolute(fastest_matrix)
+        fastest_matrix /= np.sum(fastest_matrix, axis=0, keepdims=True)
         return fastest_matrix
 
     def _validate_transition_matrix(
@@ -864,14 +1088,29 @@ class SGCluster(Cluster):
             otherwise ``False``. I.e., if ``m`` is a
             markov matrix.
         """
-        t_pow = np.linalg.matrix_power(m.to_numpy(), 4096)
-        column_count = t_pow.shape[1]
-        for j in range(column_count):
-            test_target = t_pow[:, j]  # gets array column j
-            if not np.allclose(
-                    test_target, v_[0].values, atol=1e-02):
-                return False
-        return True
+        return self._validate_transition_matrices(
+            m.to_numpy()[None], v_[0].to_numpy())[0].item()
+
+    def _validate_transition_matrices(
+            self, t: np.ndarray, v_: np.ndarray) -> np.ndarray:
+        """Asserts which matrices of a stack are Markov Matrices.
+
+        Batched version of :py:meth:`_validate_transition_matrix`. All
+        matrices are raised to the power of ``4096`` together. See
+        :py:func:`~app.domain.helpers.matrices.validate_transition_matrices`.
+
+        Args:
+            t (:py:class:`~np:numpy.ndarray`):
+                A stack of column major matrices with shape ``(k, n, n)``.
+            `v_` (:py:class:`~np:numpy.ndarray`):
+                The steady state the matrices are expected to have.
+
+        Returns:
+            :py:class:`~np:numpy.ndarray`:
+                A boolean array whose entries are ``True`` if the respective
+                matrix converges to ``v_``.
+        """
+        return mm.validate_transition_matrices(t, v_)
     # endregion
 
     # region Cloud management
@@ -901,6 +1140,17 @@ class SGCluster(Cluster):
     # endregion
 
     # region Helpers
+    def _routed_files(self) -> List[sd.FileData]:
+        """Lists the files routed by the transition matrix.
+
+        Returns:
+            The :py:class:`~app.domain.helpers.smart_dataclasses.FileData`
+            of every file whose routing tables
+            :py:meth:`broadcast_transition_matrix` configures, i.e., only
+            :py:attr:`~Cluster.file`.
+        """
+        return [self.file]
+
     def equal_distributions(self) -> bool:
         """Asserts if the :py:attr:`desired distribution
         <app.domain.cluster_groups.SGCluster.v_>` and
@@ -964,6 +1214,342 @@ class SGCluster(Cluster):
     # endregion
 
 
+class SGClusterMulti(SGCluster):
+    """Represents a group of network nodes persisting multiple files using
+    swarm guidance algorithm.
+
+    All files share the :py:attr:`~Cluster.members`, the
+    :py:attr:`desired distribution <SGCluster.v_>` and the transition matrix
+    of the ``SGClusterMulti``, thus the cost of creating and broadcasting a
+    transition matrix is paid once per membership change, instead of once
+    per file. Replicas, :py:attr:`current distributions <SGCluster.cv_>`,
+    :py:attr:`average distributions <SGCluster.avg_>` and logs are tracked
+    per file.
+
+    Methods inherited from :py:class:`~app.domain.cluster_groups.SGCluster`
+    operate on the file most recently chosen with :py:meth:`select_file`,
+    which is referenced by :py:attr:`~Cluster.file`.
+
+    Note:
+        A file whose replicas are all lost fails alone, it stops being
+        simulated while the remaining files continue to be persisted. The
+        ``SGClusterMulti`` stops :py:attr:`running <Cluster.running>` when
+        all of its files have failed.
+
+    Attributes:
+        files (Dict[str, :py:class:`~app.domain.helpers.smart_dataclasses.FileData`]):
+            A dictionary mapping the :py:attr:`names
+            <app.domain.helpers.smart_dataclasses.FileData.name>` of the
+            files persisted by the ``SGClusterMulti`` to their
+            :py:class:`~app.domain.helpers.smart_dataclasses.FileData`,
+            including failed files.
+        _files_cv_ (Dict[str, :py:class:`~pd:pandas.DataFrame`]):
+            The :py:attr:`current distribution <SGCluster.cv_>` of each
+            file.
+        _files_avg_ (Dict[str, :py:class:`~pd:pandas.DataFrame`]):
+            The :py:attr:`average distribution <SGCluster.avg_>` of each
+            file.
+        _failed_files (set):
+            The names of the files that failed.
+        _unrouted_files (List[str]):
+            The names of the files that failed in the current epoch, whose
+            replicas and routing structures are yet to be removed from the
+            :py:attr:`~Cluster.members`.
+    """
+
+    def __init__(self,
+                 master: th.MasterType,
+                 file_names: List[str],
+                 members: th.NodeDict,
+                 sim_id: int = 0,
+                 origin: str = "") -> None:
+        """Instantiates an ``SGClusterMulti`` object.
+
+        Args:
+            master (:py:class:`~app.type_hints.MasterType`):
+                A reference to an :py:class:`~app.domain.master_servers.Master`
+                object that manages the ``SGClusterMulti`` being initialized.
+            file_names:
+                The names of the files the ``SGClusterMulti`` is responsible
+                for persisting. A single name is also accepted.
+            members (:py:class:`~app.type_hints.NodeDict`):
+                A dictionary where keys are :py:attr:`node identifiers
+                <app.domain.network_nodes.Node.id>` and values are their
+                :py:class:`instance objects <app.domain.network_nodes.Node>`.
+            sim_id:
+                Identifier that generates unique output file names,
+                thus guaranteeing that different simulation instances do not
+                overwrite previous out files.
+            origin:
+                The name of the simulation file name that started
+                the simulation process.
+        """
+        if isinstance(file_names, str):
+            file_names = [file_names]
+
+        self.files: Dict[str, sd.FileData] = {}
+        for name in file_names:
+            # All files are logged to the same output file, whose handle is
+            # shared through the pool of outfiles.append_text.
+            self.files[name] = super()._new_file_data(name, sim_id, origin)
+        self._files_cv_: Dict[str, pd.DataFrame] = {}
+        self._files_avg_: Dict[str, pd.DataFrame] = {}
+        self._failed_files: set = set()
+        self._unrouted_files: List[str] = []
+        super().__init__(master, file_names[0], members, sim_id, origin)
+
+    # region Cluster API
+    def select_file(self, name: str) -> None:
+        """Makes the named file the one inherited methods operate on.
+
+        Args:
+            name:
+                The :py:attr:`name
+                <app.domain.helpers.smart_dataclasses.FileData.name>` of a
+                file in :py:attr:`files`.
+        """
+        self._files_cv_[self.file.name] = self.cv_
+        self._files_avg_[self.file.name] = self.avg_
+        self.file = self.files[name]
+        self.cv_ = self._files_cv_[name]
+        self.avg_ = self._files_avg_[name]
+    # endregion
+
+    # region Simulation steps
+    def execute_epoch(self, epoch: int) -> None:
+        """Orders all :py:attr:`~Cluster.members` to execute their epoch,
+        once for each file that did not fail.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster.execute_epoch`.
+
+        Args:
+            epoch:
+                The epoch the ``SGClusterMulti`` should currently be in,
+                according to it's managing :py:attr:`~Cluster.master` entity.
+        """
+        self._timer += 1
+        self._setup_epoch(epoch)
+
+        off_nodes = self.nodes_execute()
+        self.evaluate()
+        self._drop_failed_files()
+        self.maintain(off_nodes)
+
+        if epoch == ms.Master.MAX_EPOCHS or not self._live_files():
+            self.running = False
+
+    def nodes_execute(self) -> List[th.NodeType]:
+        """Queries all network node members execute the epoch, for each file
+        that did not fail.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster.nodes_execute`.
+
+        Returns:
+            List[:py:class:`~app.type_hints.NodeType`]:
+                 A collection of members who disconnected during the current
+                 epoch. See
+                 :py:meth:`app.domain.network_nodes.Node.update_status`.
+        """
+        off_nodes = [n for n in self._members_view if not n.is_up()]
+
+        for name in self._live_files():
+            self.select_file(name)
+            self._recovery_epoch_sum = 0
+            self._recovery_epoch_calls = 0
+            lost_parts_count: int = 0
+
+            for node in self._members_view:
+                if node.is_up():
+                    node.execute_epoch(self, name)
+                    continue
+                node_replicas = node.get_file_parts(name)
+                lost_parts_count += len(node_replicas)
+                for replica in node_replicas.values():
+                    self.set_replication_epoch(replica)
+                    if replica.decrement_and_get_references() == 0:
+                        self._set_fail(f"Lost all replicas of file replica "
+                                       f"with id: {replica.id}.")
+
+            if len(off_nodes) >= len(self.members):
+                self._set_fail(
+                    "All cluster members disconnected before maintenance.")
+
+            sf: sd.LoggingData = self.file.logger
+            sf.log_off_nodes(len(off_nodes), self.current_epoch)
+            sf.log_lost_file_blocks(lost_parts_count, self.current_epoch)
+            sf.log_replication_delay(self._recovery_epoch_sum,
+                                     self._recovery_epoch_calls,
+                                     self.current_epoch)
+
+        return off_nodes
+
+    def evaluate(self) -> None:
+        """Evaluates and logs the health of every file that did not fail.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster.evaluate`.
+        """
+        for name in self._live_files():
+            self.select_file(name)
+            super().evaluate()
+
+    def maintain(self, off_nodes: List[th.NodeType]) -> None:
+        """Evicts any node who is referenced in off_nodes list from the
+        routing structures of every file.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster.maintain`.
+
+        Args:
+            off_nodes (List[:py:class:`~app.type_hints.NodeType`]):
+                The subset of :py:attr:`~Cluster.members` who disconnected
+                during the current epoch.
+        """
+        if len(off_nodes) > 0:
+            for name in self._live_files():
+                self.select_file(name)
+                self._normalize_avg_()
+            self._membership_changed = True
+            for node in off_nodes:
+                self.members.pop(node.id, None)
+                for name in self.files:
+                    node.remove_file_routing(name)
+        self.membership_maintenance()
+
+    def membership_maintenance(self) -> th.NodeDict:
+        """Attempts to recruits new network nodes to be members of the cluster.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster.membership_maintenance`.
+
+            The behavior is the same, but maintenance is logged for every
+            file that did not fail and, if membership changed, only one
+            transition matrix is repaired or created for all files.
+
+        Returns:
+            :py:class:`~app.type_hints.NodeDict`:
+                A dictionary that is empty if membership did not change.
+        """
+        sbm = len(self.members)
+        if sbm <= self.critical_size:
+            self.add_cloud_reference()
+        elif sbm >= self.sufficient_size:
+            self.remove_cloud_reference()
+        status_bm = self.get_cluster_status()
+
+        new_members: th.NodeDict = {}
+        if sbm < self.original_size:
+            new_members = self._get_new_members()
+            if new_members:
+                self.members.update(new_members)
+
+        if self._membership_changed:
+            self._members_view = list(self.members.values())
+
+        sam = len(self.members)
+        status_am = self.get_cluster_status()
+
+        epoch = self.current_epoch
+        for name in self._live_files():
+            self.files[name].logger.log_maintenance(
+                sbm, sam, status_bm, status_am, epoch)
+
+        if self._membership_changed:
+            if self._can_repair_transition_matrix(new_members):
+                self.repair_and_bcast_transition_matrix(new_members)
+            else:
+                self.create_and_bcast_new_transition_matrix()
+
+        return new_members
+    # endregion
+
+    # region Swarm guidance structure management
+    def new_desired_distribution(
+            self, member_ids: List[str], member_uptimes: List[float]
+    ) -> List[float]:
+        """Sets a new :py:attr:`desired distribution <v_>` for the
+        ``SGClusterMulti`` and resets the current and average distributions
+        of every file.
+
+        Extends:
+            :py:meth:`app.domain.cluster_groups.SGCluster.new_desired_distribution`.
+        """
+        u_ = super().new_desired_distribution(member_ids, member_uptimes)
+        self._files_cv_ = {name: self.cv_.copy() for name in self.files}
+        self._files_avg_ = {name: self.avg_.copy() for name in self.files}
+        self._files_cv_[self.file.name] = self.cv_
+        self._files_avg_[self.file.name] = self.avg_
+        return u_
+    # endregion
+
+    # region Helpers
+    def _set_fail(self, message: str) -> None:
+        """Ends the simulation of the file most recently chosen with
+        :py:meth:`select_file`.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.Cluster._set_fail`.
+
+            The ``SGClusterMulti`` keeps :py:attr:`running
+            <Cluster.running>` while other files did not fail.
+
+        Args:
+            message:
+                A short explanation of why the file failed.
+        """
+        if self.file.name not in self._failed_files:
+            self._failed_files.add(self.file.name)
+            self._unrouted_files.append(self.file.name)
+        self.file.logger.log_fail(self.current_epoch, message)
+
+    def _new_file_data(
+            self, file_name: str, sim_id: int, origin: str) -> sd.FileData:
+        """Selects the :py:class:`~app.domain.helpers.smart_dataclasses.FileData`
+        of the first file.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.Cluster._new_file_data`.
+
+            The ``FileData`` of every file is created before
+            :py:meth:`Cluster.__init__` runs, thus it is not created again.
+
+        Returns:
+            :py:class:`~app.domain.helpers.smart_dataclasses.FileData`:
+                The entry of ``file_name`` in :py:attr:`files`.
+        """
+        return self.files[file_name]
+
+    def _routed_files(self) -> List[sd.FileData]:
+        """Lists the files routed by the transition matrix.
+
+        Overrides:
+            :py:meth:`app.domain.cluster_groups.SGCluster._routed_files`.
+
+            All files that did not fail are routed by the same matrix.
+        """
+        return [self.files[name] for name in self._live_files()]
+
+    def _live_files(self) -> List[str]:
+        """Lists the files that did not fail.
+
+        Returns:
+            The names of the files in :py:attr:`files` that are not in
+            :py:attr:`_failed_files`.
+        """
+        return [name for name in self.files if name not in self._failed_files]
+
+    def _drop_failed_files(self) -> None:
+        """Removes the replicas and routing structures of the files that
+        failed in the current epoch from the :py:attr:`~Cluster.members`."""
+        for name in self._unrouted_files:
+            for node in self._members_view:
+                node.remove_file_routing(name)
+        self._unrouted_files = []
+    # endregion
+
+
 class SGClusterPerfect(SGCluster):
     """Represents a group of network nodes persisting a file using swarm
     guidance algorithm.
@@ -971,6 +1557,14 @@ class SGClusterPerfect(SGCluster):
     This implementation assumes nodes never disconnect, there are no disk
     errors and there is no link loss, i.e., it is used to study properties of
     the system independently of computing environment.
+
+    Attributes:
+        _scenario_id (int):
+            The identifier of the :py:func:`scenario
+            <app.domain.helpers.scenarios.get_scenario>` used by the
+            ``SGClusterPerfect``, which is its simulation identifier.
+            Simulations with the same identifier use the same topology and
+            desired distribution.
     """
     def __init__(self,
                  master: th.MasterType,
@@ -978,31 +1572,63 @@ class SGClusterPerfect(SGCluster):
                  members: th.NodeDict,
                  sim_id: int = 0,
                  origin: str = "") -> None:
+        self._scenario_id: int = sim_id
         super().__init__(master, file_name, members, sim_id, origin)
         self.corruption_chances: List[float] = [0.0, 1.0]
         es.set_loss_chance(0.0)
 
     # region Swarm guidance structure management
-    def new_transition_matrix(self) -> pd.DataFrame:
+    def new_transition_matrix(self) -> Tuple[np.ndarray, List[str]]:
         """Creates a new transition matrix that is likely to be a Markov Matrix.
 
+        The topology and the desired distribution are read from the
+        :py:mod:`scenario bank <app.domain.helpers.scenarios>`. If the
+        matrices of every considered strategy were precomputed for the
+        scenario, they are read instead of being created.
+
         Returns:
-            :py:class:`~pd:pandas.DataFrame`:
-                The labeled matrix that has the fastests mixing rate from all
-                the pondered strategies.
+            Tuple[:py:class:`~np:numpy.ndarray`, List[str]]:
+                The matrix that has the fastests mixing rate from all the
+                pondered strategies and the :py:attr:`identifiers
+                <app.domain.network_nodes.Node.id>` of the members at each of
+                its rows and columns.
+
+        Raises:
+            FileNotFoundError:
+                If there are no scenarios with
+                :py:attr:`~app.domain.cluster_groups.Cluster.original_size`
+                members.
         """
         node_ids = [node.id for node in self.members.values()]
 
-        a, v_ = hs.get_next_scenario(str(self.original_size))
+        count = sc.count_scenarios(self.original_size)
+        if count == 0:
+            raise FileNotFoundError(
+                f"No scenarios of size {self.original_size} in "
+                f"{es.SCENARIOS_ROOT}, run sample_scenario_generator.py.")
+        sid = self._scenario_id % count
+        a, v_ = sc.get_scenario(self.original_size, sid)
 
         self.v_ = pd.DataFrame(data=v_, index=node_ids)
         self.cv_ = pd.DataFrame(data=[0] * len(self.v_), index=node_ids)
         self.avg_ = pd.DataFrame(data=[0] * len(self.v_), index=node_ids)
         self._timer = 0
 
-        t = self.select_fastest_topology(a, v_)
+        strategies = ["new_mh_transition_matrix"]
+        if es.OPTIMIZE:
+            strategies.extend(mm.OPTIMIZATION_STRATEGIES)
+        results = sc.get_strategy_results(self.original_size, sid, strategies)
 
-        return pd.DataFrame(t, index=node_ids, columns=node_ids)
+        if results is None:
+            # Scenarios are fixed, only the stored topology is a candidate.
+            t = self.select_candidate_topology(a[None], v_)
+        else:
+            t = self._select_fastest_result(results)
+            if not self._validate_transition_matrices(t[None], v_)[0]:
+                print(" [x] Invalid matrix, using metropolis-hastings.")
+                t = self._select_fastest_result(results[:1])
+
+        return t, node_ids
     # endregion
 
     # region Simulation steps
@@ -1040,12 +1666,8 @@ class SGClusterPerfect(SGCluster):
         if es.OPTIMIZE:
             return super().select_fastest_topology(a, v_)
 
-        fastest_matrix, _ = mm.new_mh_transition_matrix(a, v_)
-        size = fastest_matrix.shape[0]
-        for j in range(size):
-            fastest_matrix[:, j] = np.absolute(fastest_matrix[:, j])
-            fastest_matrix[:, j] /= fastest_matrix[:, j].sum()
-        return fastest_matrix
+        return self._select_fastest_result(
+            [mm.new_mh_transition_matrix(a, v_)])
     # endregion
 
 
@@ -39,3 +39,19 @@ class HttpCodes(Enum):
     TIME_OUT: int = 408
     SERVER_DOWN: int = 521
 
+
+class ClusterStatus(Enum):
+    """Enumerator that defines the health of a cluster group, as described
+    by :py:meth:`~app.domain.cluster_groups.Cluster.get_cluster_status`.
+
+    Values are the codes stored by
+    :py:class:`~app.domain.helpers.smart_dataclasses.LoggingData`, whose
+    unlogged epochs have the code of NONE.
+    """
+    NONE: int = 0
+    REDUNDANT: int = 1
+    STABLE: int = 2
+    SUFFICIENT: int = 3
+    UNSTABLE: int = 4
+    CRITICAL: int = 5
+    DEAD: int = 6
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import threading
 import numpy as np
-from typing import Any
+from typing import Any, Optional
 
 from domain.helpers.exceptions import MatlabEngineContainerError
 from environment_settings import MATLAB_DIR
@@ -40,18 +40,21 @@ class MatlabEngineContainer:
     _LOCK = threading.RLock()
     #: A reference to the instance of `MatlabEngineContainer` or `None`.
     _instance: MatlabEngineContainer = None
+    #: Indicates if an engine failed to start, in which case it is not retried.
+    _failed: bool = False
 
     @staticmethod
     def get_instance() -> MatlabEngineContainer:
         """Used to obtain a singleton instance of ``MatlabEngineContainer``.
 
         If one instance already exists that instance is returned,
-        otherwise a new one is created and returned.
+        otherwise a new one is created and returned. Callers wait for an
+        engine that is being started by :py:meth:`warm_up`.
 
         Returns:
             A reference to the existing ``MatlabEngineContainer``
             :py:const:`instance <_instance>` or None if matlab python engine
-            is not properly installed.
+            is not properly installed or failed to start.
         """
         if not __engine_available__:
             print("matlab.engine module is not installed.")
@@ -59,10 +62,31 @@ class MatlabEngineContainer:
 
         if MatlabEngineContainer._instance is None:
             with MatlabEngineContainer._LOCK:
-                if MatlabEngineContainer._instance is None:
+                if MatlabEngineContainer._instance is None and \
+                        not MatlabEngineContainer._failed:
                     MatlabEngineContainer()
         return MatlabEngineContainer._instance
 
+    @staticmethod
+    def warm_up() -> Optional[threading.Thread]:
+        """Starts the singleton engine in a background thread.
+
+        The engine is otherwise only started by the first call to
+        :py:meth:`get_instance`, thus warming it up hides the startup time
+        behind other work, e.g., loading simulation files.
+
+        Returns:
+            The daemon thread starting the engine or ``None`` if the engine
+            already started, failed to start or is not installed.
+        """
+        if not __engine_available__ or MatlabEngineContainer._failed or \
+                MatlabEngineContainer._instance is not None:
+            return None
+        thread = threading.Thread(
+            target=MatlabEngineContainer.get_instance, daemon=True)
+        thread.start()
+        return thread
+
     def __init__(self) -> None:
         """Instantiates a new MatlabEngineContainer object.
 
@@ -77,6 +101,7 @@ class MatlabEngineContainer:
                 self.eng.cd(MATLAB_DIR)
                 MatlabEngineContainer._instance = self
             except matlab.engine.EngineError:
+                MatlabEngineContainer._failed = True
                 print("Unexpected error occured. Do you have a valid matlab license?")
         else:
             raise RuntimeError("MatlabEngineContainer is a Singleton. Use "
@@ -6,25 +6,63 @@ as well as any steady-state or transition matrix optimization algorithms in
 this module.
 """
 
+import time
 import random
-from typing import Tuple, Optional
+import threading
+
+from collections import OrderedDict
+from typing import Tuple, Optional, List, Callable, Dict, Union
 
 import cvxpy as cvx
 import numpy as np
-from mosek import MosekException
+from scipy import sparse, optimize
 from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import (
+    LinearOperator, eigs, eigsh, ArpackNoConvergence)
+
+import environment_settings as es
+import domain.helpers.solvers as sv
+import domain.helpers.solver_service as ss
 
 from domain.helpers.exceptions import *
 from domain.helpers.matlab_utils import MatlabEngineContainer
+from domain.helpers.matrix_store import persistent
 from utils.randoms import random_index
 
 OPTIMAL_STATUS = {cvx.OPTIMAL, cvx.OPTIMAL_INACCURATE}
 
+_Matrix = Union[np.ndarray, sparse.spmatrix]
+
+_MatrixStrategy = Callable[
+    [np.ndarray, np.ndarray], Tuple[Optional[np.ndarray], float]]
+
+OPTIMIZATION_STRATEGIES: Tuple[str, ...] = (
+    "new_sdp_mh_transition_matrix",
+    "new_go_transition_matrix",
+    "new_mgo_transition_matrix",
+    "new_fo_transition_matrix",
+)
+"""Names of the transition matrix constructors that optimize the mixing rate
+of a topology and that are compared against
+:py:func:`new_mh_transition_matrix` when a cluster selects its fastest
+transition matrix. Their results are kept by the
+:py:mod:`persistent matrix store <app.domain.helpers.matrix_store>`."""
+
+EDGE_TEMPLATES_CACHE_SIZE: int = 32
+"""Number of edge patterns whose edge-sparse problems are kept, per thread
+and kind of problem, so that they are only canonicalized once."""
+
+DENSE_EIGEN_MAX_SIZE: int = 256
+"""Largest matrix size for which :py:func:`new_fo_transition_matrix` uses dense
+eigen-decompositions. Bigger matrices use Lanczos iterations instead."""
+
+_templates = threading.local()
+
 
 # region Markov Matrix Constructors
 # noinspection PyIncorrectDocstring
 def new_mh_transition_matrix(
-        a: np.ndarray, v_: np.ndarray) -> Tuple[np.ndarray, float]:
+        a: _Matrix, v_: np.ndarray) -> Tuple[_Matrix, float]:
     """ Constructs a transition matrix using metropolis-hastings.
 
     Constructs a transition matrix using metropolis-hastings algorithm  for
@@ -32,11 +70,13 @@ def new_mh_transition_matrix(
 
     Note:
         The input Matrix hould have no transient states or absorbent nodes,
-        but this is not enforced or verified.
+        but this is not enforced or verified. Sparse topologies, e.g., those
+        created by :py:func:`new_k_regular_matrix`, result in sparse markov
+        matrices.
 
     Args:
         a:
-            A symmetric adjency matrix.
+            A symmetric adjency matrix, dense or ``scipy.sparse``.
         `v_`:
             A stochastic steady state distribution vector.
 
@@ -50,6 +90,7 @@ def new_mh_transition_matrix(
 
 
 # noinspection PyIncorrectDocstring
+@persistent
 def new_sdp_mh_transition_matrix(
         a: np.ndarray, v_: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
     """Constructs a transition matrix using semi-definite programming techniques.
@@ -82,6 +123,7 @@ def new_sdp_mh_transition_matrix(
 
 
 # noinspection PyIncorrectDocstring
+@persistent
 def new_go_transition_matrix(
         a: np.ndarray, v_: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
     """Constructs a transition matrix using global optimization techniques.
@@ -91,6 +133,13 @@ def new_go_transition_matrix(
     Result is only trully optimal if :math:`normal(Mopt - (1 / len(v)), 2)`
     is equal to the highest Markov Matrix eigenvalue that is smaller than one.
 
+    Note:
+        Topologies whose density is at most
+        :py:const:`~app.environment_settings.SPARSE_FORMULATION_DENSITY`
+        are optimized with an
+        edge-sparse formulation of the problem. See
+        :py:func:`_edge_go_problem`.
+
     Args:
         a:
             A non-optimized symmetric adjency matrix.
@@ -101,30 +150,9 @@ def new_go_transition_matrix(
         Markov Matrix with ``v_`` as steady state distribution and the
         respective mixing rate.
     """
-    # Allocate python variables
-    n: int = a.shape[0]
-    ones_vector: np.ndarray = np.ones(
-        n)  # np.ones((3,1)) shape is (3, 1)... whereas np.ones(n) shape is (3,), the latter is closer to cvxpy representation of vector
-    ones_matrix: np.ndarray = np.ones((n, n))
-    zeros_matrix: np.ndarray = np.zeros((n, n))
-    u: np.ndarray = np.ones((n, n)) / n
-
-    # Specificy problem variables
-    t: cvx.Variable = cvx.Variable((n, n))
-
-    # Create constraints - Python @ is Matrix Multiplication (MatLab equivalent is *), # Python * is Element-Wise Multiplication (MatLab equivalent is .*)
-    constraints = [
-        t >= 0,  # Entries must be non-negative
-        (t @ ones_vector) == ones_vector,  # Row vector sum equals one
-        cvx.multiply(t, ones_matrix - a) == zeros_matrix,   # any zero entry in topology is also a zero in the new matrix
-        (v_ @ t) == v_,  # The resulting markov matrix must converge to equilibrium.
-    ]
-
-    # Formulate and Solve Problem
+    problem, t = new_optimization_problem("go", a, v_)
     try:
-        objective = cvx.Minimize(cvx.norm(t - u, 2))
-        problem = cvx.Problem(objective, constraints)
-        problem.solve()
+        sv.solve(problem, "go")
 
         if problem.status in OPTIMAL_STATUS:
             return t.value.transpose(), get_mixing_rate(t.value)
@@ -135,20 +163,62 @@ def new_go_transition_matrix(
 
 
 # noinspection PyIncorrectDocstring
+@persistent
 def new_mgo_transition_matrix(
         a: np.ndarray, v_: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
-    """Constructs an optimized transition matrix using the matlab engine.
+    """Constructs an optimized transition matrix using global optimization.
 
-    Constructs an optimized transition matrix using linear programming
-    relaxations and convex envelope approximations for the specified steady
-    state ``v``.
-    Result is only trully optimal if :math:`normal(Mopt - (1 / len(v)), 2)`
-    is equal to the highest Markov Matrix eigenvalue that is smaller than one.
+    Constructs the transition matrix, over the edges of ``a``, whose
+    spectral distance :math:`normal(Mopt - (1 / len(v)), 2)` to the uniform
+    matrix is minimal, for the specified steady state ``v``. Result is only
+    trully optimal if :math:`normal(Mopt - (1 / len(v)), 2)` is equal to the
+    highest Markov Matrix eigenvalue that is smaller than one.
 
     Note:
-        This function's code runs inside a matlab engine because it provides
-        a non-convex SDP solver BMIBNB. If you do not have valid matlab
-        license the output of this function is always ``(None, float('inf')``.
+        With the default ``"python"``
+        :py:const:`~app.environment_settings.MGO_ENGINE`, the problem is
+        solved by :py:const:`~app.environment_settings.MGO_STARTS` local
+        searches, see :py:func:`_mgo_local_search`, that run one after the
+        other in the calling process, i.e., in one worker of the
+        :py:mod:`solver service <app.domain.helpers.solver_service>`, so
+        their solve time grows linearly with the number of starts. With the ``"matlab"`` engine, this function's code
+        runs inside a matlab engine because it provides a non-convex SDP
+        solver BMIBNB. If you do not have valid matlab license the output of
+        the ``"matlab"`` engine is always ``(None, float('inf')``.
+
+    Args:
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+
+    Returns:
+        Markov Matrix with ``v_`` as steady state distribution and the
+        respective mixing rate.
+    """
+    if es.MGO_ENGINE == "matlab":
+        return _matlab_global_opt(a, v_)
+
+    rows, cols = _topology_edges(a)
+    x_mh = np.asarray(_metropolis_hastings(
+        a, v_, column_major_out=False)[rows, cols]).ravel()
+    seeds = np.random.SeedSequence(
+        np.random.randint(2 ** 31)).spawn(max(es.MGO_STARTS, 1))
+    results = [_mgo_local_search(a.shape[0], rows, cols, v_, x_mh, seed)
+               for seed in seeds]
+
+    _, x = min(results, key=lambda r: r[0])
+    if x is None:
+        return None, float('inf')
+    t = np.zeros(a.shape)
+    t[rows, cols] = x
+    t = t.transpose()
+    return t, get_mixing_rate(t)
+
+
+def _matlab_global_opt(
+        a: np.ndarray, v_: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+    """Runs the ``"matlab"`` engine of :py:func:`new_mgo_transition_matrix`.
 
     Args:
         a:
@@ -173,6 +243,171 @@ def new_mgo_transition_matrix(
             return None, float('inf')
     except MatlabEngineContainerError:
         return None, float('inf')
+
+
+# noinspection PyIncorrectDocstring
+@persistent
+def new_fo_transition_matrix(
+        a: np.ndarray,
+        v_: np.ndarray,
+        max_iters: int = 300,
+        max_time: float = 30.0) -> Tuple[Optional[np.ndarray], float]:
+    """Constructs an optimized transition matrix using first-order methods.
+
+    Constructs the fastest mixing reversible markov matrix over the edges
+    of ``a`` for the specified steady state ``v_``, by projected subgradient
+    descent over the flows of the edges. The method starts from the
+    metropolis-hastings flows and only relies on numpy and scipy, thus it
+    scales to clusters with thousands of members, where the semi-definite
+    programs solved by :py:func:`new_sdp_mh_transition_matrix` or
+    :py:func:`new_go_transition_matrix` become too slow or memory-hungry.
+
+    Note:
+        Matrices bigger than :py:const:`DENSE_EIGEN_MAX_SIZE` have their
+        extreme eigenvalues computed with Lanczos iterations. The result is
+        not guaranteed to be optimal, but it is never worse than the
+        initial metropolis-hastings flows.
+
+    Args:
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+        max_iters:
+            The maximum number of subgradient iterations.
+        max_time:
+            The maximum number of seconds spent iterating.
+
+    Returns:
+        Markov Matrix with ``v_`` as steady state distribution and the
+        respective mixing rate or ``None, float('inf')`` if the problem is
+        infeasible.
+    """
+    if v_.shape[0] != a.shape[0] or np.any(v_ <= 0):
+        return None, float('inf')
+
+    pi = v_ / np.sum(v_)
+    incidence, w = _initial_flows(a, pi)
+    if w.size == 0:
+        return None, float('inf')
+
+    deadline = time.perf_counter() + max_time
+    step = 0.5 * np.linalg.norm(w)
+    best_w = w
+    best_f = float('inf')
+    try:
+        for k in range(1, max_iters + 1):
+            f, g = _flows_subgradient(incidence, w, pi)
+            if f < best_f:
+                best_f, best_w = f, w
+            g_norm = np.linalg.norm(g)
+            if g_norm == 0 or time.perf_counter() >= deadline:
+                break
+            w = _project_flows(incidence, w - (step / np.sqrt(k)) * g / g_norm, pi)
+    except ArpackNoConvergence:
+        if not np.isfinite(best_f):
+            return None, float('inf')
+
+    t = _flows_to_transition_matrix(incidence, best_w, pi)
+    return t.transpose(), get_mixing_rate(t)
+# endregion
+
+
+# region Batched Markov Matrix Construction
+def new_mh_transition_matrices(
+        a: np.ndarray, v_: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Constructs a batch of transition matrices using metropolis-hastings.
+
+    Equivalent to calling :py:func:`new_mh_transition_matrix` on each
+    adjacency matrix of the stack, followed by taking the absolute value of
+    the entries and renormalizing the columns of the result, as done by
+    :py:meth:`~app.domain.cluster_groups.SGCluster.select_fastest_topology`,
+    but all matrices are processed together by vectorized operations.
+
+    Args:
+        a:
+            A stack of symmetric adjency matrices with shape ``(k, n, n)``.
+        `v_`:
+            A stochastic steady state distribution vector with length ``n``.
+
+    Returns:
+        The stack of column major markov matrices and their respective
+        mixing rates.
+
+    Raises:
+        DistributionShapeError:
+            When the length of ``v_`` is not the same as the matrices in `a`.
+        MatrixNotSquareError:
+            When the matrices in `a` are not square matrices.
+    """
+    if a.ndim != 3 or a.shape[1] != a.shape[2]:
+        raise MatrixNotSquareError(
+            "shape: {}, expected a stack of square matrices".format(a.shape))
+    if v_.shape[0] != a.shape[2]:
+        raise DistributionShapeError(
+            "distribution shape: {}, proposal matrices shape: {}".format(
+                v_.shape, a.shape))
+
+    size: int = a.shape[1]
+    degrees = np.sum(a, axis=2)
+    # Column major random walks, see _construct_random_walk_matrix.
+    rw = a / degrees[:, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = ((v_[None, None, :] * np.swapaxes(rw, 1, 2))
+             / (v_[None, :, None] * rw))
+        m = np.where(a != 0, rw * np.fmin(1, r), 0.0)
+
+    diagonal = np.arange(size)
+    m[:, diagonal, diagonal] = 0.0
+    m[:, diagonal, diagonal] = 1 - np.sum(m, axis=2)
+
+    t = np.abs(np.swapaxes(m, 1, 2))
+    t /= np.sum(t, axis=1, keepdims=True)
+    return t, get_mixing_rates(t)
+# endregion
+
+
+# region Concurrent Markov Matrix Construction
+def race_transition_matrices(
+        a: np.ndarray,
+        v_: np.ndarray,
+        strategies: List[_MatrixStrategy],
+        deadline: Optional[float]) -> List[Tuple[Optional[np.ndarray], float]]:
+    """Runs multiple transition matrix strategies concurrently under a
+    wall-clock budget.
+
+    Each strategy executes in a worker process of the shared
+    :py:mod:`solver service <app.domain.helpers.solver_service>`, which
+    solves identical requests of concurrent simulations once and caps how
+    many strategies run at the same time. Strategies that did not finish
+    before the ``deadline`` are stopped, so that they do not delay the
+    strategies of later requests, see
+    :py:func:`~app.domain.helpers.solver_service.expire`.
+
+    Note:
+        Strategies must be module level functions so that they can be
+        pickled. Strategies that depend on the
+        :py:class:`~app.domain.helpers.matlab_utils.MatlabEngineContainer`
+        start one matlab engine per worker process.
+
+    Args:
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+        strategies:
+            The transition matrix constructors to be executed, e.g.,
+            :py:func:`new_go_transition_matrix`.
+        deadline:
+            The maximum number of seconds to wait for the ``strategies`` or
+            ``None`` to wait for all of them.
+
+    Returns:
+        One ``(matrix, mixing rate)`` pair for each of the ``strategies``,
+        in the same order. Strategies that failed or exceeded the
+        ``deadline`` are represented by ``(None, float('inf'))``.
+    """
+    return ss.solve(a, v_, strategies, deadline)
 # endregion
 
 
@@ -185,10 +420,11 @@ def _adjency_matrix_sdp_optimization(
     with the the same length as the inputed symmetric matrix.
 
     Note:
-        This function tries to use
-        `Mosek Solver <https://docs.mosek.com/9.2/pythonapi/index.html>`_,
-        if a valid license is not found, it uses
-        `SCS Solver <https://github.com/cvxgrp/scs>`_ instead.
+        The problem is solved by the fastest available
+        :py:mod:`solver backend <app.domain.helpers.solvers>`, e.g.,
+        `Mosek Solver <https://docs.mosek.com/9.2/pythonapi/index.html>`_
+        if a valid license is found or
+        `SCS Solver <https://github.com/cvxgrp/scs>`_.
 
     Args:
         a:
@@ -196,64 +432,773 @@ def _adjency_matrix_sdp_optimization(
 
     Returns:
         The optimal matrix or None if the problem is unfeasible.
+
+    Raises:
+        SolverError:
+            If no solver backend could solve the problem.
+    """
+    problem, a_opt = new_optimization_problem("sdp", a)
+    sv.solve(problem, "sdp")
+    return problem, a_opt
+
+
+def new_optimization_problem(
+        kind: str,
+        a: _Matrix,
+        v_: Optional[np.ndarray] = None) -> Tuple[cvx.Problem, cvx.Expression]:
+    """Creates the optimization problem solved by a transition matrix strategy.
+
+    Topologies whose density is at most
+    :py:const:`~app.environment_settings.SPARSE_FORMULATION_DENSITY` are
+    formulated with :py:func:`_edge_sdp_problem` or
+    :py:func:`_edge_go_problem`, others reuse the compiled templates of
+    :py:func:`_get_sdp_template` or :py:func:`_get_go_template`.
+
+    Args:
+        kind:
+            ``"sdp"`` for the adjacency matrix optimization of
+            :py:func:`new_sdp_mh_transition_matrix` or ``"go"`` for the
+            transition matrix optimization of
+            :py:func:`new_go_transition_matrix`.
+        a:
+            Any symmetric adjacency matrix.
+        `v_`:
+            A stochastic steady state distribution vector, required by
+            ``"go"`` problems.
+
+    Returns:
+        The problem and the expression holding the optimized matrix.
+    """
+    if kind == "sdp":
+        if _is_sparse_topology(a):
+            return _edge_sdp_problem(a)
+        # Fetch a compiled problem and assign the current topology
+        problem, a_opt, off_topology = _get_sdp_template(a.shape[0])
+        off_topology.value = _off_topology_mask(a)
+        return problem, a_opt
+    if kind == "go":
+        if _is_sparse_topology(a):
+            return _edge_go_problem(a, v_)
+        # Fetch a compiled problem and assign the current topology and steady state
+        problem, t, off_topology, v_param = _get_go_template(a.shape[0])
+        off_topology.value = _off_topology_mask(a)
+        v_param.value = v_
+        return problem, t
+    raise ValueError(f"Unknown optimization problem kind: {kind}.")
+
+
+def _get_go_template(n: int) -> Tuple[
+        cvx.Problem, cvx.Variable, cvx.Parameter, cvx.Parameter]:
+    """Gets the parameterized global optimization problem for size ``n``.
+
+    The problem is built once per thread and size and follows cvxpy's
+    disciplined parametrized programming rules, thus it is only
+    canonicalized by the solver the first time it is solved. Templates are
+    kept per thread because cvxpy problems are not thread safe.
+
+    Args:
+        n:
+            The number of rows and columns of the adjacency matrix.
+
+    Returns:
+        The problem, the transition matrix variable, the off-topology mask
+        parameter and the steady state parameter, respectively.
     """
+    cache = _get_thread_templates("go")
+    if n in cache:
+        return cache[n]
+
+    # Allocate python variables
+    ones_vector: np.ndarray = np.ones(
+        n)  # np.ones((3,1)) shape is (3, 1)... whereas np.ones(n) shape is (3,), the latter is closer to cvxpy representation of vector
+    zeros_matrix: np.ndarray = np.zeros((n, n))
+    u: np.ndarray = np.ones((n, n)) / n
+
+    # Specificy problem variables and parameters
+    t: cvx.Variable = cvx.Variable((n, n))
+    off_topology: cvx.Parameter = cvx.Parameter((n, n), nonneg=True)
+    v_: cvx.Parameter = cvx.Parameter(n, nonneg=True)
+
+    # Create constraints - Python @ is Matrix Multiplication (MatLab equivalent is *), # Python * is Element-Wise Multiplication (MatLab equivalent is .*)
+    constraints = [
+        t >= 0,  # Entries must be non-negative
+        (t @ ones_vector) == ones_vector,  # Row vector sum equals one
+        cvx.multiply(t, off_topology) == zeros_matrix,   # any zero entry in topology is also a zero in the new matrix
+        (v_ @ t) == v_,  # The resulting markov matrix must converge to equilibrium.
+    ]
+
+    # Formulate Problem
+    objective = cvx.Minimize(cvx.norm(t - u, 2))
+    problem = cvx.Problem(objective, constraints)
+
+    cache[n] = (problem, t, off_topology, v_)
+    return cache[n]
+
+
+def _get_sdp_template(
+        n: int) -> Tuple[cvx.Problem, cvx.Variable, cvx.Parameter]:
+    """Gets the parameterized semi-definite problem for size ``n``.
+
+    See :py:func:`_get_go_template`.
+
+    Args:
+        n:
+            The number of rows and columns of the adjacency matrix.
+
+    Returns:
+        The problem, the optimized adjacency matrix variable and the
+        off-topology mask parameter, respectively.
+    """
+    cache = _get_thread_templates("sdp")
+    if n in cache:
+        return cache[n]
 
     # Allocate python variables
-    n: int = a.shape[0]
     ones_vector: np.ndarray = np.ones(
         n)  # np.ones((3,1)) shape is (3, 1)... whereas np.ones(n) shape is (3,), the latter is closer to cvxpy representation of vector
-    ones_matrix: np.ndarray = np.ones((n, n))
     zeros_matrix: np.ndarray = np.zeros((n, n))
     u: np.ndarray = np.ones((n, n)) / n
 
-    # Specificy problem variables
+    # Specificy problem variables and parameters
     a_opt: cvx.Variable = cvx.Variable((n, n), symmetric=True)
     t: cvx.Variable = cvx.Variable()
     i: np.ndarray = np.identity(n)
+    off_topology: cvx.Parameter = cvx.Parameter((n, n), nonneg=True)
 
     # Create constraints - Python @ is Matrix Multiplication (MatLab equivalent is *), # Python * is Element-Wise Multiplication (MatLab equivalent is .*)
     constraints = [
         a_opt >= 0,  # Entries must be non-negative
         (a_opt @ ones_vector) == ones_vector,  # Row vector sum equals one
-        cvx.multiply(a_opt, ones_matrix - a) == zeros_matrix,  # any zero entry in topology is also a zero in the new matrix
+        cvx.multiply(a_opt, off_topology) == zeros_matrix,  # any zero entry in topology is also a zero in the new matrix
         (a_opt - u) >> (-t * i),  # eigenvalue lower bound,
         (a_opt - u) << (t * i)  # eigenvalue upper bound
     ]  # cvxpy does not accept chained constraints, e.g.: 0 <= x <= 1
 
-    # Formulate and Solve Problem
+    # Formulate Problem
     objective = cvx.Minimize(t)
     problem = cvx.Problem(objective, constraints)
 
-    try:
-        # try using Mosek before any other solver for SDP problem solving.
-        if cvx.MOSEK in cvx.installed_solvers():
-            problem.solve(solver=cvx.MOSEK)
-        else:
-            problem.solve(solver=cvx.SCS)
-    except MosekException:
-        # catches invalid MosekException invalid license.
-        problem.solve(solver=cvx.SCS)
+    cache[n] = (problem, a_opt, off_topology)
+    return cache[n]
+
+
+def _edge_go_problem(
+        a: _Matrix, v_: np.ndarray) -> Tuple[cvx.Problem, cvx.Expression]:
+    """Formulates the global optimization problem over the edges of ``a``.
+
+    Equivalent to the problem built by :py:func:`_get_go_template`, but one
+    variable exists for each non-zero entry of ``a``, including self-loops,
+    and the transition matrix is assembled from them. Row sums and the
+    steady state constraints are expressed directly on the edge variables,
+    thus the problem has ``O(|E|)`` unknowns instead of ``O(n^2)``. The
+    problem is parameterized by ``v_`` and cached per edge pattern, see
+    :py:func:`_get_edge_template`.
+
+    Args:
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+
+    Returns:
+        The problem and the expression of the row major transition matrix.
+    """
+    rows, cols = _topology_edges(a)
+    template = _get_edge_template("go", a.shape[0], rows, cols)
+    if template is None:
+        n: int = a.shape[0]
+        e: int = rows.shape[0]
+        edges = np.arange(e)
+
+        # Sparse maps from edge weights to matrix entries, row and column sums
+        scatter = sparse.csc_matrix(
+            (np.ones(e), (rows + cols * n, edges)), shape=(n * n, e))
+        row_sums = sparse.csc_matrix((np.ones(e), (rows, edges)), shape=(n, e))
+        col_sums = sparse.csc_matrix((np.ones(e), (cols, edges)), shape=(n, e))
+
+        x: cvx.Variable = cvx.Variable(e, nonneg=True)
+        v_param: cvx.Parameter = cvx.Parameter(n, nonneg=True)
+        v_edges: cvx.Parameter = cvx.Parameter(e, nonneg=True)
+        t: cvx.Expression = cvx.reshape(scatter @ x, (n, n), order='F')
+        u: np.ndarray = np.ones((n, n)) / n
+
+        constraints = [
+            (row_sums @ x) == np.ones(n),  # Row vector sum equals one
+            (col_sums @ cvx.multiply(v_edges, x)) == v_param,  # The resulting markov matrix must converge to equilibrium.
+        ]
+
+        objective = cvx.Minimize(cvx.norm(t - u, 2))
+        template = _set_edge_template(
+            "go", a.shape[0], rows, cols,
+            (cvx.Problem(objective, constraints), t, v_param, v_edges))
+
+    problem, t, v_param, v_edges = template
+    v_param.value = v_
+    v_edges.value = v_[rows]
+    return problem, t
+
+
+def _edge_sdp_problem(a: _Matrix) -> Tuple[cvx.Problem, cvx.Expression]:
+    """Formulates the semi-definite optimization problem over the edges of
+    ``a``.
+
+    Equivalent to the problem built by :py:func:`_get_sdp_template`,
+    including its eigenvalue bounds on the symmetric matrix. The optimized
+    matrix is written as ``I - B diag(w) B^T`` where ``w`` has one weight
+    for each undirected edge of ``a`` that is not a self-loop and ``B`` is
+    the incidence matrix of those edges. Rows of such matrices always sum to
+    one, only diagonal entries must be constrained. The problem is cached
+    per edge pattern, see :py:func:`_get_edge_template`.
+
+    Args:
+        a:
+            Any symmetric adjacency matrix.
+
+    Returns:
+        The problem and the expression of the optimized adjacency matrix.
+    """
+    n: int = a.shape[0]
+    rows, cols = _topology_edges(a)
+    template = _get_edge_template("sdp", n, rows, cols)
+    if template is not None:
+        return template
+
+    sloops = np.zeros(n, dtype=bool)
+    sloops[rows[rows == cols]] = True
+    upper = rows < cols
+    e_rows, e_cols = rows[upper], cols[upper]
+    e: int = e_rows.shape[0]
+    edges = np.arange(e)
+
+    # Each edge (i, j) adds w to entries (i, i), (j, j) of the laplacian and
+    # subtracts w from entries (i, j), (j, i).
+    laplacian = sparse.csc_matrix((
+        np.concatenate([np.ones(2 * e), -np.ones(2 * e)]),
+        (np.concatenate([e_rows * (n + 1), e_cols * (n + 1),
+                         e_rows + e_cols * n, e_cols + e_rows * n]),
+         np.tile(edges, 4))
+    ), shape=(n * n, e))
+    incidence = sparse.csc_matrix(
+        (np.ones(2 * e),
+         (np.concatenate([e_rows, e_cols]), np.tile(edges, 2))),
+        shape=(n, e))
+
+    w: cvx.Variable = cvx.Variable(e, nonneg=True)
+    t: cvx.Variable = cvx.Variable()
+    i: np.ndarray = np.identity(n)
+    a_opt: cvx.Expression = i - cvx.reshape(laplacian @ w, (n, n), order='F')
+    u: np.ndarray = np.ones((n, n)) / n
+
+    # Diagonal entries must be non-negative and zero when there is no loop
+    constraints = [
+        (a_opt - u) >> (-t * i),  # eigenvalue lower bound,
+        (a_opt - u) << (t * i)  # eigenvalue upper bound
+    ]
+    if sloops.any():
+        constraints.append(incidence[sloops, :] @ w <= 1)
+    if not sloops.all():
+        constraints.append(incidence[~sloops, :] @ w == 1)
+
+    objective = cvx.Minimize(t)
+    return _set_edge_template(
+        "sdp", n, rows, cols, (cvx.Problem(objective, constraints), a_opt))
+
+
+def _get_edge_template(kind: str,
+                       n: int,
+                       rows: np.ndarray,
+                       cols: np.ndarray) -> Optional[Tuple]:
+    """Gets the calling thread's edge-sparse problem of an edge pattern.
+
+    Args:
+        kind:
+            The kind of problem, e.g., ``"go"`` or ``"sdp"``.
+        n:
+            The number of rows and columns of the adjacency matrix.
+        rows:
+            The row indices of the edges, see :py:func:`_topology_edges`.
+        cols:
+            The column indices of the edges.
+
+    Returns:
+        The cached problem and its expressions or ``None`` if the pattern
+        was not formulated recently.
+    """
+    cache = _get_thread_templates(f"edge_{kind}")
+    key = (n, rows.tobytes(), cols.tobytes())
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    return None
+
+
+def _set_edge_template(kind: str,
+                       n: int,
+                       rows: np.ndarray,
+                       cols: np.ndarray,
+                       template: Tuple) -> Tuple:
+    """Caches an edge-sparse problem, see :py:func:`_get_edge_template`.
+
+    At most :py:const:`EDGE_TEMPLATES_CACHE_SIZE` patterns are kept per
+    thread and kind, the least recently used is discarded first.
+
+    Returns:
+        The ``template``.
+    """
+    cache = _get_thread_templates(f"edge_{kind}")
+    cache[(n, rows.tobytes(), cols.tobytes())] = template
+    while len(cache) > EDGE_TEMPLATES_CACHE_SIZE:
+        cache.popitem(last=False)
+    return template
+
+
+def _is_sparse_topology(a: _Matrix) -> bool:
+    """Checks if ``a`` should be optimized with edge-sparse formulations.
+
+    Args:
+        a:
+            Any adjacency matrix, dense or ``scipy.sparse``.
+
+    Returns:
+        ``True`` if the density of ``a`` does not exceed
+        :py:const:`~app.environment_settings.SPARSE_FORMULATION_DENSITY`,
+        otherwise ``False``.
+    """
+    n: int = a.shape[0]
+    density: float = es.SPARSE_FORMULATION_DENSITY
+    if density <= 0:
+        return False
+    if sparse.issparse(a):
+        return a.count_nonzero() <= density * n * n
+    return np.count_nonzero(a) <= density * n * n
+
+
+def _topology_edges(a: _Matrix) -> Tuple[np.ndarray, np.ndarray]:
+    """Lists the non-zero entries of an adjacency matrix.
+
+    Args:
+        a:
+            Any adjacency matrix, dense or ``scipy.sparse``.
+
+    Returns:
+        The row and column indices of the edges of ``a``, respectively.
+    """
+    return a.nonzero()
 
-    return problem, a_opt
 
+def clear_problem_templates() -> None:
+    """Discards the problem templates cached by the calling thread, e.g., so
+    that benchmarks measure the resources used to create them."""
+    _templates.__dict__.clear()
 
+
+def _get_thread_templates(kind: str) -> OrderedDict:
+    """Gets the calling thread's cache of problem templates of one kind.
+
+    Args:
+        kind:
+            The kind of problem, e.g., ``"go"`` or ``"sdp"``.
+
+    Returns:
+        A dictionary mapping problem sizes, or edge patterns, to problem
+        templates.
+    """
+    if not hasattr(_templates, kind):
+        setattr(_templates, kind, OrderedDict())
+    return getattr(_templates, kind)
+
+
+def _off_topology_mask(a: _Matrix) -> np.ndarray:
+    """Marks the entries of an adjacency matrix that are not edges.
+
+    Args:
+        a:
+            Any adjacency matrix, dense or ``scipy.sparse``.
+
+    Returns:
+        A dense matrix with ones where ``a`` is zero and zeros elsewhere.
+    """
+    if sparse.issparse(a):
+        a = a.toarray()
+    return (a == 0).astype(np.float64)
+
+
+# endregion
+
+
+# region First-Order Optimization
+def _initial_flows(
+        a: np.ndarray, pi: np.ndarray) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Computes the metropolis-hastings edge flows of a topology.
+
+    The flow of an edge ``(i, j)`` is ``pi[i] * P[i, j]``, which is
+    symmetric for reversible markov matrices. Metropolis-hastings flows
+    ``min(pi[i] / deg(i), pi[j] / deg(j))`` are always feasible.
+
+    Args:
+        a:
+            A symmetric adjency matrix.
+        pi:
+            A stochastic steady state distribution vector.
+
+    Returns:
+        The incidence matrix of the undirected edges of ``a``, excluding
+        self-loops, and their flows.
+    """
+    n: int = a.shape[0]
+    rows, cols = _topology_edges(a)
+    degrees = np.bincount(rows, minlength=n)
+    upper = rows < cols
+    rows, cols = rows[upper], cols[upper]
+    e: int = rows.shape[0]
+    incidence = sparse.csr_matrix((
+        np.concatenate([np.ones(e), -np.ones(e)]),
+        (np.concatenate([rows, cols]), np.tile(np.arange(e), 2))
+    ), shape=(n, e))
+    w = np.minimum(pi[rows] / degrees[rows], pi[cols] / degrees[cols])
+    return incidence, w
+
+
+def _flows_subgradient(
+        incidence: sparse.csr_matrix,
+        w: np.ndarray,
+        pi: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Evaluates the mixing rate of the reversible chain given by edge flows
+    and one of its subgradients.
+
+    The chain is similar to the symmetric matrix
+    ``S = I - D^(-1/2) B diag(w) B^T D^(-1/2)``, where ``D = diag(pi)`` and
+    ``B`` is the ``incidence`` matrix, whose largest eigenvalue is one with
+    eigenvector ``sqrt(pi)``. The mixing rate is the largest absolute value
+    of the remaining eigenvalues.
+
+    Args:
+        incidence:
+            The incidence matrix of the edges.
+        w:
+            The flows of the edges.
+        pi:
+            The steady state distribution vector.
+
+    Returns:
+        The mixing rate and a subgradient with respect to ``w``.
+    """
+    n: int = incidence.shape[0]
+    q = np.sqrt(pi)
+
+    if n <= DENSE_EIGEN_MAX_SIZE:
+        s = -(incidence @ sparse.diags(w) @ incidence.T).toarray()
+        s = s / q[:, None] / q[None, :]
+        s[np.diag_indices(n)] += 1
+        s -= np.outer(q, q)
+        eigenvalues, eigenvectors = np.linalg.eigh(s)
+        lambda_min, u_min = eigenvalues[0], eigenvectors[:, 0]
+        lambda_max, u_max = eigenvalues[-1], eigenvectors[:, -1]
+    else:
+        def matvec(x: np.ndarray) -> np.ndarray:
+            x = np.ravel(x)
+            y = incidence @ (w * (incidence.T @ (x / q)))
+            return x - y / q - q * (q @ x)
+
+        s = LinearOperator((n, n), matvec=matvec, dtype=np.float64)
+        eigenvalues, eigenvectors = eigsh(s, k=1, which='LA')
+        lambda_max, u_max = eigenvalues[0], eigenvectors[:, 0]
+        eigenvalues, eigenvectors = eigsh(s, k=1, which='SA')
+        lambda_min, u_min = eigenvalues[0], eigenvectors[:, 0]
+
+    if lambda_max >= -lambda_min:
+        return lambda_max, -np.square(incidence.T @ (u_max / q))
+    return -lambda_min, np.square(incidence.T @ (u_min / q))
+
+
+def _project_flows(
+        incidence: sparse.csr_matrix,
+        w: np.ndarray,
+        pi: np.ndarray) -> np.ndarray:
+    """Makes edge flows feasible.
+
+    Flows must be non-negative and the flows leaving a node can not exceed
+    its steady state probability, otherwise the diagonal of the markov
+    matrix would be negative. Edges of overloaded nodes are scaled down.
+
+    Args:
+        incidence:
+            The incidence matrix of the edges.
+        w:
+            The flows of the edges.
+        pi:
+            The steady state distribution vector.
+
+    Returns:
+        The feasible flows.
+    """
+    w = np.maximum(w, 0.0)
+    outflows = abs(incidence) @ w
+    with np.errstate(divide='ignore'):
+        ratios = np.minimum(1.0, pi / outflows)
+    scales = abs(incidence).T.multiply(ratios).tocsr()
+    scales.data[scales.data == 0] = np.inf
+    edge_scales = np.asarray(
+        scales.min(axis=1, explicit=True).todense()).ravel()
+    return w * np.minimum(edge_scales, 1.0)
+
+
+def _flows_to_transition_matrix(
+        incidence: sparse.csr_matrix,
+        w: np.ndarray,
+        pi: np.ndarray) -> np.ndarray:
+    """Builds the row major transition matrix given by edge flows.
+
+    Args:
+        incidence:
+            The incidence matrix of the edges.
+        w:
+            The flows of the edges.
+        pi:
+            The steady state distribution vector.
+
+    Returns:
+        The transition matrix ``P`` where ``P[i, j] = w(i, j) / pi[i]``.
+    """
+    flows = -(incidence @ sparse.diags(w) @ incidence.T).toarray()
+    np.fill_diagonal(flows, 0.0)
+    t = flows / pi[:, None]
+    t[np.diag_indices_from(t)] = 1.0 - np.sum(t, axis=1)
+    return t
+# endregion
+
+
+# region Global Optimization
+def _mgo_local_search(n: int,
+                      rows: np.ndarray,
+                      cols: np.ndarray,
+                      v_: np.ndarray,
+                      x_mh: np.ndarray,
+                      seed: np.random.SeedSequence,
+                      max_iters: int = 200) -> Tuple[float, Optional[np.ndarray]]:
+    """Runs one local search of :py:func:`new_mgo_transition_matrix`.
+
+    Minimizes the largest singular value of ``P - ones((n, n)) / n`` with
+    `SLSQP <https://docs.scipy.org/doc/scipy/reference/optimize.minimize-slsqp.html>`_,
+    where the row major transition matrix ``P`` is non-negative, row
+    stochastic, has ``v_`` as steady state and is zero outside the edges of
+    the topology. The search starts from the metropolis-hastings matrix
+    moved towards a random row stochastic matrix, the first start of each
+    call of :py:func:`new_mgo_transition_matrix` is not moved.
+
+    Args:
+        n:
+            The number of rows and columns of the matrix.
+        rows:
+            The row indices of the edges of the topology.
+        cols:
+            The column indices of the edges of the topology.
+        `v_`:
+            A stochastic steady state distribution vector.
+        x_mh:
+            The entries of the row major metropolis-hastings matrix on the
+            edges of the topology.
+        seed:
+            The seed of the random starting point, whose ``spawn_key`` ends
+            with zero for the first start.
+        max_iters:
+            The maximum number of SLSQP iterations.
+
+    Returns:
+        The spectral distance of the best matrix found to the uniform matrix
+        and its entries on the edges of the topology, or
+        ``float('inf'), None`` if the search did not find a feasible matrix.
+    """
+    e: int = rows.shape[0]
+    a_eq = np.zeros((2 * n - 1, e))
+    a_eq[rows, np.arange(e)] = 1.0
+    # The last stationarity constraint is implied by the others.
+    stationary = cols < n - 1
+    a_eq[n + cols[stationary], np.arange(e)[stationary]] = v_[rows[stationary]]
+    b_eq = np.concatenate([np.ones(n), v_[:-1]])
+
+    x0 = x_mh
+    if seed.spawn_key[-1] != 0:
+        generator = np.random.default_rng(seed)
+        x_random = generator.random(e)
+        x_random /= np.bincount(rows, weights=x_random, minlength=n)[rows]
+        x0 = x0 + generator.random() * (x_random - x0)
+
+    def spectral_distance(x: np.ndarray) -> Tuple[float, np.ndarray]:
+        m = np.full((n, n), -1.0 / n)
+        m[rows, cols] += x
+        u, sigma, vt = np.linalg.svd(m)
+        return sigma[0], u[rows, 0] * vt[0, cols]
+
+    result = optimize.minimize(
+        spectral_distance, x0, jac=True, method='SLSQP',
+        bounds=[(0.0, 1.0)] * e,
+        constraints={'type': 'eq', 'fun': lambda x: a_eq @ x - b_eq,
+                     'jac': lambda x: a_eq},
+        options={'maxiter': max_iters})
+
+    x = np.clip(result.x, 0.0, 1.0)
+    if np.max(np.abs(a_eq @ x - b_eq)) > 1e-6:
+        return float('inf'), None
+    return spectral_distance(x)[0], x
+# endregion
+
+
+# region Incremental Markov Matrix Repair
+def remove_reversible_states(
+        t: _Matrix, states: np.ndarray) -> sparse.csc_matrix:
+    """Removes states from a reversible markov matrix.
+
+    The probability of moving from a remaining state to a removed state is
+    added to the probability of staying in that state, as if those moves
+    were always rejected. Detailed balance is preserved on the remaining
+    states, hence, when ``t`` is reversible, the steady state of the
+    resulting matrix is the renormalized steady state of ``t`` restricted
+    to the remaining states.
+
+    Note:
+        Only the former neighbours of the removed ``states`` are modified
+        and the matrix is never densified, i.e., the work done is
+        proportional to the number of non-zero entries of ``t``. Matrices
+        that are not reversible, e.g., those created by
+        :py:func:`new_go_transition_matrix`, keep being stochastic, but
+        their steady state is only approximately preserved.
+
+    Args:
+        t:
+            A column major markov matrix, dense or ``scipy.sparse``.
+        states:
+            The indices of the states to be removed.
+
+    Returns:
+        The column major markov matrix over the remaining states.
+    """
+    t = sparse.csc_matrix(t)
+    n: int = t.shape[0]
+    keep = np.ones(n, dtype=bool)
+    keep[states] = False
+
+    # Entry (i, j) of a column major matrix is the move from j to i.
+    sources = np.repeat(np.arange(n), np.diff(t.indptr))
+    removed = ~keep[t.indices]
+    rejected = np.bincount(
+        sources[removed], weights=t.data[removed], minlength=n)[keep]
+
+    t = t[keep][:, keep]
+    return sparse.csc_matrix(t + sparse.diags(rejected))
+
+
+def add_reversible_states(t: _Matrix,
+                          pi: np.ndarray,
+                          pi_new: np.ndarray,
+                          neighbours: List[np.ndarray]) -> sparse.csc_matrix:
+    """Adds states to a reversible markov matrix, each connected to the given
+    neighbours.
+
+    Each new edge receives the metropolis-hastings flow of the extended
+    topology, which is taken from the diagonal of the neighbour. Only the
+    new states and the diagonals of their ``neighbours`` are modified, thus,
+    apart from one reassembly of ``t`` for all new states, the work done is
+    proportional to the degrees of the new states. When ``t`` is reversible
+    with steady state ``pi``, the resulting matrix is reversible with steady
+    state ``pi`` extended with ``pi_new``, after renormalization.
+
+    Note:
+        Neighbours whose probability of staying in their state, i.e., whose
+        diagonal entry, is zero can not send flow to a new state, so they
+        are not connected to it. New states always keep some probability of
+        staying, hence they can be neighbours of the states added after
+        them.
+
+    Args:
+        t:
+            A column major markov matrix, dense or ``scipy.sparse``.
+        pi:
+            The, possibly unnormalized, steady state of ``t``.
+        pi_new:
+            The, equally scaled, steady state probabilities of the new
+            states.
+        neighbours:
+            The indices of the states each new state connects to. The
+            ``i``-th new state may connect to the states of ``t`` and to the
+            ``i`` new states added before it.
+
+    Returns:
+        The column major markov matrix with the new states as its last rows
+        and columns.
+
+    Raises:
+        MatrixError:
+            If none of the neighbours of a new state can send it any flow,
+            i.e., the new state would be isolated.
+    """
+    t = sparse.csc_matrix(t)
+    n: int = t.shape[0]
+    size: int = n + len(pi_new)
+    pi = np.concatenate([pi, pi_new])
+    original = np.zeros(size)
+    original[:n] = t.diagonal()
+    diagonal = original.copy()
+    degrees = np.zeros(size)
+    degrees[:n] = np.diff(t.indptr)
+
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    for x in range(n, size):
+        states = np.asarray(neighbours[x - n], dtype=int)
+        states = states[(diagonal[states] > 0) & (pi[states] > 0)]
+        if states.size == 0:
+            raise MatrixError(
+                f"State {x} has no neighbour with probability of staying.")
+
+        flows = np.minimum(pi[x] / (states.size + 1),
+                           pi[states] / (degrees[states] + 1))
+        flows = np.minimum(flows, pi[states] * diagonal[states])
+        moves = flows / pi[states]
+        # Flows capped by the diagonal may leave it slightly negative due to
+        # rounding errors.
+        diagonal[states] = np.maximum(diagonal[states] - moves, 0.0)
+        diagonal[x] = 1.0 - np.sum(flows) / pi[x]
+        degrees[states] += 1
+        degrees[x] = states.size + 1
+
+        rows.extend((np.full(states.size, x), states))
+        cols.extend((states, np.full(states.size, x)))
+        values.extend((moves, flows / pi[x]))
+
+    changed = np.flatnonzero(diagonal != original)
+    rows.append(changed)
+    cols.append(changed)
+    values.append(diagonal[changed] - original[changed])
+    extended = sparse.csc_matrix(
+        (t.data, t.indices, np.append(t.indptr, np.full(size - n, t.nnz))),
+        shape=(size, size))
+    extended = extended + sparse.csc_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(size, size))
+    extended.eliminate_zeros()
+    return extended
 # endregion
 
 
 # region Metropolis Hastings
-def _metropolis_hastings(a: np.ndarray,
+def _metropolis_hastings(a: _Matrix,
                          v_: np.ndarray,
                          column_major_out: bool = True,
-                         version: int = 2) -> np.ndarray:
+                         version: int = 2) -> _Matrix:
     """ Constructs a transition matrix using metropolis-hastings algorithm.
 
+    Only the edges of ``a`` are visited, thus the work done is proportional
+    to the number of edges of the topology.
+
     Note:
         The input Matrix hould have no transient states/absorbent nodes,
         but this is not enforced or verified.
 
     Args:
         a:
-            A symmetric adjency matrix.
+            A symmetric adjency matrix, dense or ``scipy.sparse``.
         `v_`:
             A stochastic vector that is the steady state of the resulting
             transition matrix.
@@ -265,7 +1210,8 @@ def _metropolis_hastings(a: np.ndarray,
             (default is version 2).
 
     Returns:
-        An unlabeled transition matrix with steady state ``v_``.
+        An unlabeled transition matrix with steady state ``v_``. The matrix
+        is sparse if ``a`` is sparse.
 
     Raises:
         DistributionShapeError:
@@ -283,24 +1229,29 @@ def _metropolis_hastings(a: np.ndarray,
             "rows: {}, columns: {}, expected square matrix".format(
                 a.shape[0], a.shape[1]))
 
-    shape: Tuple[int, int] = a.shape
     size: int = a.shape[0]
 
-    rw: np.ndarray = _construct_random_walk_matrix(a)
+    rw = _construct_random_walk_matrix(a)
     if version == 1:
         rw = rw.transpose()
 
-    r: np.ndarray = _construct_rejection_matrix(rw, v_)
+    # Only edges of the topology can have non-zero transition probabilities.
+    rows, cols = _topology_edges(a)
+    off_diagonal = rows != cols
+    rows, cols = rows[off_diagonal], cols[off_diagonal]
 
-    m: np.ndarray = np.zeros(shape=shape)
-    for i in range(size):
-        for j in range(size):
-            if i != j:
-                m[i, j] = rw[i, j] * min(1, r[i, j])
-        if version == 1:
-            m[i, i] = _get_diagonal_entry_probability_v1(rw, r, i)
-        elif version == 2:
-            m[i, i] = _get_diagonal_entry_probability_v2(m, i)
+    p: np.ndarray = _get_entries(rw, rows, cols)
+    r: np.ndarray = _construct_rejection_ratios(rw, v_, rows, cols)
+    # Undefined ratios, e.g., between states with zero probability, are
+    # always accepted, as fmin ignores nan.
+    values: np.ndarray = p * np.fmin(1, r)
+
+    if version == 1:
+        diagonal = _get_diagonal_entries_v1(rw, p, r, rows)
+    else:
+        diagonal = _get_diagonal_entries_v2(values, rows, size)
+
+    m = _new_matrix_like(a, rows, cols, values, diagonal)
 
     if column_major_out:
         return m.transpose()
@@ -308,15 +1259,16 @@ def _metropolis_hastings(a: np.ndarray,
     return m
 
 
-def _construct_random_walk_matrix(a: np.ndarray) -> np.ndarray:
+def _construct_random_walk_matrix(a: _Matrix) -> _Matrix:
     """Builds a random walk matrix over the given adjacency matrix
 
     Args:
         a:
-            Any adjacency matrix.
+            Any adjacency matrix, dense or ``scipy.sparse``.
 
     Returns:
-        A matrix representing the performed random walk.
+        A matrix representing the performed random walk, with the same
+        storage as ``a``.
     """
     # Version 1.
     # shape = a.shape
@@ -330,36 +1282,45 @@ def _construct_random_walk_matrix(a: np.ndarray) -> np.ndarray:
     # return rw
     # Version 2 - Returns Column Major Random Walk, similar to MatLab.
     #   To return a equivalent of version 1 output, transpose the result.
+    if sparse.issparse(a):
+        degrees = np.asarray(a.sum(axis=1)).ravel()
+        return sparse.csr_matrix(a.multiply(1 / degrees[None, :]))
     return a / np.sum(a, axis=1)
 
 
-def _construct_rejection_matrix(rw: np.ndarray, v_: np.ndarray) -> np.ndarray:
-    """Builds a matrix of rejection probabilities for a given random walk.
+def _construct_rejection_ratios(rw: _Matrix,
+                                v_: np.ndarray,
+                                rows: np.ndarray,
+                                cols: np.ndarray) -> np.ndarray:
+    """Computes the rejection ratios of the given edges of a random walk.
 
     Args:
         rw:
             a random_walk over an adjacency matrix
         `v_`:
             a stochastic desired distribution vector
+        rows:
+            The row indices of the edges.
+        cols:
+            The column indices of the edges.
 
     Returns:
-        A matrix whose entries are acceptance probabilities for ``rw``.
+        The ratios ``(v_[j] * rw[j, i]) / (v_[i] * rw[i, j])`` of each edge
+        ``(i, j)``, whose minimum with one is the acceptance probability of
+        the edge.
     """
-    shape = rw.shape
-    size = shape[0]
-    r = np.zeros(shape=shape)
     with np.errstate(divide='ignore', invalid='ignore'):
-        for i in range(size):
-            for j in range(size):
-                r[i, j] = (v_[j] * rw[j, i]) / (v_[i] * rw[i, j])
-    return r
+        return ((v_[cols] * _get_entries(rw, cols, rows))
+                / (v_[rows] * _get_entries(rw, rows, cols)))
 
 
-def _get_diagonal_entry_probability_v1(
-        rw: np.ndarray, r: np.ndarray, i: int) -> np.float64:
+def _get_diagonal_entries_v1(rw: _Matrix,
+                             p: np.ndarray,
+                             r: np.ndarray,
+                             rows: np.ndarray) -> np.ndarray:
     """Helper function used during the metropolis-hastings algorithm.
 
-    Calculates the value that should be assigned to the entry ``(i, i)`` of the
+    Calculates the values that should be assigned to the diagonal of the
     transition matrix being calculated by the metropolis hastings algorithm
     by considering the rejection probability over the random walk that was
     performed on an adjacency matrix.
@@ -368,69 +1329,129 @@ def _get_diagonal_entry_probability_v1(
         This method does considers element-wise rejection probabilities
         for random walk matrices. If you wish to implement a modification of
         the metropolis-hastings algorithm and you do not utilize rejection
-        matrices use :py:func:`_get_diagonal_entry_probability_v2` instead.
+        ratios use :py:func:`_get_diagonal_entries_v2` instead.
 
     Args:
         rw:
             A random walk over an adjacency matrix.
+        p:
+            The random walk probabilities of the off-diagonal edges.
         r:
-            A matrix whose entries contain acceptance probabilities for ``rw``.
-        i:
-            The diagonal-index of ``rw`` where summation needs to
-            be performed on. E.g.: ``rw[i, i]``.
+            The rejection ratios of the off-diagonal edges.
+        rows:
+            The row indices of the off-diagonal edges.
 
     Returns:
-        A probability to be inserted at entry ``(i, i)`` of the transition
+        The probabilities to be inserted at the diagonal of the transition
         matrix outputed by the :py:func:`_metropolis_hastings`.
     """
     size: int = rw.shape[0]
-    pii: np.float64 = rw[i, i]
-    for k in range(size):
-        pii += rw[i, k] * (1 - min(1, r[i, k]))
-    return pii
+    diagonal = _get_entries(rw, np.arange(size), np.arange(size))
+    rejected = p * (1 - np.fmin(1, r))
+    return diagonal + np.bincount(rows, weights=rejected, minlength=size)
 
 
-def _get_diagonal_entry_probability_v2(m: np.ndarray, i: int) -> np.float64:
+def _get_diagonal_entries_v2(
+        values: np.ndarray, rows: np.ndarray, size: int) -> np.ndarray:
     """Helper function used during the metropolis-hastings algorithm.
 
-    Calculates the value that should be assigned to the entry ``(i, i)`` of the
-    transition matrix being calculated by the metropolis hastings algorithm
-    by considering the rejection probability over the random walk that was
-    performed on an adjacency matrix.
+    Calculates the values that should be assigned to the diagonal of the
+    transition matrix being calculated by the metropolis hastings algorithm,
+    so that each of its rows sums to one.
 
     Note:
         This method does not consider element-wise rejection probabilities
         for random walk matrices. If you wish to implement a modification of
-        the metropolis-hastings algorithm and you utilize rejection matrices
-        use :py:func:`_get_diagonal_entry_probability_v1` instead.
+        the metropolis-hastings algorithm and you utilize rejection ratios
+        use :py:func:`_get_diagonal_entries_v1` instead.
+
+    Args:
+        values:
+            The transition probabilities of the off-diagonal edges.
+        rows:
+            The row indices of the off-diagonal edges.
+        size:
+            The length of the square matrix.
+
+    Returns:
+        The probabilities to be inserted at the diagonal of the transition
+        matrix outputed by the :py:func:`_metropolis_hastings`.
+    """
+    return 1 - np.bincount(rows, weights=values, minlength=size)
+
+
+def _get_entries(
+        m: _Matrix, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Gathers entries of a dense or ``scipy.sparse`` matrix.
 
     Args:
         m:
-            The matrix to receive the diagonal entry value.
-        i:
-            The diagonal entry index. E.g.: ``m[i, i]``.
+            Any matrix.
+        rows:
+            The row indices of the entries.
+        cols:
+            The column indices of the entries.
+
+    Returns:
+        A flat array with the entries ``m[rows[k], cols[k]]``.
+    """
+    return np.asarray(m[rows, cols]).ravel()
+
+
+def _new_matrix_like(a: _Matrix,
+                     rows: np.ndarray,
+                     cols: np.ndarray,
+                     values: np.ndarray,
+                     diagonal: np.ndarray) -> _Matrix:
+    """Assembles a matrix with the same storage and shape as ``a``.
+
+    Args:
+        a:
+            Any square matrix, dense or ``scipy.sparse``.
+        rows:
+            The row indices of the off-diagonal entries.
+        cols:
+            The column indices of the off-diagonal entries.
+        values:
+            The off-diagonal entries.
+        diagonal:
+            The diagonal entries.
 
     Returns:
-        A probability to be inserted at entry ``(i, i)`` of the transition matrix
-        outputed by the :py:func:`_metropolis_hastings`.
+        A dense matrix if ``a`` is dense, otherwise a CSR matrix.
     """
-    return 1 - np.sum(m[i, :])
+    size: int = a.shape[0]
+    if sparse.issparse(a):
+        indices = np.arange(size)
+        return sparse.csr_matrix((
+            np.concatenate([values, diagonal]),
+            (np.concatenate([rows, indices]), np.concatenate([cols, indices]))
+        ), shape=a.shape)
+    m = np.zeros(shape=a.shape)
+    m[rows, cols] = values
+    m[np.diag_indices(size)] = diagonal
+    return m
 
 
 # endregion
 
 
 # region Helpers
-def get_mixing_rate(m: np.ndarray) -> float:
+def get_mixing_rate(m: _Matrix) -> float:
     """Calculats the fast mixing rate the input matrix.
 
     The fast mixing rate of matrix ``m`` is the highest eigenvalue that is
     smaller than one. If returned value is ``1.0`` than the matrix has transient
     states or absorbent nodes and as a result is not a markov matrix.
 
+    Note:
+        Sparse matrices bigger than :py:const:`DENSE_EIGEN_MAX_SIZE` have
+        their highest eigenvalue computed with Arnoldi iterations, without
+        ever being densified.
+
     Args:
         m:
-            A matrix.
+            A matrix, dense or ``scipy.sparse``.
 
     Returns:
         The highest eigenvalue of ``m`` that is smaller than one or one.
@@ -440,12 +1461,93 @@ def get_mixing_rate(m: np.ndarray) -> float:
     if size != m.shape[1]:
         raise MatrixNotSquareError(
             "Can not compute eigenvalues/vectors with non-square matrix")
+    if sparse.issparse(m):
+        if size > DENSE_EIGEN_MAX_SIZE:
+            return _sparse_mixing_rate(m)
+        m = m.toarray()
     m = m - (np.ones((size, size)) / size)
     eigenvalues, eigenvectors = np.linalg.eig(m)
     mixing_rate = np.max(np.abs(eigenvalues))
     return mixing_rate.item()
 
 
+def _sparse_mixing_rate(m: sparse.spmatrix) -> float:
+    """Calculates the fast mixing rate of a large sparse matrix.
+
+    The rank one matrix ``ones((size, size)) / size`` is applied implicitly,
+    thus ``m`` is never densified.
+
+    Args:
+        m:
+            A sparse square matrix.
+
+    Returns:
+        The highest absolute eigenvalue of ``m - ones((size, size)) / size``.
+    """
+    size: int = m.shape[0]
+    m = sparse.csr_matrix(m)
+
+    def matvec(x: np.ndarray) -> np.ndarray:
+        x = np.ravel(x)
+        return m @ x - np.sum(x) / size
+
+    operator = LinearOperator((size, size), matvec=matvec, dtype=np.float64)
+    try:
+        eigenvalues = eigs(
+            operator, k=1, which='LM', return_eigenvectors=False)
+    except ArpackNoConvergence as e:
+        eigenvalues = e.eigenvalues
+        if eigenvalues.size == 0:
+            return get_mixing_rate(m.toarray())
+    return np.max(np.abs(eigenvalues)).item()
+
+
+def get_mixing_rates(m: np.ndarray) -> np.ndarray:
+    """Calculates the fast mixing rates of a stack of matrices.
+
+    See :py:func:`get_mixing_rate`.
+
+    Args:
+        m:
+            A stack of square matrices with shape ``(k, n, n)``.
+
+    Returns:
+        An array with the mixing rate of each matrix in the stack.
+    """
+    size: int = m.shape[-1]
+    if size != m.shape[-2]:
+        raise MatrixNotSquareError(
+            "Can not compute eigenvalues/vectors with non-square matrices")
+    eigenvalues = np.linalg.eigvals(m - 1 / size)
+    return np.max(np.abs(eigenvalues), axis=-1)
+
+
+def validate_transition_matrices(
+        t: np.ndarray, v_: np.ndarray, atol: float = 1e-02) -> np.ndarray:
+    """Asserts which matrices of a stack are Markov Matrices with steady
+    state ``v_``.
+
+    Verification is done by raising all matrices to the power of ``4096``
+    (just a large number) and checking if all columns of each powered
+    matrix are element-wise equal to the entries of ``v_``.
+
+    Args:
+        t:
+            A stack of column major matrices with shape ``(k, n, n)``.
+        `v_`:
+            The steady state the matrices are expected to have.
+        atol:
+            The absolute tolerance of the comparison (default is 1e-2).
+
+    Returns:
+        A boolean array whose entries are ``True`` if the respective matrix
+        converges to ``v_``.
+    """
+    t_pow = np.linalg.matrix_power(t, 4096)
+    return np.all(
+        np.isclose(t_pow, v_[None, :, None], atol=atol), axis=(1, 2))
+
+
 def new_vector(size: int) -> np.ndarray:
     u_ = np.random.random_sample(size)
     u_ /= np.sum(u_)
@@ -531,6 +1633,33 @@ def new_symmetric_connected_matrix(
     return m
 
 
+def new_symmetric_connected_matrices(count: int, size: int) -> np.ndarray:
+    """Generates a stack of random symmetric and connected matrices.
+
+    Equivalent to calling :py:func:`new_symmetric_connected_matrix`
+    ``count`` times, but the random entries of all matrices are drawn at
+    once.
+
+    Args:
+        count:
+            The number of matrices.
+        size:
+            The length of each square matrix.
+
+    Returns:
+        A stack of adjacency matrices with shape ``(count, size, size)``
+        and self-loops.
+    """
+    upper = np.triu(
+        np.random.random_sample((count, size, size)) >= 0.5, k=1)
+    m = (upper | np.swapaxes(upper, 1, 2)).astype(np.float64)
+    m[:, np.arange(size), np.arange(size)] = 1.0
+    for k in range(count):
+        if not is_connected(m[k]):
+            m[k] = make_connected(m[k])
+    return m
+
+
 def make_connected(m: np.ndarray) -> np.ndarray:
     """Turns a matrix into a connected matrix that could represent a
     connected graph.
@@ -557,13 +1686,13 @@ def make_connected(m: np.ndarray) -> np.ndarray:
     return m
 
 
-def is_symmetric(m: np.ndarray, tol: float = 1e-8) -> bool:
+def is_symmetric(m: _Matrix, tol: float = 1e-8) -> bool:
     """Checks if a matrix is symmetric by performing element-wise equality
     comparison on entries of ``m`` and  ``m.T``.
 
     Args:
         m:
-            The matrix to be verified.
+            The matrix to be verified, dense or ``scipy.sparse``.
         tol:
             The tolerance used to verify the entries of the ``m`` (default
             is 1e-8).
@@ -571,16 +1700,18 @@ def is_symmetric(m: np.ndarray, tol: float = 1e-8) -> bool:
     Returns:
         ``True`` if the ``m`` is symmetric, else ``False``.
     """
+    if sparse.issparse(m):
+        return abs(m - m.transpose()).max() < tol
     return np.all(np.abs(m - m.transpose()) < tol)
 
 
-def is_connected(m: np.ndarray, directed: bool = False) -> bool:
+def is_connected(m: _Matrix, directed: bool = False) -> bool:
     """Checks if a matrix is connected by counting the number of connected
     components.
 
     Args:
         m:
-            The matrix to be verified.
+            The matrix to be verified, dense or ``scipy.sparse``.
         directed:
             If ``m`` edges are directed, i.e., if ``m`` is an adjency
             matrix in which the edges bidirectional. ``False`` means they
@@ -597,3 +1728,282 @@ def __new_edge_val__(random_generator: random.SystemRandom) -> np.float64:
     p = random_generator.uniform(0.0, 1.0)
     return np.ceil(p) if p >= 0.5 else np.floor(p)
 # endregion
+
+
+# region Sparse Topology Generators
+def new_k_regular_matrix(
+        size: int, k: int, max_tries: int = 100) -> sparse.csr_matrix:
+    """Generates a random k-regular topology.
+
+    Every state has exactly ``k`` neighbours, besides itself. Edges are
+    paired with the algorithm of Steger and Wormald, which restarts
+    whenever the remaining stubs can not be paired without creating
+    repeated edges. Disconnected components are then joined by swapping
+    the ends of two edges, which preserves every degree. See
+    :py:func:`_connect_by_edge_swaps`.
+
+    Args:
+        size:
+            The length of the square matrix.
+        k:
+            The degree of each state, excluding its self-loop.
+        max_tries:
+            How many times the pairing is restarted before giving up.
+
+    Returns:
+        A symmetric and connected sparse adjacency matrix with self-loops.
+
+    Raises:
+        IllegalArgumentError:
+            When ``k`` is not smaller than ``size``, when ``size * k`` is
+            odd, when ``k`` is one and there are more than two states, i.e.,
+            no connected k-regular topology exists, or when no k-regular
+            topology was found after ``max_tries`` attempts.
+    """
+    if k < 1 or k >= size or (size * k) % 2 != 0 or (k == 1 and size > 2):
+        raise IllegalArgumentError(
+            f"Can not create a connected {k}-regular topology with {size} "
+            f"states")
+
+    for _ in range(max_tries):
+        edges = _pair_regular_stubs(size, k)
+        if edges is not None:
+            rows, cols = np.array(list(edges), dtype=np.int64).T
+            _connect_by_edge_swaps(size, rows, cols)
+            return _new_sparse_topology(size, rows, cols)
+
+    raise IllegalArgumentError(
+        f"Could not create a {k}-regular topology with {size} states after "
+        f"{max_tries} tries")
+
+
+def new_erdos_renyi_matrix(size: int, mean_degree: float) -> sparse.csr_matrix:
+    """Generates a random Erdős–Rényi topology with the given mean degree.
+
+    Each of the ``size * (size - 1) / 2`` possible edges exists with
+    probability ``mean_degree / (size - 1)``. Only the chosen edges are
+    sampled, thus the work done is proportional to the number of edges.
+
+    Args:
+        size:
+            The length of the square matrix.
+        mean_degree:
+            The expected degree of each state, excluding its self-loop.
+
+    Returns:
+        A symmetric and connected sparse adjacency matrix with self-loops.
+        States left isolated are linked to other components, which slightly
+        increases the mean degree of very sparse topologies.
+    """
+    pairs: int = size * (size - 1) // 2
+    p: float = float(np.clip(mean_degree / max(size - 1, 1), 0.0, 1.0))
+    count: int = np.random.binomial(pairs, p)
+
+    chosen = np.empty(0, dtype=np.int64)
+    while chosen.size < count:
+        drawn = np.random.randint(0, pairs, size=count - chosen.size,
+                                  dtype=np.int64)
+        chosen = np.unique(np.concatenate([chosen, drawn]))
+
+    # Map the linear index of the strictly upper triangle to (row, column).
+    rows = size - 2 - np.floor(
+        np.sqrt(4 * size * (size - 1) - 8 * chosen - 7) / 2 - 0.5
+    ).astype(np.int64)
+    cols = (chosen + rows + 1 - pairs
+            + (size - rows) * (size - rows - 1) // 2)
+    return _new_sparse_topology(size, rows, cols)
+
+
+def new_watts_strogatz_matrix(
+        size: int, k: int, beta: float) -> sparse.csr_matrix:
+    """Generates a random Watts–Strogatz small-world topology.
+
+    States are placed in a ring and connected to their ``k / 2`` nearest
+    neighbours on each side. Each edge is then rewired to a uniformly
+    chosen state with probability ``beta``.
+
+    Args:
+        size:
+            The length of the square matrix.
+        k:
+            The even number of ring neighbours of each state.
+        beta:
+            The probability of rewiring each edge.
+
+    Returns:
+        A symmetric and connected sparse adjacency matrix with self-loops.
+        Rewired edges that coincide with existing edges are merged, thus
+        the mean degree can be slightly smaller than ``k``.
+
+    Raises:
+        IllegalArgumentError:
+            When ``k`` is odd or not smaller than ``size``.
+    """
+    if k < 2 or k >= size or k % 2 != 0:
+        raise IllegalArgumentError(
+            f"Can not create a ring with {k} neighbours per state and "
+            f"{size} states")
+
+    half: int = k // 2
+    rows = np.repeat(np.arange(size, dtype=np.int64), half)
+    cols = (rows + np.tile(np.arange(1, half + 1), size)) % size
+
+    rewire = np.flatnonzero(np.random.random_sample(rows.size) < beta)
+    while rewire.size > 0:
+        cols[rewire] = np.random.randint(0, size, size=rewire.size)
+        rewire = rewire[cols[rewire] == rows[rewire]]
+
+    return _new_sparse_topology(size, rows, cols)
+
+
+def new_barabasi_albert_matrix(size: int, m: int) -> sparse.csr_matrix:
+    """Generates a random Barabási–Albert scale-free topology.
+
+    States are added one at a time and each new state connects to ``m``
+    distinct existing states chosen with probability proportional to
+    their degree.
+
+    Args:
+        size:
+            The length of the square matrix.
+        m:
+            The number of edges each new state creates.
+
+    Returns:
+        A symmetric and connected sparse adjacency matrix with self-loops.
+
+    Raises:
+        IllegalArgumentError:
+            When ``m`` is not smaller than ``size``.
+    """
+    if m < 1 or m >= size:
+        raise IllegalArgumentError(
+            f"Can not attach {m} edges per state with {size} states")
+
+    rows = np.repeat(np.arange(m, size, dtype=np.int64), m)
+    cols = np.empty(rows.size, dtype=np.int64)
+    # Every state appears in ``endpoints`` once per edge it belongs to.
+    endpoints = np.empty(2 * rows.size, dtype=np.int64)
+    filled: int = 0
+    targets = np.arange(m)
+    for e, source in enumerate(range(m, size)):
+        cols[e * m:(e + 1) * m] = targets
+        endpoints[filled:filled + m] = targets
+        endpoints[filled + m:filled + 2 * m] = source
+        filled += 2 * m
+        chosen = set()
+        while len(chosen) < m:
+            chosen.update(endpoints[np.random.randint(
+                0, filled, size=m - len(chosen))].tolist())
+        targets = np.fromiter(chosen, dtype=np.int64, count=len(chosen))[:m]
+
+    return _new_sparse_topology(size, rows, cols)
+
+
+def _pair_regular_stubs(size: int, k: int) -> Optional[set]:
+    """Pairs ``k`` stubs of each state into the edges of a k-regular graph.
+
+    Args:
+        size:
+            The number of states.
+        k:
+            The degree of each state.
+
+    Returns:
+        A set with the ``(i, j)``, ``i < j``, edges or ``None`` if the
+        remaining stubs could not be paired.
+    """
+    edges = set()
+    stubs = np.repeat(np.arange(size), k)
+    while stubs.size > 0:
+        np.random.shuffle(stubs)
+        unpaired = []
+        for i, j in zip(stubs[0::2].tolist(), stubs[1::2].tolist()):
+            if i > j:
+                i, j = j, i
+            if i != j and (i, j) not in edges:
+                edges.add((i, j))
+            else:
+                unpaired.extend((i, j))
+        if len(unpaired) == stubs.size:
+            # No progress was made, give up if no valid pair remains.
+            states = set(unpaired)
+            if not any(i != j and (min(i, j), max(i, j)) not in edges
+                       for i in states for j in states):
+                return None
+        stubs = np.array(unpaired, dtype=np.int64)
+    return edges
+
+
+def _connect_by_edge_swaps(
+        size: int, rows: np.ndarray, cols: np.ndarray) -> None:
+    """Joins the components of a topology without changing any degree.
+
+    While the topology is disconnected, a random edge ``(u, v)`` and a
+    random edge ``(x, y)`` of another component are replaced by ``(u, x)``
+    and ``(v, y)``. The new edges link different components, thus they are
+    never repeated edges or self-loops, and the number of components never
+    grows, since each part of the split components is linked to the other
+    component.
+
+    Args:
+        size:
+            The number of states.
+        rows:
+            The row indices of the edges, which are swapped in place.
+        cols:
+            The column indices of the edges, which are swapped in place.
+    """
+    while True:
+        a = sparse.coo_matrix(
+            (np.ones(rows.size), (rows, cols)), shape=(size, size))
+        n, labels = connected_components(a, directed=False)
+        if n == 1:
+            return
+        components = labels[rows]
+        e = np.random.randint(rows.size)
+        others = np.flatnonzero(components != components[e])
+        f = others[np.random.randint(others.size)]
+        rows[f], cols[e] = cols[e], rows[f]
+
+
+def _new_sparse_topology(
+        size: int, rows: np.ndarray, cols: np.ndarray) -> sparse.csr_matrix:
+    """Builds a symmetric and connected adjacency matrix with self-loops.
+
+    Args:
+        size:
+            The length of the square matrix.
+        rows:
+            The row indices of the edges.
+        cols:
+            The column indices of the edges.
+
+    Returns:
+        The sparse adjacency matrix with ones at the given edges, at their
+        symmetric entries and at the diagonal. Disconnected components are
+        linked to each other by a random edge.
+    """
+    indices = np.arange(size)
+    a = sparse.coo_matrix((
+        np.ones(2 * rows.size + size),
+        (np.concatenate([rows, cols, indices]),
+         np.concatenate([cols, rows, indices]))
+    ), shape=(size, size)).tocsr()
+    # Repeated edges are summed by the conversion.
+    a.data[:] = 1.0
+
+    n, labels = connected_components(a, directed=False)
+    if n > 1:
+        # Chain the components through one random state of each.
+        order = np.random.permutation(size)
+        _, first = np.unique(labels[order], return_index=True)
+        representatives = order[first]
+        i, j = representatives[:-1], representatives[1:]
+        a = a + sparse.csr_matrix((
+            np.ones(2 * i.size),
+            (np.concatenate([i, j]), np.concatenate([j, i]))
+        ), shape=(size, size))
+        a.data[:] = 1.0
+    return a
+# endregion
@@ -0,0 +1,240 @@
+"""Module with a persistent, content-addressed, store of the transition
+matrices created by the strategies in :py:mod:`app.domain.helpers.matrices`.
+
+Matrices are addressed by the hash of the edges of the adjacency matrix they
+were created from, the quantized steady state vector, the name of the
+strategy and the :py:const:`SETTINGS` that change its results. The store is
+a SQLite database at :py:const:`~app.environment_settings.MATRIX_STORE_PATH`,
+thus it survives the simulation and is safely shared by concurrent threads
+and worker processes. It is disabled unless a path is set.
+Its size is bounded by
+:py:const:`~app.environment_settings.MATRIX_STORE_MAX_BYTES`, least recently
+used matrices are evicted first.
+
+Strategies opt into the store with the :py:func:`persistent` decorator.
+"""
+from __future__ import annotations
+
+import io
+import os
+import time
+import sqlite3
+import hashlib
+import functools
+import threading
+
+from typing import Tuple, Optional, Callable
+
+import numpy as np
+from scipy import sparse
+
+import environment_settings as es
+
+V_QUANTUM: float = 1e-12
+"""Steady state vectors whose entries differ by less than this value are
+considered equal when addressing matrices."""
+
+SETTINGS: Tuple[str, ...] = (
+    "MGO_ENGINE", "MGO_STARTS", "SOLVER_TOLERANCE", "SOLVER_MAX_ITERS",
+    "SPARSE_FORMULATION_DENSITY")
+"""Names of the :py:mod:`app.environment_settings` whose values change the
+matrices created by the strategies, thus they are part of their addresses."""
+
+_connections = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matrices (
+    key TEXT PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    matrix BLOB NOT NULL,
+    rate REAL NOT NULL,
+    solve_time REAL NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS matrices_last_used ON matrices (last_used);
+"""
+
+
+def persistent(strategy: Callable) -> Callable:
+    """Decorates a transition matrix strategy so that its results are read
+    from and written to the store.
+
+    Only calls with exactly an adjacency matrix and a steady state vector
+    are stored, other arguments change the result of the strategy. Failed
+    strategies, i.e., those that return ``None`` matrices, are not stored,
+    since they may succeed in other environments, e.g., once a solver
+    license becomes available.
+
+    Args:
+        strategy:
+            A function with the signature of
+            :py:func:`~app.domain.helpers.matrices.new_mh_transition_matrix`.
+
+    Returns:
+        The decorated strategy.
+    """
+    @functools.wraps(strategy)
+    def wrapper(a, v_, *args, **kwargs):
+        if args or kwargs or es.MATRIX_STORE_PATH is None:
+            return strategy(a, v_, *args, **kwargs)
+
+        key = content_key(a, v_, strategy.__name__)
+        stored = get(key)
+        if stored is not None:
+            return stored
+
+        start = time.perf_counter()
+        t, rate = strategy(a, v_)
+        if t is not None:
+            put(key, strategy.__name__, t, rate, time.perf_counter() - start)
+        return t, rate
+
+    return wrapper
+
+
+def content_key(a, v_: np.ndarray, strategy: str) -> str:
+    """Computes the address of a matrix in the store.
+
+    Only the positions of the non-zero entries of ``a`` are hashed, thus
+    dense and ``scipy.sparse`` matrices, of any format, with the same edges
+    have the same address.
+
+    Args:
+        a:
+            The adjacency matrix, dense or ``scipy.sparse``.
+        `v_`:
+            The steady state vector.
+        strategy:
+            The name of the strategy.
+
+    Returns:
+        A hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(strategy.encode())
+    settings = [getattr(es, name) for name in SETTINGS]
+    digest.update(repr(settings).encode())
+    digest.update(np.asarray(a.shape, dtype=np.int64).tobytes())
+    if sparse.issparse(a):
+        rows, cols = a.nonzero()
+        edges = np.lexsort((cols, rows))
+        rows, cols = rows[edges], cols[edges]
+    else:
+        rows, cols = np.nonzero(a)
+    digest.update(rows.astype(np.int64).tobytes())
+    digest.update(cols.astype(np.int64).tobytes())
+    quantized = np.rint(np.asarray(v_, dtype=np.float64) / V_QUANTUM)
+    digest.update(quantized.astype(np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def get(key: str) -> Optional[Tuple[np.ndarray, float]]:
+    """Reads a matrix from the store and marks it as recently used.
+
+    Args:
+        key:
+            The address of the matrix. See :py:func:`content_key`.
+
+    Returns:
+        The matrix and its mixing rate or ``None`` if the store does not
+        have them.
+    """
+    try:
+        connection = _get_connection()
+        row = connection.execute(
+            "SELECT matrix, rate FROM matrices WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute(
+                "UPDATE matrices SET last_used = ? WHERE key = ?",
+                (time.time(), key))
+    except sqlite3.Error as e:
+        print(f"Matrix store unavailable: {e}")
+        return None
+    return np.load(io.BytesIO(row[0])), row[1]
+
+
+def put(key: str,
+        strategy: str,
+        t: np.ndarray,
+        rate: float,
+        solve_time: float) -> None:
+    """Writes a matrix to the store, evicting the least recently used
+    matrices if the store grows beyond
+    :py:const:`~app.environment_settings.MATRIX_STORE_MAX_BYTES`.
+
+    Args:
+        key:
+            The address of the matrix. See :py:func:`content_key`.
+        strategy:
+            The name of the strategy that created the matrix.
+        t:
+            The matrix.
+        rate:
+            The mixing rate of the matrix.
+        solve_time:
+            How many seconds the strategy took to create the matrix.
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(t))
+    blob = buffer.getvalue()
+    try:
+        connection = _get_connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO matrices "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, strategy, t.shape[0], blob, float(rate), solve_time,
+                 len(blob), time.time()))
+            _evict(connection)
+    except sqlite3.Error as e:
+        print(f"Matrix store unavailable: {e}")
+
+
+def _evict(connection: sqlite3.Connection) -> None:
+    """Deletes the least recently used matrices until the store fits
+    :py:const:`~app.environment_settings.MATRIX_STORE_MAX_BYTES`.
+
+    Args:
+        connection:
+            A connection with an open transaction.
+    """
+    total = connection.execute(
+        "SELECT COALESCE(SUM(nbytes), 0) FROM matrices").fetchone()[0]
+    excess = total - es.MATRIX_STORE_MAX_BYTES
+    if excess <= 0:
+        return
+
+    evicted = []
+    for key, nbytes in connection.execute(
+            "SELECT key, nbytes FROM matrices ORDER BY last_used"):
+        if excess <= 0:
+            break
+        evicted.append((key,))
+        excess -= nbytes
+    connection.executemany("DELETE FROM matrices WHERE key = ?", evicted)
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Gets the calling thread's connection to the store, opening it on
+    first use or after the store path changes.
+
+    Returns:
+        A connection to the database at
+        :py:const:`~app.environment_settings.MATRIX_STORE_PATH`.
+    """
+    path = es.MATRIX_STORE_PATH
+    connection = getattr(_connections, "connection", None)
+    if connection is None or _connections.path != path or \
+            _connections.pid != os.getpid():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = sqlite3.connect(path, timeout=60.0)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        _connections.connection = connection
+        _connections.path = path
+        _connections.pid = os.getpid()
+    return connection
@@ -0,0 +1,243 @@
+"""Module with the writers of the columnar simulation output files and a
+reader of every output file format.
+
+Besides the ``"json"`` and ``"ndjson"`` text formats, see
+:py:const:`~app.environment_settings.OUTFILE_FORMAT`, the logs of each file
+can be written as typed columns, one per :py:const:`SERIES`, and a
+metadata table, with the run metadata and the remaining logger attributes.
+The ``"npz"`` format only requires numpy, the ``"arrow"`` (Arrow IPC) and
+``"parquet"`` formats require the optional
+`pyarrow <https://arrow.apache.org/docs/python/>`_ package.
+
+Text output files are written through a pool of at most
+:py:const:`~app.environment_settings.OUTFILE_MAX_OPEN` file handles, see
+:py:func:`append_text`. Handles are opened at the first write, rather than
+when clusters are created, and the least recently used one is closed when the
+pool is full, thus simulations with thousands of files do not exhaust the
+file descriptors of the process.
+
+Output files of any format are read with :py:func:`read_outfile`, e.g.::
+
+    from domain.helpers.outfiles import read_outfile
+
+    for metadata, columns in read_outfile("static/outfiles/SG-Extt_1.json"):
+        print(metadata["file_name"], columns["blocks_moved"].sum())
+"""
+from __future__ import annotations
+
+import os
+import json
+import threading
+
+from collections import OrderedDict
+from typing import Any, Dict, IO, List, Set, Tuple
+
+import numpy as np
+
+import environment_settings as es
+from domain.helpers.enums import ClusterStatus
+
+__pyarrow_available__ = True
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ModuleNotFoundError:
+    __pyarrow_available__ = False
+
+COLUMNAR_FORMATS: Tuple[str, ...] = ("npz", "arrow", "parquet")
+"""Output file formats written by :py:func:`write_columnar`."""
+
+SERIES: Dict[str, type] = {
+    "blocks_corrupted": np.int32,
+    "blocks_existing": np.int32,
+    "blocks_lost": np.int32,
+    "blocks_moved": np.int32,
+    "cluster_size_bm": np.int32,
+    "cluster_size_am": np.int32,
+    "cluster_status_bm": np.uint8,
+    "cluster_status_am": np.uint8,
+    "delay_replication": np.float32,
+    "off_node_count": np.int32,
+    "transmissions_failed": np.int32,
+}
+"""Names and types of the logs that have one value per epoch, i.e., the
+columns of every output file, see
+:py:class:`~app.domain.helpers.smart_dataclasses.LoggingData`."""
+
+_METADATA_KEY = "hive_metadata"
+
+_Outfile = List[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]
+
+_handles: OrderedDict[str, IO] = OrderedDict()
+_created: Set[str] = set()
+_lock = threading.Lock()
+
+
+def available_formats() -> Tuple[str, ...]:
+    """Lists the output file formats that can be written in this
+    environment.
+
+    Returns:
+        The names of the formats, which are also their file extensions.
+    """
+    if __pyarrow_available__:
+        return ("json", "ndjson") + COLUMNAR_FORMATS
+    return "json", "ndjson", "npz"
+
+
+def write_columnar(path: str,
+                   metadata: Dict[str, Any],
+                   columns: Dict[str, np.ndarray]) -> None:
+    """Writes the logs of one file in a columnar format.
+
+    Args:
+        path:
+            The path of the output file, whose extension is one of
+            :py:const:`COLUMNAR_FORMATS`.
+        metadata:
+            JSON serializable run metadata and logger attributes.
+        columns:
+            Typed arrays with one value per epoch, all with the same length.
+    """
+    fmt = os.path.splitext(path)[1][1:]
+    metadata_json = json.dumps(metadata, ensure_ascii=False)
+    if fmt == "npz":
+        with open(path, "wb") as file:
+            np.savez(file, **columns, **{_METADATA_KEY: np.array(metadata_json)})
+        return
+
+    table = pa.table(columns).replace_schema_metadata(
+        {_METADATA_KEY: metadata_json})
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink, \
+                pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def append_text(path: str, text: str) -> None:
+    """Appends text to an output file through the pool of file handles.
+
+    The first write of the process to ``path`` truncates the file, later
+    writes append to it, even if its handle was closed in between, thus
+    output files can be shared by multiple writers, e.g., the files of a
+    :py:class:`~app.domain.cluster_groups.SGClusterMulti`. The text is
+    flushed, so it survives failures of the simulation.
+
+    Args:
+        path:
+            The path of the output file.
+        text:
+            The text to be written, usually many buffered lines at once.
+    """
+    with _lock:
+        handle = _handles.get(path)
+        if handle is None:
+            while len(_handles) >= max(1, es.OUTFILE_MAX_OPEN):
+                _handles.popitem(last=False)[1].close()
+            handle = open(path, "a" if path in _created else "w")
+            _created.add(path)
+            _handles[path] = handle
+        else:
+            _handles.move_to_end(path)
+        handle.write(text)
+        handle.flush()
+
+
+def close_outfile(path: str) -> None:
+    """Closes the pooled handle of an output file, if it is open.
+
+    Args:
+        path:
+            The path of the output file.
+    """
+    with _lock:
+        handle = _handles.pop(path, None)
+        if handle is not None:
+            handle.close()
+
+
+def read_outfile(path: str) -> _Outfile:
+    """Reads a simulation output file of any format.
+
+    Args:
+        path:
+            The path of the output file, whose extension is its format.
+
+    Returns:
+        One ``(metadata, columns)`` pair per simulated file, where
+        ``columns`` maps the names of the :py:const:`SERIES` to typed arrays and ``metadata`` holds every other logged value.
+        Cluster statuses are :py:class:`~app.domain.helpers.enums.ClusterStatus`
+        codes regardless of the format.
+    """
+    fmt = os.path.splitext(path)[1][1:]
+    if fmt == "json":
+        return [_split_record(x) for x in _read_json_objects(path)]
+    if fmt == "ndjson":
+        return _read_ndjson(path)
+    if fmt == "npz":
+        with np.load(path) as data:
+            metadata = json.loads(str(data[_METADATA_KEY]))
+            columns = {k: data[k] for k in data.files if k != _METADATA_KEY}
+        return [(metadata, columns)]
+
+    if fmt == "parquet":
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    metadata = json.loads(table.schema.metadata[_METADATA_KEY.encode()])
+    columns = {name: table.column(name).to_numpy()
+               for name in table.column_names}
+    return [(metadata, columns)]
+
+
+def _read_json_objects(path: str) -> List[Dict[str, Any]]:
+    """Reads the concatenated JSON objects of a ``"json"`` output file,
+    which has one object per simulated file."""
+    with open(path) as file:
+        text = file.read()
+    decoder = json.JSONDecoder()
+    objects, i = [], 0
+    while True:
+        while i < len(text) and text[i].isspace():
+            i += 1
+        if i == len(text):
+            return objects
+        obj, i = decoder.raw_decode(text, i)
+        objects.append(obj)
+
+
+def _read_ndjson(path: str) -> _Outfile:
+    """Reads a ``"ndjson"`` output file, whose lines are grouped by file.
+
+    Files interrupted before their summary line are also returned.
+    """
+    records: Dict[str, Dict[str, Any]] = {}
+    with open(path) as file:
+        for line in file:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            record = records.setdefault(row["file_name"], {})
+            kind = row.pop("record")
+            if kind == "epoch":
+                for key in SERIES:
+                    record.setdefault(key, []).append(row[key])
+            else:
+                record.update(row)
+    return [_split_record(x) for x in records.values()]
+
+
+def _split_record(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Splits a text output file record into its metadata and its typed
+    columns."""
+    columns: Dict[str, np.ndarray] = {}
+    for key, dtype in SERIES.items():
+        values = record.pop(key, [])
+        if key.startswith("cluster_status_"):
+            values = [ClusterStatus[(x or "none").upper()].value for x in values]
+        columns[key] = np.array(values, dtype=dtype)
+    return record, columns
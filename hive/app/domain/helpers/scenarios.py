@@ -0,0 +1,338 @@
+"""Module used by :py:class:`~app.domain.cluster_groups.SGClusterPerfect` and
+:py:mod:`app.sample_scenario_generator` to store and read fixed pairs of
+topologies and steady state vectors, which allow one to one comparisons
+between swarm guidance configurations.
+
+Scenarios are grouped by network size. Each group is stored in
+:py:const:`~app.environment_settings.SCENARIOS_ROOT` as two ``.npy`` stacks:
+``{size}_matrices.npy``, with the rows of the adjacency matrices packed into
+bits, and ``{size}_vectors.npy``, with the steady state vectors. Stacks are
+memory-mapped read-only the first time a group is requested, thus reading
+any scenario takes constant time, does not load the whole group into memory
+and is safe across threads and processes.
+
+The matrices created by each transition matrix strategy of
+:py:mod:`app.domain.helpers.matrices` for every scenario of a group, and
+their mixing rates, can be precomputed with
+:py:func:`precompute_strategies` and are stored next to the group as
+``{size}_{strategy}_matrices.npy`` and ``{size}_{strategy}_rates.npy``.
+"""
+from __future__ import annotations
+
+import os
+import glob
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Dict, Optional, List, Sequence
+
+import numpy as np
+
+import environment_settings as es
+import domain.helpers.matrices as mm
+from utils.threads import apply_thread_budget, get_thread_budget
+
+_banks: Dict[Tuple[int, str], Tuple[np.ndarray, np.ndarray]] = {}
+_banks_lock = threading.Lock()
+
+_SCENARIOS: str = ""
+"""Key of the groups of scenarios in the cache of memory-mapped stacks, which
+also holds the groups of precomputed strategy results."""
+
+
+# region Scenario Bank
+def get_scenario(size: int, sid: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads one scenario from the bank.
+
+    Args:
+        size:
+            The network size of the scenario.
+        sid:
+            The identifier of the scenario, i.e., its position in the group
+            of scenarios of the given ``size``.
+
+    Returns:
+        A symmetric adjacency matrix and a stochastic steady state vector
+        which Metropolis-Hastings can turn into a Markov Matrix.
+
+    Raises:
+        FileNotFoundError:
+            If no scenarios of the given ``size`` exist.
+        IndexError:
+            If ``sid`` is not smaller than :py:func:`count_scenarios`.
+    """
+    matrices, vectors = _open_bank(size, _SCENARIOS)
+    a = np.unpackbits(matrices[sid], axis=-1, count=size)
+    return a.astype(np.float64), np.array(vectors[sid])
+
+
+def count_scenarios(size: int) -> int:
+    """Counts the scenarios of one network size in the bank.
+
+    Args:
+        size:
+            The network size of the scenarios.
+
+    Returns:
+        The number of scenarios of the given ``size`` or zero if there
+        are none.
+    """
+    try:
+        return _open_bank(size, _SCENARIOS)[1].shape[0]
+    except FileNotFoundError:
+        return 0
+
+
+def save_scenarios(
+        size: int, matrices: np.ndarray, vectors: np.ndarray) -> None:
+    """Stores a group of scenarios in the bank, replacing any existing group
+    with the same network size and discarding its precomputed strategy
+    results.
+
+    Files are written to temporary paths and renamed, hence processes
+    reading the previous group are not affected.
+
+    Args:
+        size:
+            The network size of the scenarios.
+        matrices:
+            A stack of adjacency matrices with shape ``(k, size, size)``.
+        vectors:
+            A stack of steady state vectors with shape ``(k, size)``.
+    """
+    os.makedirs(es.SCENARIOS_ROOT, exist_ok=True)
+    for path in glob.glob(os.path.join(es.SCENARIOS_ROOT, f"{size}_*_*.npy")):
+        os.remove(path)
+
+    packed = np.packbits(matrices.astype(bool), axis=-1)
+    for path, data in zip(_bank_paths(size, _SCENARIOS), (packed, vectors)):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp_path, path)
+
+    with _banks_lock:
+        for key in [key for key in _banks if key[0] == size]:
+            del _banks[key]
+
+
+def get_strategy_results(
+        size: int, sid: int, strategies: Sequence[str]
+) -> Optional[List[Tuple[Optional[np.ndarray], float]]]:
+    """Reads the precomputed results of some strategies for one scenario.
+
+    Args:
+        size:
+            The network size of the scenario.
+        sid:
+            The identifier of the scenario.
+        strategies:
+            The names of the transition matrix constructors in
+            :py:mod:`app.domain.helpers.matrices`.
+
+    Returns:
+        The matrix created by each strategy, or ``None`` if it failed, and
+        its mixing rate, in the order of ``strategies``, or ``None`` if
+        the results of any strategy were not precomputed.
+    """
+    results = []
+    for strategy in strategies:
+        try:
+            matrices, rates = _open_bank(size, strategy)
+        except FileNotFoundError:
+            return None
+        rate = rates[sid].item()
+        t = np.array(matrices[sid]) if np.isfinite(rate) else None
+        results.append((t, rate))
+    return results
+
+
+def precompute_strategies(
+        size: int, strategies: Sequence[str], workers: Optional[int] = None
+) -> None:
+    """Creates and stores the matrices of some strategies for every scenario
+    of one network size.
+
+    Scenarios are solved in parallel processes. Results are written to
+    temporary memory-mapped files and renamed when all scenarios are
+    solved, thus, at most one scenario per worker is held in memory.
+
+    Args:
+        size:
+            The network size of the scenarios.
+        strategies:
+            The names of the transition matrix constructors in
+            :py:mod:`app.domain.helpers.matrices`.
+        workers:
+            The maximum number of processes. If ``None`` it defaults to the
+            number of processors on the machine.
+    """
+    count = count_scenarios(size)
+    if count == 0:
+        raise FileNotFoundError(f"No scenarios of size {size} to precompute.")
+
+    outputs = {}
+    for strategy in strategies:
+        matrices_path, rates_path = _bank_paths(size, strategy)
+        outputs[strategy] = (
+            np.lib.format.open_memmap(
+                f"{matrices_path}.{os.getpid()}.tmp", mode="w+",
+                dtype=np.float64, shape=(count, size, size)),
+            np.lib.format.open_memmap(
+                f"{rates_path}.{os.getpid()}.tmp", mode="w+",
+                dtype=np.float64, shape=(count,)))
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=apply_thread_budget,
+                             initargs=(get_thread_budget(workers),)) as executor:
+        solved = executor.map(_solve_scenario,
+                              [size] * count,
+                              range(count),
+                              [list(strategies)] * count)
+        for sid, results in enumerate(solved):
+            for strategy, (t, rate) in zip(strategies, results):
+                matrices, rates = outputs[strategy]
+                matrices[sid] = np.nan if t is None else t
+                rates[sid] = rate
+
+    for strategy, (matrices, rates) in outputs.items():
+        matrices.flush()
+        rates.flush()
+        for path, data in zip(_bank_paths(size, strategy), (matrices, rates)):
+            os.replace(data.filename, path)
+
+    with _banks_lock:
+        for strategy in strategies:
+            _banks.pop((size, strategy), None)
+
+
+def _open_bank(size: int, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-maps one group of stacks, once per process.
+
+    Args:
+        size:
+            The network size of the scenarios.
+        kind:
+            :py:const:`_SCENARIOS` or the name of a strategy.
+
+    Returns:
+        The read-only stacks of packed adjacency matrices and of steady
+        state vectors or of a strategy's matrices and mixing rates.
+    """
+    key = (size, kind)
+    bank = _banks.get(key)
+    if bank is None:
+        with _banks_lock:
+            bank = _banks.get(key)
+            if bank is None:
+                first_path, second_path = _bank_paths(size, kind)
+                bank = (np.load(first_path, mmap_mode='r'),
+                        np.load(second_path, mmap_mode='r'))
+                _banks[key] = bank
+    return bank
+
+
+def _bank_paths(size: int, kind: str) -> Tuple[str, str]:
+    """Gets the paths of one group of stacks.
+
+    Args:
+        size:
+            The network size of the scenarios.
+        kind:
+            :py:const:`_SCENARIOS` or the name of a strategy.
+
+    Returns:
+        The paths of the matrices and of the vectors, or rates, stacks,
+        respectively.
+    """
+    if kind == _SCENARIOS:
+        return (os.path.join(es.SCENARIOS_ROOT, f"{size}_matrices.npy"),
+                os.path.join(es.SCENARIOS_ROOT, f"{size}_vectors.npy"))
+    return (os.path.join(es.SCENARIOS_ROOT, f"{size}_{kind}_matrices.npy"),
+            os.path.join(es.SCENARIOS_ROOT, f"{size}_{kind}_rates.npy"))
+# endregion
+
+
+# region Scenario Generation
+def new_scenarios(
+        size: int, samples: int, workers: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Generates scenarios that Metropolis-Hastings is able to solve.
+
+    Random topologies and steady state vectors are generated in batches and
+    their Metropolis-Hastings matrices are
+    :py:func:`validated <app.domain.helpers.matrices.validate_transition_matrices>`
+    in parallel processes. Unsolvable pairs are discarded and replaced
+    until ``samples`` pairs are found.
+
+    Args:
+        size:
+            The network size of the scenarios.
+        samples:
+            The number of scenarios to generate.
+        workers:
+            The maximum number of validation processes. If ``None`` it
+            defaults to the number of processors on the machine.
+
+    Returns:
+        A stack of adjacency matrices with shape ``(samples, size, size)``
+        and a stack of steady state vectors with shape ``(samples, size)``.
+    """
+    workers = workers or os.cpu_count() or 1
+    matrices = np.empty((0, size, size))
+    vectors = np.empty((0, size))
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=apply_thread_budget,
+                             initargs=(get_thread_budget(workers),)) as executor:
+        while matrices.shape[0] < samples:
+            missing = samples - matrices.shape[0]
+            a = mm.new_symmetric_connected_matrices(missing, size)
+            v = np.stack([mm.new_vector(size) for _ in range(missing)])
+            chunks = np.array_split(np.arange(missing), min(workers, missing))
+            valid = np.concatenate(list(executor.map(
+                _are_solvable, [a[c] for c in chunks], [v[c] for c in chunks])))
+            matrices = np.concatenate([matrices, a[valid]])
+            vectors = np.concatenate([vectors, v[valid]])
+    return matrices, vectors
+
+
+def _solve_scenario(size: int, sid: int, strategies: List[str]
+                    ) -> List[Tuple[Optional[np.ndarray], float]]:
+    """Creates the matrices of some strategies for one scenario.
+
+    Args:
+        size:
+            The network size of the scenario.
+        sid:
+            The identifier of the scenario.
+        strategies:
+            The names of the transition matrix constructors in
+            :py:mod:`app.domain.helpers.matrices`.
+
+    Returns:
+        The matrix created by each strategy, or ``None`` if it failed, and
+        its mixing rate.
+    """
+    a, v_ = get_scenario(size, sid)
+    return [getattr(mm, strategy)(a, v_) for strategy in strategies]
+
+
+def _are_solvable(a: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Checks which scenarios Metropolis-Hastings is able to solve.
+
+    Args:
+        a:
+            A stack of adjacency matrices.
+        v:
+            A stack of steady state vectors, one per adjacency matrix.
+
+    Returns:
+        A boolean array whose entries are ``True`` if the respective
+        scenario is solvable.
+    """
+    valid = np.empty(a.shape[0], dtype=bool)
+    for k in range(a.shape[0]):
+        t, _ = mm.new_mh_transition_matrices(a[k][None], v[k])
+        valid[k] = mm.validate_transition_matrices(t, v[k])[0]
+    return valid
+# endregion
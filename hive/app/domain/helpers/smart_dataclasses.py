@@ -4,13 +4,17 @@ from __future__ import annotations
 
 import os
 import json
+import numpy as np
 import domain.cluster_groups as cg
 import domain.master_servers as ms
+import domain.helpers.outfiles as of
 import environment_settings as es
 
 from pathlib import Path
 from random import randint
-from typing import Any, Dict, IO, List
+from typing import Any, Dict, List, Optional
+
+from domain.helpers.enums import ClusterStatus
 from utils import convertions, crypto
 
 
@@ -23,6 +27,11 @@ class FileData:
     but also keeping simulation events logged in RAM until the simulation 
     ends, at which point the logs are written to disk.
 
+    Output files are not opened when ``FileData`` is created. Written lines
+    are buffered and handed to the pool of file handles of
+    :py:func:`~app.domain.helpers.outfiles.append_text`, which opens them at
+    the first write.
+
     Attributes:
         name (str):
             The name of the original file.
@@ -33,10 +42,15 @@ class FileData:
             Object that stores captured simulation data. Stored data can be
             post-processed using user defined scripts to create items such
             has graphs and figures.
-        out_file (Union[str, bytes, int]):
-            File output stream to where captured data is written in append
-            mode and to which ``logger`` will be written to at the end of the
-            simulation.
+        out_file (Optional[str]):
+            Path of the output file to where captured data is written in
+            append mode and to which ``logger`` will be written to at the end
+            of the simulation. With the ``"ndjson"``
+            :py:const:`~app.environment_settings.OUTFILE_FORMAT`, the
+            metrics of each epoch are streamed to it instead, see
+            :py:meth:`ewrite`. With :py:const:`columnar formats
+            <app.domain.helpers.outfiles.COLUMNAR_FORMATS>` it is ``None``
+            and each file is written to its own output file.
     """
 
     def __init__(self, name: str, sim_id: int = 0, origin: str = "") -> None:
@@ -61,26 +75,79 @@ class FileData:
         """
         self.name: str = name
         self.existing_replicas = 0
-        self.logger: LoggingData = LoggingData()
-        self.out_file: IO = open(os.path.join(
-            es.OUTFILE_ROOT, f"{Path(origin).resolve().stem}_{sim_id}.json"),
-            "w+")
+        self.streaming: bool = es.OUTFILE_FORMAT == "ndjson"
+        self.logger: LoggingData = LoggingData(1 if self.streaming else None)
+        self.out_path: str = os.path.join(
+            es.OUTFILE_ROOT, f"{Path(origin).resolve().stem}_{sim_id}")
+        self.out_file: Optional[str] = None
+        if es.OUTFILE_FORMAT not in of.COLUMNAR_FORMATS:
+            self.out_file = f"{self.out_path}.{es.OUTFILE_FORMAT}"
+        self._header_written: bool = False
+        self._rows: List[str] = []
 
     def fwrite(self, msg: str) -> None:
         """Appends a message to the output stream of ``FileData``.
 
-        The method automatically adds a new line character to ``msg``.
+        The method automatically adds a new line character to ``msg``, which
+        is written after any lines still buffered by :py:meth:`ewrite`.
 
         Args:
             msg:
                 The message to be logged on the :py:attr:`out_file`.
         """
-        self.out_file.write(msg + "\n")
+        self._rows.append(msg)
+        self._flush_rows()
+
+    def ewrite(self, cluster: cg.Cluster, origin: str, epoch: int) -> None:
+        """Streams the metrics of an epoch to the output stream of
+        ``FileData``, if the ``"ndjson"``
+        :py:const:`~app.environment_settings.OUTFILE_FORMAT` is used.
+
+        The first line written is a header, with the run metadata, see
+        :py:meth:`jwrite`. Each epoch is a line with the values of the
+        :py:const:`~LoggingData.SERIES` of :py:attr:`logger` at that epoch.
+        Lines are buffered and written every
+        :py:const:`~app.environment_settings.OUTFILE_BUFFER_EPOCHS` epochs,
+        thus memory does not grow with the number of epochs and all but the
+        last buffered epochs survive failures.
+
+        Args:
+            cluster:
+                The :py:class:`Cluster <app.domain.cluster_groups.Cluster>`
+                object that manages the simulated persistence of the
+                :py:attr:`named file <name>`.
+            origin:
+                The name of the simulation file name that started
+                the simulation process.
+            epoch:
+                The epoch that just completed.
+        """
+        if not self.streaming:
+            return
+
+        if not self._header_written:
+            header = {"record": "header", **self._run_metadata(cluster, origin)}
+            self._rows.append(json.dumps(header, ensure_ascii=False))
+            self._header_written = True
+
+        row = {"record": "epoch", "file_name": self.name, "epoch": epoch,
+               **self.logger.pop_epoch(epoch)}
+        self._rows.append(json.dumps(row))
+        if len(self._rows) >= es.OUTFILE_BUFFER_EPOCHS:
+            self._flush_rows()
 
     def jwrite(self, cluster: cg.Cluster, origin: str, epoch: int) -> None:
         """Appends a json string to the output stream of ``FileData``.
 
         The logged data are all attributes belonging to :py:attr:`logger`.
+        With the ``"ndjson"``
+        :py:const:`~app.environment_settings.OUTFILE_FORMAT`, the epochs
+        were already streamed by :py:meth:`ewrite`, thus only the remaining
+        attributes are written, in one last summary line. With
+        :py:const:`columnar formats
+        <app.domain.helpers.outfiles.COLUMNAR_FORMATS>`, the logs are
+        written to ``<out_path>_<name>.<format>``, see
+        :py:func:`~app.domain.helpers.outfiles.write_columnar`.
 
         Args:
             cluster:
@@ -103,6 +170,13 @@ class FileData:
         if not sd.terminated_messages:
             sd.terminated_messages.append("completed simulation successfully")
 
+        if self.streaming:
+            summary = {"record": "summary", "file_name": self.name,
+                       **sd.to_dict(series=False)}
+            self._rows.append(json.dumps(summary, ensure_ascii=False))
+            self._flush_rows()
+            return
+
         sd.blocks_existing = sd.blocks_existing[:epoch]
 
         sd.off_node_count = sd.off_node_count[:epoch]
@@ -119,7 +193,38 @@ class FileData:
         sd.blocks_corrupted = sd.blocks_corrupted[:epoch]
         sd.transmissions_failed = sd.transmissions_failed[:epoch]
 
-        extras: Dict[str, Any] = {
+        if self.out_file is None:
+            metadata = sd.to_dict(series=False)
+            metadata.update(self._run_metadata(cluster, origin))
+            columns = {key: getattr(sd, key) for key in sd.SERIES}
+            of.write_columnar(
+                f"{self.out_path}_{self.name}.{es.OUTFILE_FORMAT}",
+                metadata, columns)
+            return
+
+        sim_data_dict = sd.to_dict()
+        sim_data_dict.update(self._run_metadata(cluster, origin))
+        json_string = json.dumps(
+            sim_data_dict, indent=4, sort_keys=True, ensure_ascii=False)
+
+        self.fwrite(json_string)
+
+    def _run_metadata(self, cluster: cg.Cluster, origin: str) -> Dict[str, Any]:
+        """Describes the simulation whose logs are written.
+
+        Args:
+            cluster:
+                The :py:class:`Cluster <app.domain.cluster_groups.Cluster>`
+                object that manages the simulated persistence of the
+                :py:attr:`named file <name>`.
+            origin:
+                The name of the simulation file name that started
+                the simulation process.
+
+        Returns:
+            The cluster thresholds and environment settings of the run.
+        """
+        return {
             "cluster_type": cluster.__class__.__name__,
             "simfile_name": origin,
             "cluster_id": cluster.id,
@@ -139,12 +244,12 @@ class FileData:
             "corruption_chance_tod": cluster.corruption_chances[0]
         }
 
-        sim_data_dict = sd.__dict__
-        sim_data_dict.update(extras)
-        json_string = json.dumps(
-            sim_data_dict, indent=4, sort_keys=True, ensure_ascii=False)
-
-        self.fwrite(json_string)
+    def _flush_rows(self) -> None:
+        """Writes the buffered lines of :py:meth:`fwrite`, :py:meth:`ewrite`
+        and :py:meth:`jwrite` to :py:attr:`out_file`."""
+        if self._rows:
+            of.append_text(self.out_file, "\n".join(self._rows) + "\n")
+            self._rows = []
 
     def fclose(self, msg: str = None) -> None:
         """Closes the output stream controlled by the ``FileData`` instance.
@@ -154,9 +259,12 @@ class FileData:
                  If filled, a termination message is appended to
                  :py:attr:`out_file`, before closing it.
         """
+        if self.out_file is None:
+            return
+        self._flush_rows()
         if msg:
             self.fwrite(msg)
-        self.out_file.close()
+        of.close_outfile(self.out_file)
 
     # region Overrides
     def __hash__(self):
@@ -333,6 +441,12 @@ class FileBlockData:
     # endregion
 
 
+_STATUS_NAMES: Dict[int, str] = {
+    status.value: "" if status is ClusterStatus.NONE else status.name.lower()
+    for status in ClusterStatus
+}
+
+
 class LoggingData:
     """Logger object that stores simulation events and other data.
 
@@ -340,6 +454,11 @@ class LoggingData:
         Some attributes might not be documented, but should be straight
         forward to understand after inspecting their usage in the source code.
 
+        Per epoch series are preallocated numpy arrays, rather than lists,
+        and cluster statuses are stored as
+        :py:class:`~app.domain.helpers.enums.ClusterStatus` codes. They are
+        converted to lists and strings by :py:meth:`to_dict` when written.
+
     Attributes:
         cswc (int):
             Indicates how many consecutive steps a file as been in
@@ -371,52 +490,52 @@ class LoggingData:
             simulation managed to persist the file throughout the entire
             :py:const:`simulation epochs
             <app.environment_settings.ms.Master.MAX_EPOCHS>`.
-        blocks_corrupted (List[int]):
+        blocks_corrupted (np.ndarray):
             The number of :py:class:`file block replicas
             <app.domain.helpers.smart_dataclasses.FileBlockData>` lost at
             each simulation epoch due to disk errors.
-        blocks_existing (List[int]):
+        blocks_existing (np.ndarray):
             The number of existing :py:class:`file block replicas
             <app.domain.helpers.smart_dataclasses.FileBlockData>` inside the
             :py:mod:`cluster group <app.domain.cluster_groups>` members' storage
             disks at each epoch.
-        blocks_lost (List[int]):
+        blocks_lost (np.ndarray):
             The number of :py:class:`file block replicas
             <app.domain.helpers.smart_dataclasses.FileBlockData>` that were
             lost at each epoch due to :py:mod:`network nodes
             <app.domain.network_nodes>` going offline.
-        blocks_moved (List[int]):
+        blocks_moved (np.ndarray):
             The number of messages containing :py:class:`file block replicas
             <app.domain.helpers.smart_dataclasses.FileBlockData>` that were
             transmited, including those that were not delivered or
             acknowledged, at each epoch.
-        cluster_size_bm (List[int]):
+        cluster_size_bm (np.ndarray):
             The number of :py:mod:`network nodes <app.domain.network_nodes>`
             registered at a  :py:attr:`cluster group's members list
             <app.domain.cluster_groups.Cluster.members>`,
             before the :py:meth:`maintenance step
             <app.domain.cluster_groups.Cluster.membership_maintenance>`
             of the epoch.
-        cluster_size_am (List[int]):
+        cluster_size_am (np.ndarray):
             The number of :py:mod:`network nodes <app.domain.network_nodes>`
             registered at a  :py:attr:`cluster group's members list
             <app.domain.cluster_groups.Cluster.members>`,
             after the :py:meth:`maintenance step
             <app.domain.cluster_groups.Cluster.membership_maintenance>`
             of the epoch.
-        cluster_status_bm (List[str]):
-            Strings describing the health of the :py:class:`cluster group
+        cluster_status_bm (np.ndarray):
+            Codes describing the health of the :py:class:`cluster group
             <app.domain.cluster_groups.Cluster>` at each epoch,
             before the :py:meth:`maintenance step
             <app.domain.cluster_groups.Cluster.membership_maintenance>`
             of the epoch.
-        cluster_status_am (List[str]):
-            Strings describing the health of the :py:class:`cluster group
+        cluster_status_am (np.ndarray):
+            Codes describing the health of the :py:class:`cluster group
             <app.domain.cluster_groups.Cluster>` at each epoch,
             after the :py:meth:`maintenance step
             <app.domain.cluster_groups.Cluster.membership_maintenance>`
             of the epoch.
-        delay_replication (List[float]):
+        delay_replication (np.ndarray):
             Log of the average time it took to recover one or more lost
             :py:class:`file block replicas
             <app.domain.helpers.smart_dataclasses.FileBlockData>`, at each
@@ -438,7 +557,7 @@ class LoggingData:
             is kept in the list for each transition matrix used throughout
             the simulation. The integral part of the float value is the
             in-degree, the decimal part is the out-degree.
-        off_node_count (List[int]):
+        off_node_count (np.ndarray):
             The number of :py:mod:`network nodes <app.domain.network_nodes>`
             whose status changed to offline or suspicious, at each epoch.
         topologies_goal_achieved (List[bool]):
@@ -447,18 +566,29 @@ class LoggingData:
         topologies_goal_distance (List[float]):
             Stores magnitude difference between the desired density
             distribution and the topologies' average density distribution.
-        transmissions_failed (List[int]):
+        transmissions_failed (np.ndarray):
             The number of message transmissions that were lost in the
             overlay network of a :py:mod:`cluster group
             <app.domain.cluster_groups>`, at each epoch.
     """
 
     # region Class Variables, Instance Variables and Constructors
-    def __init__(self) -> None:
-        """Instanciates a ``LoggingData`` object."""
+    SERIES: Dict[str, type] = of.SERIES
+    """Names and types of the attributes that store one value per epoch."""
 
-        max_epochs = ms.Master.MAX_EPOCHS
-        max_epochs_plus_one = ms.Master.MAX_EPOCHS_PLUS_ONE
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        """Instanciates a ``LoggingData`` object.
+
+        Args:
+            capacity:
+                How many epochs the :py:const:`SERIES` keep. Epochs are
+                stored in a circular buffer, thus an epoch must be read with
+                :py:meth:`pop_epoch` before it is overwritten. If ``None``
+                all epochs are kept.
+        """
+        max_epochs = capacity or ms.Master.MAX_EPOCHS
+        max_epochs_plus_one = capacity or ms.Master.MAX_EPOCHS_PLUS_ONE
+        self._capacity: int = max_epochs_plus_one
 
         ###############################
         # Do not alter these
@@ -466,29 +596,29 @@ class LoggingData:
         self.largest_convergence_window: int = 0
         self.convergence_set: List[int] = []
         self.convergence_sets: List[List[int]] = []
-        self.terminated: int = max_epochs
+        self.terminated: int = ms.Master.MAX_EPOCHS
         self.terminated_messages = []
         self.successfull: bool = True
         ###############################
 
         ###############################
         # Alter these at will
-        self.blocks_corrupted: List[int] = [0] * max_epochs
-        self.blocks_existing: List[int] = [0] * max_epochs
-        self.blocks_lost: List[int] = [0] * max_epochs_plus_one
-        self.blocks_moved: List[int] = [0] * max_epochs
-        self.cluster_size_bm: List[int] = [0] * max_epochs
-        self.cluster_size_am: List[int] = [0] * max_epochs
-        self.cluster_status_bm: List[str] = [""] * max_epochs
-        self.cluster_status_am: List[str] = [""] * max_epochs
-        self.delay_replication: List[float] = [0.0] * max_epochs_plus_one
+        self.blocks_corrupted: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
+        self.blocks_existing: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
+        self.blocks_lost: np.ndarray = np.zeros(max_epochs_plus_one, dtype=np.int32)
+        self.blocks_moved: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
+        self.cluster_size_bm: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
+        self.cluster_size_am: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
+        self.cluster_status_bm: np.ndarray = np.zeros(max_epochs, dtype=np.uint8)
+        self.cluster_status_am: np.ndarray = np.zeros(max_epochs, dtype=np.uint8)
+        self.delay_replication: np.ndarray = np.zeros(max_epochs_plus_one, dtype=np.float32)
         self.delay_suspects_detection: Dict[str, int] = {}
         self.initial_spread = ""
         self.matrices_nodes_degrees: List[Dict[str, str]] = []
-        self.off_node_count: List[int] = [0] * max_epochs
+        self.off_node_count: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
         self.topologies_goal_achieved: List[bool] = []
         self.topologies_goal_distance: List[float] = []
-        self.transmissions_failed: List[int] = [0] * max_epochs
+        self.transmissions_failed: np.ndarray = np.zeros(max_epochs, dtype=np.int32)
         ###############################
 
     # endregion
@@ -526,6 +656,57 @@ class LoggingData:
             self.convergence_set = []
         self.cswc = 0
 
+    def to_dict(self, series: bool = True) -> Dict[str, Any]:
+        """Converts the logged data to JSON serializable types.
+
+        Args:
+            series:
+                Whether or not the :py:const:`SERIES` are included.
+
+        Returns:
+            A copy of the instance's public attributes where numpy arrays
+            are lists and cluster status codes are lower case status
+            strings, e.g., ``"stable"``, or ``""`` at epochs that were not
+            logged.
+        """
+        data: Dict[str, Any] = {}
+        for key, value in self.__dict__.items():
+            if key.startswith("_") or (not series and key in self.SERIES):
+                continue
+            if key.startswith("cluster_status_"):
+                value = [_STATUS_NAMES[code] for code in value.tolist()]
+            elif isinstance(value, np.ndarray):
+                value = value.tolist()
+            data[key] = value
+        return data
+
+    def pop_epoch(self, epoch: int) -> Dict[str, Any]:
+        """Reads the :py:const:`SERIES` values of an epoch and clears them,
+        so that their slot can store a later epoch.
+
+        Args:
+            epoch:
+                A simulation epoch index.
+
+        Returns:
+            A dictionary mapping the names of the series to their JSON
+            serializable values at ``epoch``.
+        """
+        i = self._slot(epoch)
+        row: Dict[str, Any] = {}
+        for key in self.SERIES:
+            series = getattr(self, key)
+            value = series[i].item()
+            if key.startswith("cluster_status_"):
+                value = _STATUS_NAMES[value]
+            row[key] = value
+            series[i] = 0
+        return row
+
+    def _slot(self, epoch: int) -> int:
+        """Maps an epoch to its index in the :py:const:`SERIES`."""
+        return (epoch - 1) % self._capacity
+
     def _recursive_len(self, item: Any) -> int:
         """Recusively sums the length of all lists in :py:attr:`~convergence_sets`.
 
@@ -594,7 +775,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.delay_replication[epoch - 1] = 0 if calls == 0 else delay / calls
+        self.delay_replication[self._slot(epoch)] = 0 if calls == 0 else delay / calls
 
     def log_suspicous_node_detection_delay(
             self, node_id: str, delay: int) -> None:
@@ -620,7 +801,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.blocks_moved[epoch - 1] += n
+        self.blocks_moved[self._slot(epoch)] += n
 
     def log_existing_file_blocks(self, n: int, epoch: int) -> None:
         """Logs the amount of existing file blocks in the simulation environment at an epoch.
@@ -631,7 +812,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.blocks_existing[epoch - 1] += n
+        self.blocks_existing[self._slot(epoch)] += n
 
     def log_off_nodes(self, n: int, epoch: int) -> None:
         """Logs the amount of disconnected network_nodes at an epoch.
@@ -642,7 +823,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.off_node_count[epoch - 1] += n
+        self.off_node_count[self._slot(epoch)] += n
 
     def log_lost_file_blocks(self, n: int, epoch: int) -> None:
         """Logs the amount of permanently lost file block blocks at an epoch.
@@ -653,7 +834,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.blocks_lost[epoch - 1] += n
+        self.blocks_lost[self._slot(epoch)] += n
 
     def log_lost_messages(self, n: int, epoch: int) -> None:
         """Logs the amount of failed message transmissions at an epoch.
@@ -664,7 +845,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.transmissions_failed[epoch - 1] += n
+        self.transmissions_failed[self._slot(epoch)] += n
 
     def log_corrupted_file_blocks(self, n: int, epoch: int) -> None:
         """Logs the amount of corrupted file block blocks at an epoch.
@@ -675,7 +856,7 @@ class LoggingData:
             epoch:
                 A simulation epoch index.
         """
-        self.blocks_corrupted[epoch - 1] += n
+        self.blocks_corrupted[self._slot(epoch)] += n
 
     def log_fail(self, epoch: int, message: str = "") -> None:
         """Logs the epoch at which a simulation terminated due to a failure.
@@ -710,15 +891,16 @@ class LoggingData:
                 The number of network nodes in the cluster after maintenance.
             status_bm:
                 A string that describes the status of the cluster before
-                maintenance.
+                maintenance, i.e., the lower case name of a
+                :py:class:`~app.domain.helpers.enums.ClusterStatus`.
             status_am:
                 A string that describes the status of the cluster after
                 maintenance.
             epoch:
                 A simulation epoch at which termination occurred.
         """
-        self.cluster_size_bm[epoch - 1] = size_bm
-        self.cluster_size_am[epoch - 1] = size_am
-        self.cluster_status_bm[epoch - 1] = status_bm
-        self.cluster_status_am[epoch - 1] = status_am
+        self.cluster_size_bm[self._slot(epoch)] = size_bm
+        self.cluster_size_am[self._slot(epoch)] = size_am
+        self.cluster_status_bm[self._slot(epoch)] = ClusterStatus[status_bm.upper()].value
+        self.cluster_status_am[self._slot(epoch)] = ClusterStatus[status_am.upper()].value
     # endregion
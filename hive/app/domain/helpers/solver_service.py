@@ -0,0 +1,401 @@
+"""Module with the solver service that creates optimized transition matrices
+for all simulations running in the same process.
+
+Requests are queued to a shared pool of worker processes, whose size caps how
+many problems are solved at once, see
+:py:const:`~app.environment_settings.SOLVER_WORKERS`, thus the memory used by
+solvers stays bounded no matter how many simulations run concurrently.
+Requests identical to one that is still being solved, i.e., with the same
+strategy, topology and steady state, share its result instead of being solved
+again. Results of finished requests are kept by the
+:py:mod:`persistent matrix store <app.domain.helpers.matrix_store>`.
+
+Requests may have a deadline. Overdue requests that did not start are
+cancelled and the worker processes still solving overdue requests are killed,
+so that slow strategies do not keep workers busy after their results stopped
+being awaited. Other requests interrupted by the replacement of the killed
+workers are submitted again. Every request is also limited by
+:py:const:`~app.environment_settings.SOLVER_JOB_TIMEOUT`.
+
+Worker processes are not forked from the simulations, whose threads may
+hold locks, but started by a server process, see :py:const:`_START_METHOD`.
+They receive a copy of the :py:mod:`~app.environment_settings` of the
+process when the pool is created, thus settings must be changed before the
+pool starts, see :py:func:`warm_up`. Worker processes start the matlab engine
+while they wait for their first request when
+:py:const:`~app.environment_settings.MGO_ENGINE` is ``"matlab"``.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import signal
+import threading
+import itertools
+import multiprocessing
+import concurrent.futures
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import environment_settings as es
+from domain.helpers.matlab_utils import MatlabEngineContainer
+from domain.helpers.matrix_store import content_key
+from utils.threads import apply_thread_budget, get_thread_budget
+
+_Result = Tuple[Optional[np.ndarray], float]
+
+_KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+_START_METHOD: str = "forkserver" \
+    if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+"""How worker processes are started. Forking the simulations could copy
+locks held by their other threads, e.g., those of the output files, of the
+matrix store connection or of the native thread pools."""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_started: Optional[multiprocessing.Queue] = None
+_in_flight: Dict[str, _Job] = {}
+_running: Dict[int, int] = {}
+_abandoned: Dict[int, _Job] = {}
+_job_ids = itertools.count()
+_lock = threading.RLock()
+
+# Set in worker processes by _init_worker.
+_worker_started: Optional[multiprocessing.Queue] = None
+
+
+class _Job:
+    """A request being solved by the service.
+
+    Attributes:
+        id (int):
+            Identifies the job in the messages of the worker processes.
+        key (str):
+            The content key shared by identical requests.
+        strategy (Callable):
+            The transition matrix constructor.
+        a (np.ndarray):
+            The adjacency matrix of the request.
+        v_ (np.ndarray):
+            The steady state of the request.
+        deadline (Optional[float]):
+            The :py:func:`~time.monotonic` time after which no caller awaits
+            the job anymore or ``None`` if a caller waits for it forever.
+        future (Future):
+            The future handed to callers, which outlives replaced pools.
+        pool_future (Optional[Future]):
+            The future of the pool the job is currently submitted to.
+    """
+
+    def __init__(self,
+                 key: str,
+                 strategy: Callable,
+                 a: np.ndarray,
+                 v_: np.ndarray,
+                 deadline: Optional[float]) -> None:
+        self.id: int = next(_job_ids)
+        self.key: str = key
+        self.strategy: Callable = strategy
+        self.a: np.ndarray = a
+        self.v_: np.ndarray = v_
+        self.deadline: Optional[float] = deadline
+        self.future: Future = Future()
+        self.pool_future: Optional[Future] = None
+
+
+def submit(strategy: Callable,
+           a: np.ndarray,
+           v_: np.ndarray,
+           timeout: Optional[float] = None) -> Future:
+    """Requests a transition matrix from the service.
+
+    Args:
+        strategy:
+            A module level transition matrix constructor, e.g.,
+            :py:func:`~app.domain.helpers.matrices.new_go_transition_matrix`.
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+        timeout:
+            The number of seconds the caller waits for the request. The
+            request may be stopped afterwards, see :py:func:`expire`. If
+            ``None`` it is only limited by
+            :py:const:`~app.environment_settings.SOLVER_JOB_TIMEOUT`.
+
+    Returns:
+        A future of the ``(matrix, mixing rate)`` pair created by
+        ``strategy``. Identical requests that are still in flight get the
+        same future and extend its deadline.
+    """
+    key = content_key(a, v_, f"{strategy.__module__}.{strategy.__name__}")
+    timeout = _limit(timeout)
+    deadline = None if timeout is None else monotonic() + timeout
+    with _lock:
+        _forget_parent()
+        _kill_abandoned()
+        job = _in_flight.get(key)
+        if job is not None:
+            if job.deadline is not None:
+                job.deadline = None if deadline is None else \
+                    max(job.deadline, deadline)
+            return job.future
+        job = _Job(key, strategy, a, v_, deadline)
+        _in_flight[key] = job
+        _start(job)
+    return job.future
+
+
+def solve(a: np.ndarray,
+          v_: np.ndarray,
+          strategies: List[Callable],
+          deadline: Optional[float] = None) -> List[_Result]:
+    """Requests one transition matrix per strategy and waits for them.
+
+    Requests that did not finish before the ``deadline`` are stopped, unless
+    identical requests with a later deadline still await them, see
+    :py:func:`expire`.
+
+    Args:
+        a:
+            A non-optimized symmetric adjency matrix.
+        `v_`:
+            A stochastic steady state distribution vector.
+        strategies:
+            The transition matrix constructors to be executed.
+        deadline:
+            The maximum number of seconds to wait for the ``strategies``. If
+            ``None`` all of them are awaited, unless they exceed
+            :py:const:`~app.environment_settings.SOLVER_JOB_TIMEOUT`.
+
+    Returns:
+        One ``(matrix, mixing rate)`` pair for each of the ``strategies``,
+        in the same order. Strategies that failed or exceeded the
+        ``deadline`` are represented by ``(None, float('inf'))``.
+    """
+    deadline = _limit(deadline)
+    futures = [submit(f, a, v_, deadline) for f in strategies]
+    concurrent.futures.wait(futures, timeout=deadline)
+    expire()
+
+    results: List[_Result] = []
+    for future in futures:
+        if future.done() and not future.cancelled() and \
+                future.exception() is None:
+            results.append(future.result())
+        else:
+            results.append((None, float('inf')))
+    return results
+
+
+def expire() -> None:
+    """Stops the requests whose deadline passed.
+
+    Overdue requests waiting for a worker are cancelled. The workers solving
+    overdue requests are killed and the pool is replaced by a new one, whose
+    workers take over the other requests of the killed pool. Requests that
+    were handed to a worker that did not report it yet are killed as soon
+    as it does. Callers of stopped requests get ``(None, float('inf'))``.
+    """
+    now = monotonic()
+    with _lock:
+        _forget_parent()
+        _drain_started()
+        for job in list(_in_flight.values()):
+            if job.deadline is None or job.deadline > now or \
+                    job.pool_future.done():
+                continue
+            del _in_flight[job.key]
+            if not job.pool_future.cancel():
+                _abandoned[job.id] = job
+            job.future.set_result((None, float('inf')))
+        _kill_abandoned()
+
+
+def warm_up() -> None:
+    """Starts the worker processes before the first request.
+
+    Workers are otherwise started by the first requests that need them, thus
+    warming them up hides their startup time, including the one of their
+    matlab engines, behind other work, e.g., loading simulation files.
+
+    Note:
+        Call it from the main thread, after the
+        :py:mod:`~app.environment_settings` are set and before simulations
+        start, since the pool copies the settings when it is created.
+    """
+    with _lock:
+        _forget_parent()
+        executor = _get_executor()
+        for _ in range(es.SOLVER_WORKERS or os.cpu_count() or 1):
+            executor.submit(int)
+
+
+def _limit(timeout: Optional[float]) -> Optional[float]:
+    """Caps a timeout at
+    :py:const:`~app.environment_settings.SOLVER_JOB_TIMEOUT`."""
+    if es.SOLVER_JOB_TIMEOUT is None:
+        return timeout
+    if timeout is None:
+        return es.SOLVER_JOB_TIMEOUT
+    return min(timeout, es.SOLVER_JOB_TIMEOUT)
+
+
+def _start(job: _Job) -> None:
+    """Submits a job to the pool. Must be called while holding ``_lock``."""
+    args = (_run, job.id, job.strategy, job.a, job.v_)
+    try:
+        job.pool_future = _get_executor().submit(*args)
+    except BrokenProcessPool:
+        _reset_executor()
+        job.pool_future = _get_executor().submit(*args)
+    job.pool_future.add_done_callback(lambda f: _finish(job, f))
+
+
+def _finish(job: _Job, pool_future: Future) -> None:
+    """Hands the result of the pool to the callers of a job.
+
+    Jobs interrupted by the replacement of a pool whose workers were killed
+    by :py:func:`expire` are submitted to the new pool.
+    """
+    with _lock:
+        _abandoned.pop(job.id, None)
+        _running.pop(job.id, None)
+        if job.future.done() or pool_future is not job.pool_future or \
+                pool_future.cancelled():
+            return
+        exc = pool_future.exception()
+        if isinstance(exc, BrokenProcessPool) and _in_flight.get(job.key) is job:
+            _start(job)
+            return
+        if _in_flight.get(job.key) is job:
+            del _in_flight[job.key]
+    if exc is None:
+        job.future.set_result(pool_future.result())
+    else:
+        job.future.set_exception(exc)
+
+
+def _kill_abandoned() -> None:
+    """Kills the workers running expired jobs and replaces the pool. Must be
+    called while holding ``_lock``."""
+    _drain_started()
+    pids = {_running[x] for x in _abandoned if x in _running}
+    if not pids:
+        return
+    for pid in pids:
+        try:
+            os.kill(pid, _KILL_SIGNAL)
+        except OSError:
+            pass
+    for job_id in [x for x in _abandoned if x in _running]:
+        del _abandoned[job_id]
+    _reset_executor()
+
+
+def _drain_started() -> None:
+    """Reads which worker process started each job. Must be called while
+    holding ``_lock``."""
+    if _started is None:
+        return
+    while True:
+        try:
+            job_id, pid = _started.get_nowait()
+        except (queue.Empty, OSError, ValueError):
+            return
+        _running[job_id] = pid
+
+
+def _run(job_id: int,
+         strategy: Callable,
+         a: np.ndarray,
+         v_: np.ndarray) -> _Result:
+    """Runs a strategy in a worker process, after reporting the process that
+    runs it."""
+    if _worker_started is not None:
+        _worker_started.put((job_id, os.getpid()))
+    return strategy(a, v_)
+
+
+def _init_worker(threads: int,
+                 started: multiprocessing.Queue,
+                 settings: Dict[str, Any]) -> None:
+    """Initializes the worker processes of the pool.
+
+    Args:
+        threads:
+            See :py:func:`~app.utils.threads.apply_thread_budget`.
+        started:
+            The queue to which the worker reports the jobs it starts.
+        settings:
+            The :py:mod:`~app.environment_settings` of the process that
+            created the pool, see :py:func:`_get_settings`. The worker
+            starts its matlab engine in the background if their
+            :py:const:`~app.environment_settings.MGO_ENGINE` is ``"matlab"``.
+    """
+    global _worker_started
+    _worker_started = started
+    for name, value in settings.items():
+        setattr(es, name, value)
+    apply_thread_budget(threads)
+    if es.MGO_ENGINE == "matlab":
+        MatlabEngineContainer.warm_up()
+
+
+def _get_settings() -> Dict[str, Any]:
+    """Copies the :py:mod:`~app.environment_settings` constants, which
+    worker processes do not inherit since they are not forked."""
+    return {k: v for k, v in vars(es).items() if k.isupper()}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Lazily creates the calling process' pool of solver workers.
+
+    Must be called while holding ``_lock``, after
+    :py:func:`_forget_parent`.
+
+    Returns:
+        A :py:class:`~py:concurrent.futures.ProcessPoolExecutor` with at most
+        :py:const:`~app.environment_settings.SOLVER_WORKERS` processes.
+    """
+    global _executor, _executor_pid, _started
+    if _executor is None:
+        _running.clear()
+        context = multiprocessing.get_context(_START_METHOD)
+        if _START_METHOD == "forkserver":
+            context.set_forkserver_preload([__name__])
+        _started = context.Queue()
+        _executor = ProcessPoolExecutor(
+            max_workers=es.SOLVER_WORKERS, mp_context=context,
+            initializer=_init_worker,
+            initargs=(get_thread_budget(es.SOLVER_WORKERS), _started,
+                      _get_settings()))
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _forget_parent() -> None:
+    """Discards the pool and the jobs inherited from a parent process. Must
+    be called while holding ``_lock``."""
+    global _executor, _executor_pid, _started
+    if _executor_pid is not None and _executor_pid != os.getpid():
+        _in_flight.clear()
+        _abandoned.clear()
+        _running.clear()
+        _executor, _executor_pid, _started = None, None, None
+
+
+def _reset_executor() -> None:
+    """Discards a broken pool, e.g., one whose worker was killed by the
+    operating system for using too much memory or by :py:func:`expire`.
+    Must be called while holding ``_lock``."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
@@ -0,0 +1,294 @@
+"""Module with the registry of solver backends used to solve the optimization
+problems of :py:mod:`app.domain.helpers.matrices`.
+
+Backends are cvxpy solvers or custom solve methods added with
+:py:func:`register_backend`. Their availability, including a valid MOSEK
+license, is probed once per process. Each problem is solved by the backend
+that was fastest, for the same kind of problem and a similar number of
+variables, in the timings stored at
+:py:const:`~app.environment_settings.SOLVER_TIMINGS_PATH`. Timings are
+recorded with :py:func:`record_timings`, e.g., by running::
+
+    $ python mixing_rate_sampler.py --solvers -n 8,16,32,64
+
+Kinds of problems without timings are solved by the first available backend
+in registration order. If a backend fails, the next one is tried.
+Tolerance and iteration caps are set with
+:py:func:`~app.environment_settings.set_solver_limits`.
+"""
+from __future__ import annotations
+
+import os
+import json
+import math
+import threading
+
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+import cvxpy as cvx
+from mosek import MosekException
+
+import environment_settings as es
+
+_Options = Callable[[Optional[float], Optional[int]], Dict[str, Any]]
+
+PROBLEM_CONES: Dict[str, str] = {"sdp": "SDP", "go": "SDP"}
+"""The hardest cone of each kind of problem created by
+:py:func:`~app.domain.helpers.matrices.new_optimization_problem`. Backends
+that do not support it are never used for that kind."""
+
+
+class SolverBackend:
+    """Describes a solver backend.
+
+    Attributes:
+        name (str):
+            The name of a cvxpy solver, e.g., ``cvx.SCS``, or of a custom
+            solve method.
+        cones (FrozenSet[str]):
+            The cones the backend supports, e.g., ``LP``, ``SOCP``, ``SDP``.
+        options (Callable[[Optional[float], Optional[int]], Dict[str, Any]]):
+            Maps a tolerance and an iteration cap, either may be ``None``,
+            to the keyword arguments the backend expects.
+        method (Optional[Callable]):
+            A custom solve method, with the signature expected by
+            ``cvx.Problem.register_solve``, or ``None`` if the backend is a
+            cvxpy solver.
+    """
+
+    def __init__(self,
+                 name: str,
+                 cones: FrozenSet[str],
+                 options: _Options,
+                 method: Optional[Callable] = None) -> None:
+        self.name: str = name
+        self.cones: FrozenSet[str] = cones
+        self.options: _Options = options
+        self.method: Optional[Callable] = method
+
+
+_BACKENDS: Dict[str, SolverBackend] = {}
+_available: Optional[List[str]] = None
+_timings: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None
+_lock = threading.RLock()
+
+
+def register_backend(backend: SolverBackend) -> None:
+    """Adds a backend to the registry, or replaces one with the same name.
+
+    Custom solve methods are registered in cvxpy. The availability of all
+    backends is probed again on next use.
+
+    Args:
+        backend:
+            The backend to be added.
+    """
+    global _available
+    with _lock:
+        if backend.method is not None:
+            cvx.Problem.register_solve(backend.name, backend.method)
+        _BACKENDS[backend.name] = backend
+        _available = None
+
+
+def available_backends() -> List[str]:
+    """Lists the backends that can be used in this process.
+
+    Returns:
+        The names of the available backends, in registration order.
+    """
+    global _available
+    with _lock:
+        if _available is None:
+            installed = set(cvx.installed_solvers())
+            _available = [
+                name for name, backend in _BACKENDS.items()
+                if backend.method is not None or
+                (name in installed and _is_licensed(name))
+            ]
+        return _available
+
+
+def select_backends(kind: str, problem: cvx.Problem) -> List[str]:
+    """Ranks the available backends that can solve a problem.
+
+    Backends with timings for ``kind`` are ranked by the time they took on
+    the recorded number of variables closest to the one of ``problem``,
+    followed by backends without timings in registration order.
+
+    Args:
+        kind:
+            A key of :py:const:`PROBLEM_CONES`.
+        problem:
+            The problem to be solved.
+
+    Returns:
+        The names of the backends, fastest first.
+    """
+    cone = PROBLEM_CONES[kind]
+    candidates = [
+        name for name in available_backends() if cone in _BACKENDS[name].cones
+    ]
+    size = _problem_size(problem)
+    timings = get_timings().get(kind, {})
+    estimates = {
+        name: _estimate_time(timings[name], size)
+        for name in candidates if timings.get(name)
+    }
+    timed = sorted(estimates, key=estimates.get)
+    return timed + [name for name in candidates if name not in estimates]
+
+
+def solve(problem: cvx.Problem, kind: str, backend: Optional[str] = None) -> str:
+    """Solves a problem with the fastest suitable backend.
+
+    See :py:func:`select_backends`. Warm starts are requested from cvxpy
+    solvers, which reuse the previous solution of parameterized problems.
+
+    Args:
+        problem:
+            The problem to be solved.
+        kind:
+            A key of :py:const:`PROBLEM_CONES`.
+        backend:
+            The name of the backend to use instead of the selected ones.
+
+    Returns:
+        The name of the backend that solved ``problem``.
+
+    Raises:
+        SolverError:
+            If no backend could solve ``problem``.
+    """
+    names = [backend] if backend else select_backends(kind, problem)
+    for name in names:
+        b = _BACKENDS[name]
+        options = b.options(es.SOLVER_TOLERANCE, es.SOLVER_MAX_ITERS)
+        try:
+            if b.method is not None:
+                problem.solve(method=name, **options)
+            else:
+                problem.solve(solver=name, warm_start=True, **options)
+            return name
+        except (cvx.SolverError, MosekException) as e:
+            print(f"Solver backend {name} failed: {e}")
+    raise cvx.SolverError(f"No solver backend solved the {kind} problem.")
+
+
+def get_timings() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Reads the stored timings once per process.
+
+    Returns:
+        A dictionary mapping each kind of problem to a dictionary mapping
+        backend names to a dictionary mapping numbers of variables, as
+        strings, to the median seconds the backend took to solve problems
+        of that kind and size.
+    """
+    global _timings
+    with _lock:
+        if _timings is None:
+            _timings = {}
+            path = es.SOLVER_TIMINGS_PATH
+            if path is not None and os.path.exists(path):
+                with open(path) as file:
+                    _timings = json.load(file)
+        return _timings
+
+
+def record_timings(kind: str,
+                   backend: str,
+                   problem: cvx.Problem,
+                   seconds: float) -> None:
+    """Stores how long a backend took to solve a kind of problem.
+
+    The stored time of the same kind, backend and number of variables is
+    replaced. Failed solves should be recorded with infinite ``seconds``.
+
+    Args:
+        kind:
+            A key of :py:const:`PROBLEM_CONES`.
+        backend:
+            The name of the backend.
+        problem:
+            A problem of the measured size.
+        seconds:
+            The time it took to solve ``problem``.
+    """
+    with _lock:
+        timings = get_timings()
+        by_size = timings.setdefault(kind, {}).setdefault(backend, {})
+        by_size[str(_problem_size(problem))] = seconds
+
+        path = es.SOLVER_TIMINGS_PATH
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", 'w') as file:
+            json.dump(timings, file, indent=4)
+        os.replace(f"{path}.tmp", path)
+
+
+def _is_licensed(name: str) -> bool:
+    """Checks if an installed solver can be used, i.e., if MOSEK has a
+    valid license.
+
+    Args:
+        name:
+            The name of an installed cvxpy solver.
+
+    Returns:
+        ``False`` if the solver failed to solve a trivial problem, otherwise
+        ``True``.
+    """
+    if name != cvx.MOSEK:
+        return True
+    x = cvx.Variable()
+    try:
+        cvx.Problem(cvx.Minimize(x), [x >= 1]).solve(solver=name)
+        return True
+    except (cvx.SolverError, MosekException):
+        print("MOSEK is installed but could not solve, is it licensed?")
+        return False
+
+
+def _problem_size(problem: cvx.Problem) -> int:
+    """Measures a problem by its number of scalar variables."""
+    return problem.size_metrics.num_scalar_variables
+
+
+def _estimate_time(by_size: Dict[str, float], size: int) -> float:
+    """Estimates how long a backend takes to solve a problem of ``size``
+    scalar variables from the recorded size closest in logarithmic scale.
+    Ties are broken in favour of the largest recorded size."""
+    closest = min(by_size, key=lambda s: (
+        abs(math.log2(int(s)) - math.log2(max(size, 1))), -int(s)))
+    return by_size[closest]
+
+
+def _drop_none(**options: Any) -> Dict[str, Any]:
+    """Filters out the options that were not set."""
+    return {k: v for k, v in options.items() if v is not None}
+
+
+# region Default backends
+# Registration order is the preference order of kinds without timings.
+register_backend(SolverBackend(
+    cvx.MOSEK, frozenset({"LP", "QP", "SOCP", "SDP", "EXP"}),
+    lambda tol, iters: _drop_none(mosek_params=_drop_none(
+        MSK_DPAR_INTPNT_CO_TOL_REL_GAP=tol,
+        MSK_IPAR_INTPNT_MAX_ITERATIONS=iters) or None)))
+register_backend(SolverBackend(
+    cvx.SCS, frozenset({"LP", "QP", "SOCP", "SDP", "EXP"}),
+    lambda tol, iters: _drop_none(eps=tol, max_iters=iters)))
+register_backend(SolverBackend(
+    cvx.CVXOPT, frozenset({"LP", "QP", "SOCP", "SDP"}),
+    lambda tol, iters: _drop_none(
+        abstol=tol, reltol=tol, feastol=tol, max_iters=iters)))
+register_backend(SolverBackend(
+    cvx.ECOS, frozenset({"LP", "QP", "SOCP", "EXP"}),
+    lambda tol, iters: _drop_none(
+        abstol=tol, reltol=tol, feastol=tol, max_iters=iters)))
+register_backend(SolverBackend(
+    cvx.OSQP, frozenset({"LP", "QP"}),
+    lambda tol, iters: _drop_none(eps_abs=tol, eps_rel=tol, max_iter=iters)))
+# endregion
@@ -9,7 +9,7 @@ import os
 import json
 import math
 import datetime
-from typing import Union, Dict, Any, Optional, List
+from typing import Union, Dict, Any, Optional, List, Tuple
 
 import type_hints as th
 import numpy as np
@@ -219,9 +219,10 @@ class Master:
             terminated_clusters: List[str] = []
             for cluster in self.cluster_groups.values():
                 cluster.execute_epoch(self.epoch)
+                self._write_epoch_logs(cluster)
                 if not cluster.running:
                     terminated_clusters.append(cluster.id)
-                    cluster.file.jwrite(cluster, self.origin, self.epoch)
+                    self._write_cluster_logs(cluster)
             for cid in terminated_clusters:
                 print(f"Cluster: {cid} terminated at epoch {self.epoch}")
                 self.cluster_groups.pop(cid)
@@ -273,8 +274,31 @@ class Master:
     # endregion
 
     # region Helpers
+    def _write_epoch_logs(self, cluster: th.ClusterType) -> None:
+        """Streams the logs of the current epoch of a :py:class:`cluster group
+        <app.domain.cluster_groups.Cluster>` to its output file. See
+        :py:meth:`~app.domain.helpers.smart_dataclasses.FileData.ewrite`.
+
+        Args:
+            cluster (:py:class:`~app.type_hints.ClusterType`):
+                The :py:class:`~app.domain.cluster_groups.Cluster` that
+                executed the current epoch.
+        """
+        cluster.file.ewrite(cluster, self.origin, self.epoch)
+
+    def _write_cluster_logs(self, cluster: th.ClusterType) -> None:
+        """Writes the logs of a terminated :py:class:`cluster group
+        <app.domain.cluster_groups.Cluster>` to its output file.
+
+        Args:
+            cluster (:py:class:`~app.type_hints.ClusterType`):
+                The :py:class:`~app.domain.cluster_groups.Cluster` that
+                stopped running at the current epoch.
+        """
+        cluster.file.jwrite(cluster, self.origin, self.epoch)
+
     def _new_cluster_group(
-            self, cluster_class: str, size: int, fname: str
+            self, cluster_class: str, size: int, fname: Union[str, List[str]]
     ) -> th.ClusterType:
         """Helper method that initializes a new Cluster group.
 
@@ -287,7 +311,9 @@ class Master:
                 The :py:class:`cluster's <app.domain.cluster_groups.Cluster>`
                 initial memberhip size.
             fname:
-                The name of the fille being stored in the cluster.
+                The name of the fille being stored in the cluster or, for
+                :py:class:`~app.domain.cluster_groups.SGClusterMulti`, the
+                names of the files.
 
         Returns:
             :py:class:`~app.type_hints.ClusterType`:
@@ -353,6 +379,109 @@ class SGMaster(Master):
     # endregion
 
 
+class SGMasterMulti(SGMaster):
+    """Simulation manager class of
+    :py:class:`~app.domain.cluster_groups.SGClusterMulti` cluster groups.
+
+    Files in the simulation file that have the same ``cluster_size`` are
+    persisted by the same cluster group, thus they share its members and
+    transition matrix.
+    """
+
+    # region Simulation setup
+    def _process_simfile(
+            self, path: str, cluster_class: str, node_class: str) -> None:
+        """Opens and processes the simulation filed referenced in `path`.
+
+        Overrides:
+            :py:meth:`app.domain.master_servers.Master._process_simfile`.
+
+            One cluster group is created for each distinct ``cluster_size``
+            instead of one for each file.
+
+        Args:
+            path:
+                The path to the simulation file. Including extension and
+                parent folders.
+            cluster_class:
+                The name of the class used to instantiate cluster group
+                instances through reflection.
+                See :py:mod:`app.domain.cluster_groups`.
+            node_class:
+                The name of the class used to instantiate network node
+                instances through reflection.
+                See :py:mod:`app.domain.network_nodes`.
+        """
+        with open(path) as input_file:
+            simfile_json: Any = json.load(input_file)
+
+            self._create_network_nodes(simfile_json, node_class)
+
+            d: _PersistentingDict = simfile_json['persisting']
+            groups: Dict[int, List[str]] = {}
+            for fname in d:
+                groups.setdefault(d[fname]['cluster_size'], []).append(fname)
+
+            spreads: List[Tuple[th.ClusterType, str, th.ReplicasDict]] = []
+            for size, fnames in groups.items():
+                cluster = self._new_cluster_group(cluster_class, size, fnames)
+                for fname in fnames:
+                    cluster.select_file(fname)
+                    filesize = os.path.getsize(
+                        os.path.join(es.SHARED_ROOT, fname))
+                    es.set_blocks_size(math.floor(filesize / es.BLOCKS_COUNT))
+                    file_blocks = self._split_files(
+                        fname, cluster, es.BLOCKS_SIZE)
+                    spreads.append((cluster, fname, file_blocks))
+
+            # Distribute files before starting simulation
+            for cluster, fname, file_blocks in spreads:
+                cluster.select_file(fname)
+                cluster.spread_files(file_blocks, d[fname]['spread'])
+    # endregion
+
+    # region Helpers
+    def _write_cluster_logs(self, cluster: th.ClusterType) -> None:
+        """Writes the logs of every file of a terminated
+        :py:class:`~app.domain.cluster_groups.SGClusterMulti` to its output
+        file.
+
+        Overrides:
+            :py:meth:`app.domain.master_servers.Master._write_cluster_logs`.
+
+            Logs of files that failed before the cluster group terminated
+            are truncated at the epoch they failed.
+
+        Args:
+            cluster (:py:class:`~app.type_hints.ClusterType`):
+                The :py:class:`~app.domain.cluster_groups.SGClusterMulti`
+                that stopped running at the current epoch.
+        """
+        for file in cluster.files.values():
+            epoch = min(file.logger.terminated, self.epoch)
+            file.jwrite(cluster, self.origin, epoch)
+
+    def _write_epoch_logs(self, cluster: th.ClusterType) -> None:
+        """Streams the logs of the current epoch of every file of a
+        :py:class:`~app.domain.cluster_groups.SGClusterMulti` to its output
+        file.
+
+        Overrides:
+            :py:meth:`app.domain.master_servers.Master._write_epoch_logs`.
+
+            Files that failed at an earlier epoch are not logged.
+
+        Args:
+            cluster (:py:class:`~app.type_hints.ClusterType`):
+                The :py:class:`~app.domain.cluster_groups.SGClusterMulti`
+                that executed the current epoch.
+        """
+        for file in cluster.files.values():
+            if self.epoch <= file.logger.terminated:
+                file.ewrite(cluster, self.origin, self.epoch)
+    # endregion
+
+
 class HDFSMaster(Master):
     # region Simulation setup
     def _process_simfile(
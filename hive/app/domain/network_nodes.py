@@ -14,10 +14,10 @@ import domain.helpers.smart_dataclasses as sd
 import domain.helpers.enums as e
 import domain.master_servers as ms
 import type_hints as th
-import pandas as pd
 import numpy as np
 import environment_settings as es
 
+from scipy import sparse
 from utils import crypto
 
 _NetworkView: Dict[Union[str, Node], int]
@@ -326,14 +326,18 @@ class SGNode(Node):
             A collection of :py:class:`cluster groups
             <app.domain.cluster_groups.SGCluster>` the ``SGNode`` is a
             member of.
-        routing_table (Dict[str, :py:class:`~pd:pandas.DataFrame`]):
+        routing_table (Dict[str, :py:class:`~app.type_hints.RoutingEntry`]):
             Contains the information required to appropriately route file
-            block blocks to other SGNode instances.
+            block blocks to other SGNode instances. Each entry references
+            the sparse transition matrix of the cluster, the identifiers of
+            its states and the position of the ``SGNode`` column, whose
+            non-zero entries are the neighbours of the ``SGNode`` in the
+            cluster's topology.
     """
     def __init__(self, uid: str, uptime: float) -> None:
         super().__init__(uid, uptime)
         self.clusters: Dict[str, th.ClusterType] = {}
-        self.routing_table: Dict[str, pd.DataFrame] = {}
+        self.routing_table: Dict[str, th.RoutingEntry] = {}
 
     # region Simulation steps
     def execute_epoch(self, cluster: th.ClusterType, fid: str) -> None:
@@ -425,36 +429,42 @@ class SGNode(Node):
 
     # region Routing table management
     # noinspection PyIncorrectDocstring
-    def set_file_routing(
-            self, fid: str, v_: Union[pd.Series, pd.DataFrame]
-    ) -> None:
-        """Maps a file name identifier with a transition column vector used
-        for file block replica routing.
+    def set_file_routing(self,
+                         fid: str,
+                         m: sparse.csc_matrix,
+                         labels: np.ndarray,
+                         column: int) -> None:
+        """Maps a file name identifier with a column of a transition matrix
+        used for file block replica routing.
+
+        The matrix is shared with the other members of the cluster and
+        is not copied.
 
         Args:
             fid:
                 The :py:attr:`file name identifier
                 <app.domain.helpers.smart_dataclasses.FileData.name>`
                 of the file whose routing is being configured.
-            `v_` (Union[:py:class:`~pd:pandas.Series`, :py:class:`~pd:pandas.DataFrame`]):
-                A column vector with probabilities that dictate the odds of
-                sending file block blocks belonging to the file with
-                specified id to other Cluster members also working on the
-                persistence of the file block blocks.
+            m (:py:class:`~scipy:scipy.sparse.csc_matrix`):
+                A column major transition matrix whose columns have the
+                odds of sending file block blocks belonging to the file
+                with specified id to other Cluster members also working on
+                the persistence of the file block blocks.
+            labels:
+                The :py:attr:`identifiers <app.domain.network_nodes.Node.id>`
+                of the Cluster members at each row of ``m``.
+            column:
+                The position of the ``SGNode`` column in ``m``.
 
         Raises:
             ValueError:
-                If ``transition_vector`` is not a
-                :py:class:`~pd:pandas.DataFrame` and cannot be casted to it.
-
-    """
-        if isinstance(v_, pd.Series):
-            self.routing_table[fid] = v_.to_frame()
-        elif isinstance(v_, pd.DataFrame):
-            self.routing_table[fid] = v_
-        else:
-            raise ValueError("set_file_routing method expects a pandas.Series ",
-                             "or pandas.DataFrame as transition vector type.")
+                If ``labels`` does not have one identifier per row of ``m``
+                or if ``column`` is not a column of ``m``.
+        """
+        if len(labels) != m.shape[0] or not 0 <= column < m.shape[1]:
+            raise ValueError("set_file_routing method expects one label per "
+                             "matrix row and a valid column position.")
+        self.routing_table[fid] = (m, labels, column)
 
     def remove_file_routing(self, fid: str) -> None:
         """Removes a file name from the ``SGNode`` routing table.
@@ -471,7 +481,7 @@ class SGNode(Node):
                 <app.domain.helpers.smart_dataclasses.FileData.name>`
                 of the file whose routing is being eliminated.
         """
-        self.routing_table.pop(fid, pd.DataFrame())
+        self.routing_table.pop(fid, None)
         self.files.pop(fid, {})
     # endregion
 
@@ -490,13 +500,16 @@ class SGNode(Node):
         Returns:
             The name or address of the selected destination.
         """
-        routing_vector: pd.DataFrame = self.routing_table[fid]
-        hive_members = list(routing_vector.index)
-        member_chances = list(routing_vector.iloc[:, 0])
+        m, labels, column = self.routing_table[fid]
+        start, end = m.indptr[column], m.indptr[column + 1]
+        hive_members = m.indices[start:end]
+        member_chances = m.data[start:end]
         try:
-            return np.random.choice(a=hive_members, p=member_chances).item()
+            return labels[
+                hive_members[np.random.choice(a=end - start, p=member_chances)]]
         except ValueError as vE:
-            print(f"{routing_vector}\nStochastic?: {np.sum(member_chances)}")
+            print(f"{dict(zip(labels[hive_members], member_chances))}\n"
+                  f"Stochastic?: {np.sum(member_chances)}")
             sys.exit("".join(
                 traceback.format_exception(
                     etype=type(vE), value=vE, tb=vE.__traceback__)))
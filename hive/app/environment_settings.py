@@ -31,13 +31,224 @@ Note:
     :py:const:`~app.environment_settings.SIMULATION_ROOT`.
 """
 import os
-from typing import List
+from typing import List, Optional
 
 from utils.convertions import truncate_float_value
 import numpy
 
 OPTIMIZE: bool = True
 
+TOPOLOGY_RACE_DEADLINE: Optional[float] = None
+"""Wall-clock budget, in seconds, given to the optimized transition matrix
+strategies when
+:py:meth:`~app.domain.cluster_groups.SGCluster.select_fastest_topology` runs
+them concurrently. If ``None`` the simulation waits for all of them to finish. 
+Metropolis-Hastings always runs to completion and is used as the fallback 
+matrix."""
+
+
+def set_topology_race_deadline(seconds: Optional[float]) -> None:
+    """Changes :py:const:`TOPOLOGY_RACE_DEADLINE` constant value at run time."""
+    global TOPOLOGY_RACE_DEADLINE
+    TOPOLOGY_RACE_DEADLINE = None if seconds is None else max(0.0, seconds)
+
+
+SOLVER_WORKERS: Optional[int] = None
+"""Maximum number of worker processes of the :py:mod:`solver service 
+<app.domain.helpers.solver_service>`, i.e., of optimized transition matrices 
+created at the same time by all simulations of the process. If ``None`` it 
+defaults to the number of processors on the machine."""
+
+
+def set_solver_workers(n: Optional[int]) -> None:
+    """Changes :py:const:`SOLVER_WORKERS` constant value at run time. Only 
+    takes effect before the solver service starts its workers."""
+    global SOLVER_WORKERS
+    SOLVER_WORKERS = None if n is None else max(1, n)
+
+
+SOLVER_JOB_TIMEOUT: Optional[float] = None
+"""Maximum number of seconds each request of the :py:mod:`solver service 
+<app.domain.helpers.solver_service>` may take, counted from its submission. 
+Requests that take longer are stopped and their worker processes killed, even 
+when :py:const:`TOPOLOGY_RACE_DEADLINE` is ``None``. If ``None`` requests are 
+only limited by the deadline of their callers."""
+
+
+def set_solver_job_timeout(seconds: Optional[float]) -> None:
+    """Changes :py:const:`SOLVER_JOB_TIMEOUT` constant value at run time."""
+    global SOLVER_JOB_TIMEOUT
+    SOLVER_JOB_TIMEOUT = None if seconds is None else max(0.0, seconds)
+
+
+THREADS_PER_WORKER: Optional[int] = None
+"""Maximum number of threads used by the native libraries, e.g., MKL, 
+OpenBLAS or OpenMP, of each parallel simulation or worker process. If 
+``None`` the processors are shared equally by the workers. See 
+:py:mod:`app.utils.threads`."""
+
+
+def set_threads_per_worker(n: Optional[int]) -> None:
+    """Changes :py:const:`THREADS_PER_WORKER` constant value at run time."""
+    global THREADS_PER_WORKER
+    THREADS_PER_WORKER = None if n is None else max(1, n)
+
+
+MATRIX_STORE_MAX_BYTES: int = 512 * 1024 * 1024
+"""Maximum size, in bytes, of the transition matrices kept by the 
+:py:mod:`persistent matrix store <app.domain.helpers.matrix_store>`. Least 
+recently used matrices are evicted when the store grows beyond it."""
+
+
+def set_matrix_store(
+        path: Optional[str], max_bytes: Optional[int] = None) -> None:
+    """Changes :py:const:`MATRIX_STORE_PATH` and, optionally, 
+    :py:const:`MATRIX_STORE_MAX_BYTES` constant values at run time. A ``None`` 
+    path disables the store."""
+    global MATRIX_STORE_PATH
+    global MATRIX_STORE_MAX_BYTES
+    MATRIX_STORE_PATH = path
+    if max_bytes is not None:
+        MATRIX_STORE_MAX_BYTES = max(0, max_bytes)
+
+
+CANDIDATE_TOPOLOGIES: int = 6
+"""Number of random adjacency matrices generated whenever a 
+:py:class:`~app.domain.cluster_groups.SGCluster` creates a new transition 
+matrix. Their metropolis-hastings matrices are built and validated as a batch 
+and only the fastest valid topology is handed to the optimization strategies."""
+
+
+def set_candidate_topologies(k: int) -> None:
+    """Changes :py:const:`CANDIDATE_TOPOLOGIES` constant value at run time."""
+    global CANDIDATE_TOPOLOGIES
+    CANDIDATE_TOPOLOGIES = max(1, k)
+
+
+REPAIR_DRIFT: float = 0.1
+"""Fraction of the original size of a 
+:py:class:`~app.domain.cluster_groups.SGCluster` that can leave or join the 
+cluster, while its transition matrix is incrementally repaired, before a new 
+transition matrix is created from scratch. Repaired matrices keep the desired 
+distribution but are not optimized, hence they mix slower than new ones. Zero 
+disables incremental repairs. See :py:meth:`~app.domain.cluster_groups.SGCluster.repair_and_bcast_transition_matrix`."""
+
+REPAIR_EPOCHS: Optional[int] = None
+"""Maximum number of epochs a transition matrix can be incrementally repaired 
+after it was created from scratch. If ``None`` only :py:const:`REPAIR_DRIFT` 
+is considered."""
+
+
+def set_repair_limits(drift: float, epochs: Optional[int] = None) -> None:
+    """Changes :py:const:`REPAIR_DRIFT` and :py:const:`REPAIR_EPOCHS` constant 
+    values at run time."""
+    global REPAIR_DRIFT
+    global REPAIR_EPOCHS
+    REPAIR_DRIFT = max(0.0, drift)
+    REPAIR_EPOCHS = epochs
+
+
+SOLVER_TOLERANCE: Optional[float] = None
+"""Tolerance requested from the :py:mod:`solver backends 
+<app.domain.helpers.solvers>` of the optimized transition matrix strategies. 
+If ``None`` each backend uses its own default."""
+
+SOLVER_MAX_ITERS: Optional[int] = None
+"""Maximum number of iterations the :py:mod:`solver backends 
+<app.domain.helpers.solvers>` can take. If ``None`` each backend uses its own 
+default."""
+
+
+def set_solver_limits(
+        tolerance: Optional[float], max_iters: Optional[int] = None) -> None:
+    """Changes :py:const:`SOLVER_TOLERANCE` and :py:const:`SOLVER_MAX_ITERS` 
+    constant values at run time."""
+    global SOLVER_TOLERANCE
+    global SOLVER_MAX_ITERS
+    SOLVER_TOLERANCE = tolerance
+    SOLVER_MAX_ITERS = max_iters
+
+
+SPARSE_FORMULATION_DENSITY: float = 0.0
+"""Adjacency matrices whose fraction of non-zero entries is at most this value 
+are optimized with edge-sparse problem formulations, whose variables only 
+exist on the edges of the topology, instead of the dense problem templates of 
+:py:mod:`app.domain.helpers.matrices`.
+
+Edge-sparse problems use less memory, but their first solve is slower than 
+the dense templates', e.g., about 4 times slower for the SDP and 1.4 times 
+slower for the GO problem of a 4-regular topology with 64 states, with SCS. 
+Only solving the same topology again, which reuses the cached problem, is 
+faster, thus they are disabled by default."""
+
+
+def set_sparse_formulation_density(density: float) -> None:
+    """Changes :py:const:`SPARSE_FORMULATION_DENSITY` constant value at run 
+    time."""
+    global SPARSE_FORMULATION_DENSITY
+    SPARSE_FORMULATION_DENSITY = max(0.0, density)
+
+
+MGO_ENGINE: str = "python"
+"""The engine used by 
+:py:func:`~app.domain.helpers.matrices.new_mgo_transition_matrix`, either 
+``"python"``, a multi-start local optimization, or ``"matlab"``, which 
+requires a licensed 
+:py:class:`~app.domain.helpers.matlab_utils.MatlabEngineContainer`."""
+
+MGO_STARTS: int = 2
+"""Number of starting points of the ``"python"`` :py:const:`MGO_ENGINE`. The 
+starts run one after the other in the solver worker that creates the matrix, 
+thus more starts find better matrices at the cost of proportionally more 
+solve time."""
+
+
+def set_mgo_engine(engine: str, starts: Optional[int] = None) -> None:
+    """Changes :py:const:`MGO_ENGINE` and, if given, :py:const:`MGO_STARTS` 
+    constant values at run time."""
+    global MGO_ENGINE
+    global MGO_STARTS
+    MGO_ENGINE = engine
+    if starts is not None:
+        MGO_STARTS = starts
+
+
+OUTFILE_FORMAT: str = "json"
+"""Format of the simulation output files. With ``"json"`` all logs of a file 
+are written, as one JSON object, when its cluster terminates. With 
+``"ndjson"`` a header line is followed by one line per epoch, streamed while 
+the simulation runs, and a summary line. With ``"npz"``, ``"arrow"`` or 
+``"parquet"`` the logs of each file are written as typed columns to their own 
+output file, see :py:mod:`~app.domain.helpers.outfiles`. See 
+:py:class:`~app.domain.helpers.smart_dataclasses.FileData`."""
+
+OUTFILE_BUFFER_EPOCHS: int = 64
+"""Number of epochs whose ``"ndjson"`` lines are buffered before they are 
+written to the output file."""
+
+
+OUTFILE_MAX_OPEN: int = 64
+"""Maximum number of output files kept open at once. Output files are opened 
+at their first write and the least recently written one is closed when the 
+limit is reached, see :py:func:`~app.domain.helpers.outfiles.append_text`."""
+
+
+def set_outfile_format(fmt: str,
+                       buffer_epochs: Optional[int] = None,
+                       max_open: Optional[int] = None) -> None:
+    """Changes :py:const:`OUTFILE_FORMAT` and, optionally, 
+    :py:const:`OUTFILE_BUFFER_EPOCHS` and :py:const:`OUTFILE_MAX_OPEN` 
+    constant values at run time."""
+    global OUTFILE_FORMAT
+    global OUTFILE_BUFFER_EPOCHS
+    global OUTFILE_MAX_OPEN
+    OUTFILE_FORMAT = fmt
+    if buffer_epochs is not None:
+        OUTFILE_BUFFER_EPOCHS = max(1, buffer_epochs)
+    if max_open is not None:
+        OUTFILE_MAX_OPEN = max(1, max_open)
+
+
 DEBUG: bool = False
 """Indicates if some debug related actions or prints to the terminal should 
 be performed."""
@@ -202,8 +413,32 @@ OUTFILE_ROOT: str = os.path.join(os.getcwd(), 'static', 'outfiles')
 RESOURCES_ROOT: str = os.path.join(os.getcwd(), 'static', 'resources')
 """Path to the folder where miscellaneous files are located."""
 
+SCENARIOS_ROOT: str = os.path.join(RESOURCES_ROOT, 'scenarios')
+"""Path to the folder where the topology and steady state scenarios used by 
+:py:class:`~app.domain.cluster_groups.SGClusterPerfect` are located. See 
+:py:mod:`app.domain.helpers.scenarios`."""
+
+MATRIX_STORE_PATH: Optional[str] = None
+"""Path to the SQLite database of the :py:mod:`persistent matrix store 
+<app.domain.helpers.matrix_store>`, shared by all simulation processes, e.g., 
+:py:const:`DEFAULT_MATRIX_STORE_PATH`. If ``None``, the default, transition 
+matrices are always created from scratch."""
+
+DEFAULT_MATRIX_STORE_PATH: str = os.path.join(RESOURCES_ROOT, 'matrices.sqlite3')
+"""Path of the :py:mod:`persistent matrix store 
+<app.domain.helpers.matrix_store>` when it is enabled without choosing one."""
+
+SOLVER_TIMINGS_PATH: Optional[str] = os.path.join(RESOURCES_ROOT, 'solver_timings.json')
+"""Path to the timings used to select the fastest :py:mod:`solver backend 
+<app.domain.helpers.solvers>` of each problem. If ``None`` timings are not 
+stored and backends are used in registration order."""
+
 MIXING_RATE_SAMPLE_ROOT: str = os.path.join(OUTFILE_ROOT, 'mixing_rate_samples')
 
+OUTFILE_SUMMARY_ROOT: str = os.path.join(OUTFILE_ROOT, 'summaries')
+"""Path to the folder where the summaries of the simulation output files, 
+written by :py:mod:`app.outfile_aggregator`, are located."""
+
 MATLAB_DIR: str = os.path.join(os.getcwd(), 'scripts', 'matlab')
 """Path the folder where matlab scripts are located. Used by 
 :py:class:`~app.domain.helpers.matlab_utils.MatlabEngineContainer`"""
@@ -16,6 +16,67 @@ working threads. For example::
 
     $ python hive_simulation.py -d --iterations=1 --threading=2
 
+Swarm guidance clusters normally wait for every transition matrix strategy
+to finish. To race the optimization strategies against each other under a
+wall-clock budget, in seconds, use the -r or --race_deadline flag::
+
+    $ python hive_simulation.py -f a_simulation_name.json --race_deadline=5
+
+When members leave or join a swarm guidance cluster, its transition matrix
+is repaired instead of created from scratch, until the members that left or
+joined exceed a fraction of its original size, set with the --repair_drift
+flag, or the matrix is older than the --repair_epochs flag. Use
+--repair_drift=0 to always create new matrices::
+
+    $ python hive_simulation.py -f a_simulation_name.json --repair_drift=0.25
+
+Transition matrices are created from scratch by every simulation. Use the
+--matrix_store flag to keep them in a database shared by all simulation
+processes, see :py:mod:`app.domain.helpers.matrix_store`, so that
+identical topologies are only optimized once::
+
+    $ python hive_simulation.py -d -t 8 --matrix_store
+
+Optimized transition matrices of all simulations are created by a shared
+pool of worker processes, whose size is set with the --solver_workers flag::
+
+    $ python hive_simulation.py -d -t 8 --solver_workers=4
+
+Matrices that take longer than the --solver_job_timeout flag, in seconds,
+are given up and their worker processes replaced, even without a race
+deadline::
+
+    $ python hive_simulation.py -d -t 8 --solver_job_timeout=120
+
+Parallel simulations share the processors used by native libraries, e.g.,
+MKL, OpenBLAS or OpenMP, equally. Use the --threads_per_worker flag to give
+each simulation and solver worker a fixed number of threads instead::
+
+    $ python hive_simulation.py -d -t 4 --threads_per_worker=2
+
+Solver worker processes, and their matlab engines when the ``"matlab"``
+:py:const:`~app.environment_settings.MGO_ENGINE` is selected with the
+-g or --mgo_engine flag, are started in the background before the
+simulations, when the selected cluster group creates optimized matrices::
+
+    $ python hive_simulation.py -f a_simulation_name.json --mgo_engine=matlab
+
+Output files hold one JSON object per file, written when its cluster
+terminates. To stream one line per epoch instead, so that memory does not
+grow with the number of epochs and interrupted simulations keep their
+results, use the -o or --outfile_format flag::
+
+    $ python hive_simulation.py -f a_simulation_name.json -o ndjson
+
+The logs can also be written as typed columns, one output file per
+simulated file, with ``-o npz`` or, if pyarrow is installed, with
+``-o arrow`` or ``-o parquet``. Output files of every format are read with
+:py:func:`~app.domain.helpers.outfiles.read_outfile`. Output files are
+opened when first written and at most 64 are kept open at once, which can be
+changed with the --max_open_outfiles flag::
+
+    $ python hive_simulation.py -f a_simulation_name.json --max_open_outfiles=16
+
 Warning:
     Python's :py:class:`~py:concurrent.futures.ThreadPoolExecutor`
     conceals/supresses any uncaught exceptions, i.e., simulations may fail to
@@ -40,20 +101,22 @@ Note:
 
 import os
 import sys
-import json
 import getopt
+import importlib
 import traceback
 import concurrent.futures
 
-from warnings import warn
-from typing import Dict, Tuple, List
+from typing import List
 from concurrent.futures.thread import ThreadPoolExecutor
 
 import numpy as np
 import environment_settings as es
+import domain.cluster_groups as cg
+import domain.helpers.solver_service as ss
 
 from utils.convertions import class_name_to_obj
-from domain.helpers.matlab_utils import MatlabEngineContainer
+from utils.threads import apply_thread_budget, get_thread_budget
+from domain.helpers.outfiles import available_formats
 
 
 __err_message__ = ("Invalid arguments. You must specify -f fname or -d, e.g.:\n"
@@ -65,50 +128,6 @@ __log_thread_errors__: bool = True
 fails due to an exception and if the exception traceback should be provided."""
 
 
-# region Sample Scenarios available for debug environments
-def __load_scenarios__():
-    scenarios = {}
-    try:
-        scenarios_path = os.path.join(es.RESOURCES_ROOT, "scenarios.json")
-        scenarios_file = open(scenarios_path, "r")
-        scenarios = json.load(scenarios_file)
-        scenarios_file.close()
-    except OSError:
-        print(f"Could not load scenarios.json from RESOURCES_ROOT.\n"
-              " > if you need sample scenarios please refer to "
-              "sample_scenario_generator.py, otherwise, ignore this message.")
-    return scenarios
-
-
-_scenarios: Dict[str, Dict[str, List]] = __load_scenarios__()
-
-
-def get_next_scenario(k: str) -> Tuple[np.ndarray, np.ndarray]:
-    """Function used for one-to-one testing of different swarm guidance
-    configurations.
-
-    Note:
-        This method should only be used when
-        :py:const:`app.environment_settings.DEBUG` is set to True.
-
-    Args:
-        k:
-            A string identifying the pool of matrix, vector pairs to get the
-            scenario. Usually, a string representation of an integer which
-            corresponds to the network size being tested.
-
-    Returns:
-        A topology matrix and a random equilibrium vector that can be used
-        to generate Markov chains used for Swarm Guidance.
-    """
-    if not es.DEBUG:
-        warn("get_next_scenario should not be called outside debug envs.")
-    topology = np.asarray(_scenarios[k]["matrices"].pop())
-    equilibrium = np.asarray(_scenarios[k]["vectors"].pop())
-    return topology, equilibrium
-# endregion
-
-
 # region Helpers
 def __makedirs__() -> None:
     """Helper method that reates required simulation working directories if
@@ -124,6 +143,26 @@ def __list_dir__() -> List[str]:
     return list(filter(lambda x: "scenarios" not in x, target_dir))
 
 
+def _warm_up_solvers() -> None:
+    """Starts the solver worker processes in the background if the
+    simulations may use them.
+
+    It is called from the main thread, before any simulation thread starts,
+    with the settings given by the execution arguments, which the workers
+    copy, see :py:func:`~app.domain.helpers.solver_service.warm_up`.
+
+    Only :py:class:`~app.domain.cluster_groups.SGCluster` groups create
+    optimized transition matrices and they only do so when
+    :py:const:`~app.environment_settings.OPTIMIZE` is set. The workers start
+    their matlab engines when
+    :py:const:`~app.environment_settings.MGO_ENGINE` is ``"matlab"``, see
+    :py:func:`~app.domain.helpers.solver_service.warm_up`.
+    """
+    cluster_type = getattr(importlib.import_module(es.CLUSTER_GROUPS), cluster_class)
+    if es.OPTIMIZE and issubclass(cluster_type, cg.SGCluster):
+        ss.warm_up()
+
+
 def _validate_simfile(simfile_name: str) -> None:
     """Asserts if simulation can proceed with user specified file.
 
@@ -158,6 +197,9 @@ def _simulate(simfile_name: str, sid: int) -> None:
 def _parallel_main(start: int, stop: int) -> None:
     """Helper method that initializes a multi-threaded simulation.
 
+    The threads of the native libraries are shared by the simulations, see
+    :py:func:`~app.utils.threads.get_thread_budget`.
+
     Args:
         start:
             A number that marks the first desired identifier for the
@@ -168,6 +210,7 @@ def _parallel_main(start: int, stop: int) -> None:
             total number of iterations specified by the user in the scripts'
             arguments.
     """
+    apply_thread_budget(get_thread_budget(threading))
     with ThreadPoolExecutor(max_workers=threading) as executor:
         futures = []
         if directory:
@@ -225,12 +268,17 @@ if __name__ == "__main__":
     cluster_class = "SGClusterExt"
     node_class = "SGNodeExt"
 
-    short_opts = "df:i:S:e:t:m:c:n:"
+    short_opts = "df:i:S:e:t:m:c:n:r:g:o:"
     long_opts = ["directory", "file=",
                  "iterations=", "start_iteration=",
                  "epochs=",
                  "threading=",
-                 "master_server=", "cluster_group=", "network_node="]
+                 "master_server=", "cluster_group=", "network_node=",
+                 "race_deadline=", "mgo_engine=",
+                 "repair_drift=", "repair_epochs=", "matrix_store",
+                 "solver_workers=", "solver_job_timeout=",
+                 "threads_per_worker=",
+                 "outfile_format=", "max_open_outfiles="]
 
     try:
         args, values = getopt.getopt(sys.argv[1:], short_opts, long_opts)
@@ -253,6 +301,34 @@ if __name__ == "__main__":
                 cluster_class = str(val).strip()
             if arg in ("-n", "--network_node"):
                 node_class = str(val).strip()
+            if arg in ("-r", "--race_deadline"):
+                es.set_topology_race_deadline(float(str(val).strip()))
+            if arg in ("-g", "--mgo_engine"):
+                mgo_engine = str(val).strip()
+                if mgo_engine not in {"python", "matlab"}:
+                    raise ValueError(f"{mgo_engine} is not an mgo engine.")
+                es.set_mgo_engine(mgo_engine)
+            if arg == "--repair_drift":
+                es.set_repair_limits(
+                    float(str(val).strip()), es.REPAIR_EPOCHS)
+            if arg == "--repair_epochs":
+                es.set_repair_limits(es.REPAIR_DRIFT, int(str(val).strip()))
+            if arg == "--matrix_store":
+                es.set_matrix_store(es.DEFAULT_MATRIX_STORE_PATH)
+            if arg == "--solver_workers":
+                es.set_solver_workers(int(str(val).strip()))
+            if arg == "--solver_job_timeout":
+                es.set_solver_job_timeout(float(str(val).strip()))
+            if arg == "--threads_per_worker":
+                es.set_threads_per_worker(int(str(val).strip()))
+            if arg in ("-o", "--outfile_format"):
+                outfile_format = str(val).strip()
+                if outfile_format not in available_formats():
+                    raise ValueError(f"{outfile_format} is not available.")
+                es.set_outfile_format(outfile_format)
+            if arg == "--max_open_outfiles":
+                es.set_outfile_format(
+                    es.OUTFILE_FORMAT, max_open=int(str(val).strip()))
     except (getopt.GetoptError, ValueError):
         sys.exit("Execution arguments should have the following data types:\n"
                  "  --directory -d (void)\n"
@@ -264,6 +340,16 @@ if __name__ == "__main__":
                  "  --master_server= -m (str)\n"
                  "  --cluster_group= -c (str)\n"
                  "  --network_node= -n (str)\n"
+                 "  --race_deadline= -r (float)\n"
+                 "  --mgo_engine= -g (str) in {python, matlab}\n"
+                 "  --repair_drift= (float)\n"
+                 "  --repair_epochs= (int)\n"
+                 "  --matrix_store (void)\n"
+                 "  --solver_workers= (int)\n"
+                 "  --solver_job_timeout= (float)\n"
+                 "  --threads_per_worker= (int)\n"
+                 "  --outfile_format= -o (str) in {json, ndjson, npz, arrow, parquet}\n"
+                 "  --max_open_outfiles= (int)\n"
                  "Another cause of error might be a simulation file with "
                  "inconsistent values.")
 
@@ -272,7 +358,7 @@ if __name__ == "__main__":
     elif simfile == "" and not directory:
         sys.exit("File name can not be blank. Unless directory option is True.")
 
-    MatlabEngineContainer.get_instance()
+    _warm_up_solvers()
     threading = np.ceil(np.abs(threading)).item()
 
     s = start_iteration
@@ -12,11 +12,39 @@ matrices like so::
 
     $ python mixing_rate_sampler.py -s 10 -f afunc,anotherfunc,yetanotherfunc
 
+Samples are distributed among worker processes, use the -w or --workers flag
+to limit how many are used. Each sample is written to the output file as
+soon as it is finished, thus an interrupted test can be resumed with the -r
+or --resume flag, which receives the path of the output file::
+
+    $ python mixing_rate_sampler.py -s 1000 -r sample_1.ndjson
+
+To compare what each function costs against the quality of its matrices,
+use the -b or --benchmark flag. The solve time, memory, status and mixing
+rate of every function are recorded on dense and on sparse k-regular
+topologies, whose degree is set with -k or --degree, of sizes 8 up to 512
+unless -n is given. A Pareto summary is written when all samples exist::
+
+    $ python mixing_rate_sampler.py -b -s 10 -n 8,16,32 -k 4
+
+The -S or --solvers flag times every available :py:mod:`solver backend
+<app.domain.helpers.solvers>` on the optimization problems of the same
+topologies and stores the median times, which are then used to pick the
+fastest backend for each kind and size of problem::
+
+    $ python mixing_rate_sampler.py -S -s 5 -n 8,16,32,64
+
 Note:
     Default functions set { "new_mh_transition_matrix",
     "new_sdp_mh_transition_matrix", "new_go_transition_matrix",
-    "new_mgo_transition_matrix" }
+    "new_mgo_transition_matrix", "new_fo_transition_matrix" }
 
+    The output file is a newline delimited JSON file in
+    :py:const:`~app.environment_settings.MIXING_RATE_SAMPLE_ROOT`. Its first
+    line is a header with the module, functions and seed of the test, every
+    other line holds the mixing rates of one sample. When resuming, the
+    module, functions and seed are read from the header. See
+    :py:func:`load_samples`.
 """
 
 from __future__ import annotations
@@ -28,92 +56,565 @@ import json
 import os
 import sys
 import ast
-from typing import List, Any, OrderedDict, Tuple
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Any, OrderedDict, Tuple, Dict, Optional, Callable
 
 import numpy as np
 from cvxpy.error import SolverError, DCPError
+from tabulate import tabulate
 
+import environment_settings as es
 import domain.helpers.matrices as mm
-from domain.helpers.matlab_utils import MatlabEngineContainer
+import domain.helpers.solvers as sv
 from environment_settings import MIXING_RATE_SAMPLE_ROOT
+from utils.threads import apply_thread_budget, get_thread_budget
 
 _SizeResultsDict: OrderedDict[str, List[float]]
 _ResultsDict: OrderedDict[str, _SizeResultsDict]
 
+_MATLAB_FUNCTION = "new_mgo_transition_matrix"
+
+_TOPOLOGIES: Tuple[str, ...] = ("dense", "sparse")
+
+__engine_available__ = True
+_SOLVER_ERRORS: Tuple = (DCPError, SolverError)
+try:
+    from matlab.engine import EngineError
+    _SOLVER_ERRORS += (EngineError,)
+except ModuleNotFoundError:
+    __engine_available__ = False
+
 
 def __no_matlab__():
     sys.exit("MatlabEngineContainer not available. "
              "Do you have matlab packages installed?")
 
 
-def main():
+def main(module: str,
+         functions: List[str],
+         network_sizes: Tuple,
+         samples: int,
+         workers: Optional[int] = None,
+         resume: Optional[str] = None,
+         allow_sloops: int = 1,
+         enforce_sloops: int = 1) -> None:
     """Compares the mixing rate of the markov matrices generated by all
     specified `functions`, `samples` times.
 
-    The execution of the main method results in a JSON file outputed to
+    The execution of the main method results in a newline delimited JSON
+    file outputed to
     :py:const:`~app.environment_settings.MIXING_RATE_SAMPLE_ROOT` folder.
+
+    Args:
+        module:
+            The name of the module where ``functions`` are defined.
+        functions:
+            The names of the functions that generate markov matrices.
+        network_sizes:
+            The sizes of the sampled matrices.
+        samples:
+            The number of samples of each size.
+        workers:
+            The maximum number of processes that create samples. If ``None``
+            it defaults to the number of processors on the machine.
+        resume:
+            The path of the output file of a previous test. Samples it already
+            has are not created again.
+        allow_sloops:
+            See :py:func:`~app.domain.helpers.matrices.new_symmetric_matrix`.
+        enforce_sloops:
+            See :py:func:`~app.domain.helpers.matrices.new_symmetric_matrix`.
     """
+    header = {"module": module, "functions": functions}
+    file_path, header, lines = _open_output("sample", header, resume)
+    done = {(line["size"], line["sample"]) for line in lines}
+
+    pending = [
+        (size, i) for size in network_sizes for i in range(1, samples + 1)
+        if (size, i) not in done
+    ]
+    print(f"Writing {len(pending)} samples to {file_path}, "
+          f"{len(done)} already exist.")
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=apply_thread_budget,
+        initargs=(get_thread_budget(workers),))
+    with open(file_path, 'a') as file, executor:
+        futures = [
+            executor.submit(_sample, header["module"], header["functions"],
+                            size, i, header["seed"], allow_sloops,
+                            enforce_sloops)
+            for size, i in pending
+        ]
+        for future in as_completed(futures):
+            line = future.result()
+            file.write(json.dumps(line) + "\n")
+            file.flush()
+            print(f"    Sample {line['sample']} of size {line['size']}.")
+
+
+def benchmark(module: str,
+              functions: List[str],
+              network_sizes: Tuple,
+              samples: int,
+              workers: Optional[int] = None,
+              resume: Optional[str] = None,
+              degree: int = 4) -> None:
+    """Measures the cost and the quality of the markov matrices generated by
+    all specified `functions`, on dense and sparse topologies.
+
+    For every sample the solve time, the peak memory, the status and the
+    mixing rate of each function are written to a newline delimited JSON
+    file in :py:const:`~app.environment_settings.MIXING_RATE_SAMPLE_ROOT`.
+    Once all samples exist, a Pareto summary of the file is written next
+    to it, see :py:func:`pareto_summary`.
+
+    Note:
+        The :py:mod:`persistent matrix store
+        <app.domain.helpers.matrix_store>` is disabled in the benchmark
+        processes, otherwise stored matrices would be timed instead of
+        created. Memory is measured with :py:mod:`tracemalloc`, which traces
+        numpy arrays but not the buffers allocated by external solvers. Since
+        tracing slows down allocations, each function runs twice, once
+        untraced to measure its time and once traced, without the problem
+        templates cached by the first run, to measure its peak memory.
+
+    Args:
+        module:
+            The name of the module where ``functions`` are defined.
+        functions:
+            The names of the functions that generate markov matrices.
+        network_sizes:
+            The sizes of the sampled matrices.
+        samples:
+            The number of samples of each size and kind of topology.
+        workers:
+            The maximum number of processes that create samples. If ``None``
+            it defaults to the number of processors on the machine.
+        resume:
+            The path of the output file of a previous benchmark. Samples it
+            already has are not created again.
+        degree:
+            The degree of the sparse topologies, which are
+            :py:func:`k-regular <app.domain.helpers.matrices.new_k_regular_matrix>`.
+    """
+    header = {"module": module, "functions": functions, "degree": degree}
+    file_path, header, lines = _open_output("benchmark", header, resume)
+    done = {(x["size"], x["topology"], x["sample"]) for x in lines}
+
+    pending = [
+        (size, topology, i) for size in network_sizes
+        for topology in _TOPOLOGIES for i in range(1, samples + 1)
+        if (size, topology, i) not in done
+    ]
+    print(f"Writing {len(pending)} samples to {file_path}, "
+          f"{len(done)} already exist.")
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=apply_thread_budget,
+        initargs=(get_thread_budget(workers),))
+    with open(file_path, 'a') as file, executor:
+        futures = [
+            executor.submit(_benchmark_sample, header["module"],
+                            header["functions"], size, topology, i,
+                            header["seed"], header["degree"])
+            for size, topology, i in pending
+        ]
+        for future in as_completed(futures):
+            line = future.result()
+            file.write(json.dumps(line) + "\n")
+            file.flush()
+            print(f"    Sample {line['sample']} of size {line['size']} "
+                  f"({line['topology']}).")
+
+    summary = pareto_summary(file_path)
+    summary_path = f"{os.path.splitext(file_path)[0]}_pareto.json"
+    with open(summary_path, 'w+') as file:
+        file.write(json.dumps(summary, indent=4))
+
+    rows = [
+        [size, topology, name, s["solved"], s["median_time"],
+         s["median_memory"], s["median_rate"], name in d["pareto_front"]]
+        for size, topologies in summary.items()
+        for topology, d in topologies.items()
+        for name, s in d["strategies"].items()
+    ]
+    print(tabulate(rows, tablefmt='psql', headers=[
+        "size", "topology", "function", "solved", "time (s)", "memory (B)",
+        "mixing rate", "pareto"]))
+    print(f"Pareto summary written to {summary_path}.")
+
+
+def benchmark_solvers(network_sizes: Tuple,
+                      samples: int,
+                      degree: int = 4) -> None:
+    """Times every available solver backend on the optimization problems of
+    :py:mod:`~app.domain.helpers.matrices`, on dense and sparse topologies.
+
+    The median time of each kind of problem, backend and problem size, i.e.,
+    number of scalar variables, is stored with
+    :py:func:`~app.domain.helpers.solvers.record_timings`. Topologies whose
+    problems have the same size, e.g., dense and sparse topologies solved
+    with the dense formulation, share one median. Problems are solved one at
+    a time in this process, so that backends do not compete for processors
+    while they are timed.
+
+    Args:
+        network_sizes:
+            The sizes of the sampled matrices.
+        samples:
+            The number of samples of each size and kind of topology.
+        degree:
+            The degree of the sparse topologies.
+    """
+    np.random.seed(np.random.SeedSequence().generate_state(1)[0])
+    rows = []
+    for size in network_sizes:
+        times: Dict[Tuple[str, str, int], List[float]] = {}
+        problems: Dict[Tuple[str, int], Any] = {}
+        for topology in _TOPOLOGIES:
+            for _ in range(samples):
+                a = _new_topology(size, topology, degree)
+                v_ = mm.new_vector(size)
+                for kind in sv.PROBLEM_CONES:
+                    problem, _ = mm.new_optimization_problem(kind, a, v_)
+                    variables = problem.size_metrics.num_scalar_variables
+                    problems[(kind, variables)] = problem
+                    for name in sv.select_backends(kind, problem):
+                        start = time.perf_counter()
+                        try:
+                            sv.solve(problem, kind, backend=name)
+                            solved = problem.status in mm.OPTIMAL_STATUS
+                        except _SOLVER_ERRORS:
+                            solved = False
+                        elapsed = time.perf_counter() - start
+                        times.setdefault((kind, name, variables), []).append(
+                            elapsed if solved else float('inf'))
+            print(f"    Timed solvers on size {size} ({topology}).")
+        for (kind, name, variables), values in times.items():
+            median = _median(values)
+            sv.record_timings(kind, name, problems[(kind, variables)], median)
+            rows.append([size, variables, kind, name, len(values), median])
+
+    print(tabulate(rows, tablefmt='psql', headers=[
+        "size", "variables", "problem", "backend", "samples", "time (s)"]))
+    print(f"Solver timings written to {es.SOLVER_TIMINGS_PATH}.")
+
+
+def pareto_summary(file_path: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Summarizes a benchmark written by :py:func:`benchmark`.
+
+    For each size and kind of topology, the medians of the solve time, peak
+    memory and mixing rate of each function are computed over the samples
+    the function solved. A function is in the Pareto front if no other
+    function is at least as fast and mixes at least as fast, while being
+    strictly better in one of the two.
+
+    Args:
+        file_path:
+            The path of the output file of a benchmark.
+
+    Returns:
+        A dictionary mapping each network size, as a string, to a dictionary
+        mapping each kind of topology to the ``strategies`` statistics and
+        the names of the functions in the ``pareto_front``, ordered by
+        solve time.
+    """
+    header, lines = _read_samples(file_path)
+    lines.sort(key=lambda x: (x["size"], x["topology"], x["sample"]))
+
+    grouped: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+    for line in lines:
+        grouped.setdefault((line["size"], line["topology"]), []).append(line)
+
+    summary: Dict[str, Dict[str, Dict[str, Any]]] = collections.OrderedDict()
+    for (size, topology), group in grouped.items():
+        stats: Dict[str, Dict[str, Any]] = collections.OrderedDict()
+        for name in header["functions"]:
+            results = [x["results"][name] for x in group]
+            solved = [r for r in results if r["status"] == "solved"]
+            stats[name] = {
+                "solved": len(solved) / len(results),
+                "median_time": _median([r["time"] for r in solved]),
+                "median_memory": _median([r["memory"] for r in solved]),
+                "median_rate": _median([r["rate"] for r in solved]),
+            }
+
+        candidates = [n for n in stats if stats[n]["solved"] > 0]
+        front = [
+            n for n in candidates if not any(
+                _dominates(stats[o], stats[n]) for o in candidates if o != n)
+        ]
+        front.sort(key=lambda n: stats[n]["median_time"])
+        summary.setdefault(str(size), collections.OrderedDict())[topology] = {
+            "strategies": stats, "pareto_front": front}
+    return summary
+
+
+def load_samples(file_path: str) -> _ResultsDict:
+    """Reads the mixing rates written by :py:func:`main`.
+
+    Args:
+        file_path:
+            The path of the output file of a test.
+
+    Returns:
+        A dictionary mapping each network size, as a string, to a
+        dictionary mapping each function name to the mixing rates of its
+        matrices, ordered by sample.
+    """
+    header, lines = _read_samples(file_path)
+    lines.sort(key=lambda line: (line["size"], line["sample"]))
+
+    results: _ResultsDict = collections.OrderedDict()
+    for line in lines:
+        size_results = results.setdefault(
+            str(line["size"]),
+            collections.OrderedDict((name, []) for name in header["functions"]))
+        for name, mixing_rate in line["rates"].items():
+            size_results[name].append(mixing_rate)
+    return results
+
+
+def _sample(module: str,
+            functions: List[str],
+            size: int,
+            sample: int,
+            seed: int,
+            allow_sloops: int,
+            enforce_sloops: int) -> Dict[str, Any]:
+    """Creates one sample in a worker process.
+
+    The random state is seeded from ``seed``, ``size`` and ``sample``, thus
+    forked workers do not share random states and samples do not depend on
+    the process that creates them nor on the order they are created in.
+
+    Returns:
+        A dictionary with the ``size`` and the number of the ``sample`` and
+        the mixing rate of the matrix created by each function, which is
+        infinite if the function failed.
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=(size, sample))
+    np.random.seed(sequence.generate_state(1)[0])
+
+    if allow_sloops and enforce_sloops:
+        m = mm.new_symmetric_connected_matrices(1, size)[0]
+    else:
+        # Not reproducible, these topologies are drawn from system entropy.
+        m = mm.new_symmetric_connected_matrix(size, allow_sloops, enforce_sloops)
+    v_ = np.abs(np.random.uniform(0, 100, size))
+    v_ /= v_.sum()
+
+    rates: Dict[str, float] = {}
+    module = importlib.import_module(module)
+    for name in functions:
+        try:
+            _, mixing_rate = getattr(module, name)(m, v_)
+            rates[name] = float(mixing_rate)
+        except _SOLVER_ERRORS:
+            rates[name] = float('inf')
+    return {"size": size, "sample": sample, "rates": rates}
+
+
+def _benchmark_sample(module: str,
+                      functions: List[str],
+                      size: int,
+                      topology: str,
+                      sample: int,
+                      seed: int,
+                      degree: int) -> Dict[str, Any]:
+    """Creates one benchmark sample in a worker process.
+
+    The random state is seeded like in :py:func:`_sample`. Each function
+    is timed and has its peak memory measured in separate runs, see
+    :py:func:`_measure`.
+
+    Returns:
+        A dictionary with the ``size``, the ``topology`` and the number of
+        the ``sample`` and the ``time``, in seconds, peak ``memory``, in
+        bytes, ``status`` and mixing ``rate`` of each function. The status is
+        ``solved``, ``failed`` if the function did not create a matrix, or
+        the name of the exception it raised.
+    """
+    es.set_matrix_store(None)
+
+    key = (size, _TOPOLOGIES.index(topology), sample)
+    sequence = np.random.SeedSequence(seed, spawn_key=key)
+    np.random.seed(sequence.generate_state(1)[0])
+
+    a = _new_topology(size, topology, degree)
+    v_ = mm.new_vector(size)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    module = importlib.import_module(module)
+    for name in functions:
+        function = getattr(module, name)
+        start = time.perf_counter()
+        mixing_rate, status = _measure(function, a, v_)
+        elapsed = time.perf_counter() - start
+
+        mm.clear_problem_templates()
+        tracemalloc.start()
+        _measure(function, a, v_)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {"time": elapsed, "memory": peak,
+                         "status": status, "rate": float(mixing_rate)}
+    return {"size": size, "topology": topology, "sample": sample,
+            "results": results}
 
-    matlab_engine = MatlabEngineContainer.get_instance()
-    if not matlab_engine:
-        __no_matlab__()
 
+def _measure(function: Callable,
+             a: np.ndarray,
+             v_: np.ndarray) -> Tuple[float, str]:
+    """Runs one benchmarked function.
+
+    Returns:
+        The mixing rate of the created matrix and ``solved``, ``failed`` if
+        the function did not create a matrix, or the name of the exception
+        it raised.
+    """
     try:
-        import EngineError
-    except ModuleNotFoundError:
+        t, mixing_rate = function(a, v_)
+        return mixing_rate, "failed" if t is None else "solved"
+    except Exception as error:
+        return float('inf'), type(error).__name__
+
+
+def _new_topology(size: int, topology: str, degree: int) -> np.ndarray:
+    """Creates a random ``dense`` or ``sparse``, k-regular, topology.
+
+    Returns:
+        A symmetric adjacency matrix, dense or ``scipy.sparse``.
+    """
+    if topology == "sparse":
+        k = min(degree, size - 1)
+        return mm.new_k_regular_matrix(size, k - (size * k) % 2)
+    return mm.new_symmetric_connected_matrices(1, size)[0]
+
+
+def _open_output(prefix: str,
+                 header: Dict[str, Any],
+                 resume: Optional[str]
+                 ) -> Tuple[str, Dict[str, Any], List[Dict[str, Any]]]:
+    """Creates a new output file or prepares the output file of an
+    interrupted test to be appended to.
+
+    Args:
+        prefix:
+            The name of new output files, which is followed by a number.
+        header:
+            The settings of a new test, a ``seed`` is added to them.
+        resume:
+            The path of the output file of an interrupted test or ``None``.
+
+    Returns:
+        The path of the output file, its header and its samples. If resumed,
+        the header is the one in the file.
+    """
+    lines: List[Dict[str, Any]] = []
+    if resume:
+        file_path = resume
+        header, lines, end = _scan_samples(file_path)
+        # Drops the partially written line of an interrupted test, if any,
+        # without rewriting the samples before it.
+        with open(file_path, 'r+b') as file:
+            file.truncate(end)
+
+    if _MATLAB_FUNCTION in header["functions"] and \
+            es.MGO_ENGINE == "matlab" and not __engine_available__:
         __no_matlab__()
 
-    os.makedirs(MIXING_RATE_SAMPLE_ROOT, exist_ok=True)
+    if not resume:
+        os.makedirs(MIXING_RATE_SAMPLE_ROOT, exist_ok=True)
+        dir_contents = os.listdir(MIXING_RATE_SAMPLE_ROOT)
+        fid = len([*filter(
+            lambda x: x.startswith(prefix) and x.endswith(".ndjson"),
+            dir_contents)])
+        file_path = f"{MIXING_RATE_SAMPLE_ROOT}/{prefix}_{fid + 1}.ndjson"
+        header["seed"] = np.random.SeedSequence().entropy
+        with open(file_path, 'w+') as file:
+            file.write(json.dumps(header) + "\n")
 
-    results: _ResultsDict = collections.OrderedDict()
+    return file_path, header, lines
 
-    for size in network_sizes:
-        print(f"\nTesting matrices of size: {size}.")
-        size_results: _SizeResultsDict = collections.OrderedDict()
-        for name in functions:
-            size_results[name] = []
-        for i in range(1, samples + 1):
-            print(f"    Sample {i}.")
-            m = mm.new_symmetric_connected_matrix(
-                size, allow_sloops, enforce_sloops)
-            v_ = np.abs(np.random.uniform(0, 100, size))
-            v_ /= v_.sum()
-
-            for name in functions:
-                try:
-                    _, mixing_rate = getattr(module, name)(m, v_)
-                    size_results[name].append(mixing_rate)
-                except (DCPError, SolverError, EngineError):
-                    size_results[name].append(float('inf'))
-
-        results[str(size)] = size_results
-
-    json_string = json.dumps(results, indent=4)
-    dir_contents = os.listdir(MIXING_RATE_SAMPLE_ROOT)
-    fid = len([*filter(lambda x: "sample" in x, dir_contents)])
-    file_path = f"{MIXING_RATE_SAMPLE_ROOT}/sample_{fid + 1}.json"
-    with open(file_path, 'w+') as file:
-        file.write(json_string)
+
+def _dominates(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Checks if the statistics ``a`` of a function Pareto dominate ``b``."""
+    at, ar = a["median_time"], a["median_rate"]
+    bt, br = b["median_time"], b["median_rate"]
+    return at <= bt and ar <= br and (at < bt or ar < br)
+
+
+def _median(values: List[float]) -> float:
+    """Computes the median of ``values`` or infinity if there are none."""
+    return float(np.median(values)) if values else float('inf')
+
+
+def _read_samples(file_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Reads the header and the samples of an output file.
+
+    A partially written last line, left by an interrupted test, is ignored.
+
+    Returns:
+        The header and the samples.
+    """
+    header, lines, _ = _scan_samples(file_path)
+    return header, lines
+
+
+def _scan_samples(
+        file_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], int]:
+    """Reads the header and the samples of an output file, see
+    :py:func:`_read_samples`.
+
+    Returns:
+        The header, the samples and the offset, in bytes, of the end of the
+        last complete line.
+    """
+    with open(file_path, 'rb') as file:
+        text = file.readline()
+        header = json.loads(text)
+        end = len(text)
+        lines = []
+        for text in file:
+            if not text.endswith(b"\n"):
+                break
+            try:
+                lines.append(json.loads(text))
+            except json.JSONDecodeError:
+                break
+            end += len(text)
+    return header, lines, end
 
 
 if __name__ == "__main__":
     samples: int = 30
-    network_sizes: Tuple = (8, 16)
+    network_sizes: Optional[Tuple] = None
+    run_benchmark: bool = False
+    run_solvers: bool = False
+    degree: int = 4
+    workers: Optional[int] = None
+    resume: Optional[str] = None
     module: Any = "domain.helpers.matrices"
     functions: List[str] = [
         "new_mh_transition_matrix",
         "new_sdp_mh_transition_matrix",
         "new_go_transition_matrix",
-        "new_mgo_transition_matrix"
+        "new_mgo_transition_matrix",
+        "new_fo_transition_matrix"
     ]
 
     allow_sloops = 1
     enforce_sloops = 1
 
     try:
-        short_opts = "s:n:m:f:a:e:"
+        short_opts = "s:n:m:f:a:e:w:r:bk:S"
         long_opts = ["samples=", "network_sizes=", "module=", "functions=",
-                     "allow_self_loops=", "enforce_loops="]
+                     "allow_self_loops=", "enforce_loops=", "workers=",
+                     "resume=", "benchmark", "degree=", "solvers"]
 
         args, values = getopt.getopt(sys.argv[1:], short_opts, long_opts)
         for arg, val in args:
@@ -121,17 +622,42 @@ if __name__ == "__main__":
                 samples = int(str(val).strip()) or samples
             if arg in ("-n", "--network_sizes"):
                 network_sizes = ast.literal_eval(str(val).strip())
+                if isinstance(network_sizes, int):
+                    network_sizes = (network_sizes,)
             if arg in ("-m", "--module"):
                 module = str(val).strip()
             if arg in ("-f", "--functions"):
-                function_names = str(val).strip().split(',')
-            if arg in ("a", "--allow_self_loops"):
-                allow_sloops = int(str(val).strip()) or allow_sloops
-            if arg in ("e", "--enforce_loops"):
-                enforce_sloops = int(str(val).strip()) or enforce_sloops
-
-        module = importlib.import_module(module)
-        main()
+                functions = str(val).strip().split(',')
+            if arg in ("-a", "--allow_self_loops"):
+                allow_sloops = int(str(val).strip())
+            if arg in ("-e", "--enforce_loops"):
+                enforce_sloops = int(str(val).strip())
+            if arg in ("-w", "--workers"):
+                workers = int(str(val).strip())
+            if arg in ("-r", "--resume"):
+                resume = str(val).strip()
+                if not os.path.isabs(resume) and not os.path.exists(resume):
+                    resume = os.path.join(MIXING_RATE_SAMPLE_ROOT, resume)
+            if arg in ("-b", "--benchmark"):
+                run_benchmark = True
+            if arg in ("-k", "--degree"):
+                degree = int(str(val).strip())
+            if arg in ("-S", "--solvers"):
+                run_solvers = True
+
+        for name in functions:
+            getattr(importlib.import_module(module), name)
+        if run_solvers:
+            network_sizes = network_sizes or (8, 16, 32, 64)
+            benchmark_solvers(network_sizes, samples, degree)
+        elif run_benchmark:
+            network_sizes = network_sizes or (8, 16, 32, 64, 128, 256, 512)
+            benchmark(module, functions, network_sizes, samples, workers,
+                      resume, degree)
+        else:
+            network_sizes = network_sizes or (8, 16)
+            main(module, functions, network_sizes, samples, workers, resume,
+                 allow_sloops, enforce_sloops)
     except getopt.GetoptError:
         sys.exit("Usage: python mixing_rate_sampler.py -s 1000 -f a_matrix_generator")
     except ValueError:
@@ -141,7 +667,12 @@ if __name__ == "__main__":
                  "  --module -m (str)\n"
                  "  --functions -f (comma seperated list of str)\n"
                  "  --allow_self_loops (int) in {0, 1}\n"
-                 "  --enforce_loops (int) in {0, 1}\n")
+                 "  --enforce_loops (int) in {0, 1}\n"
+                 "  --workers -w (int)\n"
+                 "  --resume -r (str)\n"
+                 "  --benchmark -b\n"
+                 "  --degree -k (int)\n"
+                 "  --solvers -S\n")
     except (ModuleNotFoundError, ImportError):
         sys.exit(f"Module '{module}' does not exist or can not be imported.")
     except AttributeError:
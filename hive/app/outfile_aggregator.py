@@ -0,0 +1,310 @@
+"""This module summarizes the output files of many simulation runs.
+
+Output files in :py:const:`~app.environment_settings.OUTFILE_ROOT`, of any
+:py:const:`~app.environment_settings.OUTFILE_FORMAT`, are read in parallel by
+worker processes and their runs, i.e., the logs of each simulated file, are
+grouped by simulation file, cluster type and settings. For each group the
+mean, percentiles and bootstrap confidence interval of the mean are computed
+at every epoch for :py:const:`EPOCH_METRICS` and once for
+:py:const:`RUN_METRICS`.
+
+You can summarize all output files by executing the following command::
+
+    $ python outfile_aggregator.py
+
+Use the -d or --directory flag to summarize another folder, the -w or
+--workers flag to limit how many processes read output files, the -b or
+--bootstraps flag to set how many resamples are used by the confidence
+intervals, whose level is set with -c or --confidence, the -p or
+--percentiles flag to choose the percentiles and the -s or --seed flag to
+reproduce the resamples of a previous summary::
+
+    $ python outfile_aggregator.py -d static/outfiles -w 4 -b 2000 -c 0.99 -p 5,50,95 -s 42
+
+Note:
+    The summary is a compact JSON file in
+    :py:const:`~app.environment_settings.OUTFILE_SUMMARY_ROOT`, with one
+    entry per group. Runs terminate at different epochs, thus the statistics
+    of an epoch only describe the runs that reached it, whose number is
+    stored in ``"runs"``. The seed of the resamples is stored in
+    ``"seed"``.
+"""
+
+from __future__ import annotations
+
+import ast
+import getopt
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+from environment_settings import OUTFILE_ROOT, OUTFILE_SUMMARY_ROOT
+from domain.helpers.outfiles import read_outfile
+from utils.threads import apply_thread_budget, get_thread_budget
+
+EPOCH_METRICS: Tuple[str, ...] = ("blocks_existing", "blocks_moved")
+"""Logs with one value per epoch that are summarized at every epoch."""
+
+RUN_METRICS: Tuple[str, ...] = ("terminated", "largest_convergence_window")
+"""Logs with one value per run that are summarized once."""
+
+SETTINGS: Tuple[str, ...] = (
+    "blocks_size", "blocks_count", "critical_size_threshold",
+    "sufficient_size_threshold", "original_size", "redundant_size",
+    "max_epochs", "min_replication_delay", "max_replication_delay",
+    "replication_level", "convergence_treshold", "channel_loss",
+    "corruption_chance_tod")
+"""Run metadata that, with the simulation file and the cluster type, tells
+groups of runs apart."""
+
+_OUTFILE_EXTENSIONS: Tuple[str, ...] = (
+    ".json", ".ndjson", ".npz", ".arrow", ".parquet")
+
+_Run = Tuple[str, Dict[str, Any]]
+
+
+def main(directory: str,
+         workers: Optional[int] = None,
+         bootstraps: int = 1000,
+         confidence: float = 0.95,
+         percentiles: Tuple[float, ...] = (5, 25, 50, 75, 95),
+         seed: Optional[int] = None) -> str:
+    """Summarizes all output files in a folder.
+
+    Args:
+        directory:
+            The folder whose output files are summarized. Sub folders are
+            not searched.
+        workers:
+            The maximum number of processes that read output files. If
+            ``None`` it defaults to the number of processors on the machine.
+        bootstraps:
+            The number of resamples of the runs used by the confidence
+            intervals.
+        confidence:
+            The level of the confidence intervals, e.g., ``0.95``.
+        percentiles:
+            The percentiles computed for every metric, in ``[0, 100]``.
+        seed:
+            The seed of the resamples of the confidence intervals. If
+            ``None`` a new one is drawn.
+
+    Returns:
+        The path of the summary file.
+    """
+    paths = sorted(
+        os.path.join(directory, x) for x in os.listdir(directory)
+        if x.endswith(_OUTFILE_EXTENSIONS) and
+        os.path.isfile(os.path.join(directory, x)))
+    print(f"Reading {len(paths)} output files from {directory}.")
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=apply_thread_budget,
+        initargs=(get_thread_budget(workers),))
+    with executor:
+        chunksize = max(1, len(paths) // (4 * (workers or os.cpu_count() or 1)))
+        for path, (runs, error) in zip(
+                paths, executor.map(_read_runs, paths, chunksize=chunksize)):
+            if error:
+                print(f"    Skipped {path}: {error}")
+            for key, run in runs:
+                groups.setdefault(key, []).append(run)
+
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    rng = np.random.default_rng(seed)
+    summary = []
+    for key, runs in groups.items():
+        group = json.loads(key)
+        group["runs"] = len(runs)
+        group["seed"] = seed
+        group["epochs"] = {
+            name: _to_lists(_describe(
+                _pad([x[name] for x in runs]), rng, bootstraps, confidence,
+                percentiles))
+            for name in EPOCH_METRICS
+        }
+        scalars = np.array(
+            [[x[name] for name in RUN_METRICS] for x in runs], dtype=float)
+        stats = _describe(scalars, rng, bootstraps, confidence, percentiles)
+        group["scalars"] = {
+            name: _to_lists(stats, i) for i, name in enumerate(RUN_METRICS)
+        }
+        summary.append(group)
+
+    os.makedirs(OUTFILE_SUMMARY_ROOT, exist_ok=True)
+    dir_contents = os.listdir(OUTFILE_SUMMARY_ROOT)
+    fid = len([*filter(lambda x: x.startswith("summary"), dir_contents)])
+    file_path = f"{OUTFILE_SUMMARY_ROOT}/summary_{fid + 1}.json"
+    with open(file_path, 'w+') as file:
+        file.write(json.dumps(summary, separators=(",", ":")))
+
+    rows = [
+        [x["simfile_name"], x["cluster_type"], x["runs"],
+         x["scalars"]["terminated"]["mean"],
+         *x["scalars"]["terminated"]["ci"],
+         x["scalars"]["largest_convergence_window"]["mean"]]
+        for x in summary
+    ]
+    print(tabulate(rows, tablefmt='psql', headers=[
+        "simfile", "cluster type", "runs", "terminated", "ci low", "ci high",
+        "convergence window"]))
+    print(f"Summary written to {file_path}, resampled with seed {seed}.")
+    return file_path
+
+
+def _read_runs(path: str) -> Tuple[List[_Run], Optional[str]]:
+    """Reads the runs of an output file in a worker process.
+
+    Only the :py:const:`EPOCH_METRICS`, the :py:const:`RUN_METRICS` and the
+    group of each run are returned, so that little data is sent back to the
+    main process.
+
+    Args:
+        path:
+            The path of the output file.
+
+    Returns:
+        A ``(group key, metrics)`` pair for each run in the output file and
+        the reason why it could not be read, if it could not.
+    """
+    try:
+        outfile = read_outfile(path)
+    except (OSError, ValueError, KeyError) as e:
+        return [], repr(e)
+
+    runs = []
+    for metadata, columns in outfile:
+        group = {"simfile_name": metadata.get("simfile_name"),
+                 "cluster_type": metadata.get("cluster_type"),
+                 "settings": {k: metadata.get(k) for k in SETTINGS}}
+        run = {name: columns[name] for name in EPOCH_METRICS}
+        for name in RUN_METRICS:
+            value = metadata.get(name)
+            run[name] = np.nan if value is None else value
+        runs.append((json.dumps(group, sort_keys=True), run))
+    return runs, None
+
+
+def _pad(series: List[np.ndarray]) -> np.ndarray:
+    """Stacks the series of many runs, padding shorter ones with ``NaN``.
+
+    Returns:
+        A matrix with one row per run and one column per epoch.
+    """
+    matrix = np.full((len(series), max(len(x) for x in series)), np.nan)
+    for i, x in enumerate(series):
+        matrix[i, :len(x)] = x
+    return matrix
+
+
+def _describe(matrix: np.ndarray,
+              rng: np.random.Generator,
+              bootstraps: int,
+              confidence: float,
+              percentiles: Tuple[float, ...]) -> Dict[str, np.ndarray]:
+    """Summarizes each column of a matrix whose rows are runs.
+
+    ``NaN`` entries, i.e., runs that did not reach an epoch or did not log a
+    value, are ignored. Bootstrap resamples are drawn as multinomial counts
+    of the runs, thus all columns and resamples are computed with two matrix
+    products instead of indexing copies of the matrix.
+
+    Args:
+        matrix:
+            The values of one metric, with one row per run.
+        rng:
+            The random generator of the resamples.
+        bootstraps:
+            The number of resamples of the runs.
+        confidence:
+            The level of the confidence intervals of the means.
+        percentiles:
+            The percentiles computed for every column.
+
+    Returns:
+        The number of runs, mean, standard deviation, percentiles and
+        confidence interval of the mean of every column. The last axis of
+        every array are the columns, the first axis of percentiles and
+        intervals are the percentile or bound.
+    """
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    n = matrix.shape[0]
+    weights = rng.multinomial(n, np.full(n, 1 / n), size=bootstraps)
+    alpha = (1 - confidence) / 2 * 100
+    with np.errstate(invalid="ignore", divide="ignore"), \
+            warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        means = (weights @ values) / (weights @ valid)
+        stats = {
+            "runs": valid.sum(axis=0),
+            "mean": np.nanmean(matrix, axis=0),
+            "std": np.nanstd(matrix, axis=0),
+            "percentiles": np.nanpercentile(matrix, percentiles, axis=0),
+            "ci": np.nanpercentile(means, [alpha, 100 - alpha], axis=0),
+        }
+    return stats
+
+
+def _to_lists(stats: Dict[str, np.ndarray],
+              column: Optional[int] = None) -> Dict[str, Any]:
+    """Converts the statistics of :py:func:`_describe`, or those of one of
+    its columns, to JSON serializable values rounded to four decimal
+    places."""
+    index = Ellipsis if column is None else (Ellipsis, column)
+    return {k: np.round(v[index], 4).tolist() for k, v in stats.items()}
+
+
+if __name__ == "__main__":
+    directory: str = OUTFILE_ROOT
+    workers: Optional[int] = None
+    bootstraps: int = 1000
+    confidence: float = 0.95
+    percentiles: Tuple[float, ...] = (5, 25, 50, 75, 95)
+    seed: Optional[int] = None
+
+    try:
+        short_opts = "d:w:b:c:p:s:"
+        long_opts = ["directory=", "workers=", "bootstraps=", "confidence=",
+                     "percentiles=", "seed="]
+
+        args, values = getopt.getopt(sys.argv[1:], short_opts, long_opts)
+        for arg, val in args:
+            if arg in ("-d", "--directory"):
+                directory = str(val).strip()
+            if arg in ("-w", "--workers"):
+                workers = int(str(val).strip())
+            if arg in ("-b", "--bootstraps"):
+                bootstraps = int(str(val).strip())
+            if arg in ("-c", "--confidence"):
+                confidence = float(str(val).strip())
+            if arg in ("-p", "--percentiles"):
+                percentiles = ast.literal_eval(str(val).strip())
+                if not isinstance(percentiles, tuple):
+                    percentiles = (percentiles,)
+            if arg in ("-s", "--seed"):
+                seed = int(str(val).strip())
+
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be in (0, 1).")
+        main(directory, workers, bootstraps, confidence, percentiles, seed)
+    except getopt.GetoptError:
+        sys.exit("Usage: python outfile_aggregator.py -d static/outfiles")
+    except (ValueError, SyntaxError):
+        sys.exit("Execution arguments should have the following data types:\n"
+                 "  --directory -d (str)\n"
+                 "  --workers -w (int)\n"
+                 "  --bootstraps -b (int)\n"
+                 "  --confidence -c (float) in (0, 1)\n"
+                 "  --percentiles -p (comma seperated list of float)\n"
+                 "  --seed -s (int)\n")
+    except FileNotFoundError:
+        sys.exit(f"Folder '{directory}' does not exist.")
@@ -1,70 +1,78 @@
 """Creates an arbrirary number of symmetric connected topologies and equilibrium
 vectors that can be read during simulations for one to one comparison between
-algorithms. There is a small chance that generated pairs can not be solved by
-heuristic Markov chain generating algorithms such as our implementation of
+algorithms. Generated pairs that can not be solved by heuristic Markov chain
+generating algorithms such as our implementation of
 :py:meth:`Metropolis Hastings
-<app.domain.helpers.matrices._metropolis_hastings>`. To ensure that algorithm
-can be used over the generated pairs, run :py:mod:`sample_scenario_fixer`,
-which removes all invalid entries from the generated json file.
+<app.domain.helpers.matrices._metropolis_hastings>` are discarded and
+replaced, thus every stored scenario can be used with that algorithm.
+Validation runs in parallel processes.
 
-To execute this file run the following command (both arguments are optional)::
+To execute this file run the following command (all arguments are optional)::
 
-    $ python sample_scenario_generator.py --samples=1000 --network_sizes=8,16,32
+    $ python sample_scenario_generator.py --samples=1000 --network_sizes=8,16,32 --workers=4
+
+Swarm guidance clusters that use the scenarios, i.e.,
+:py:class:`~app.domain.cluster_groups.SGClusterPerfect`, create the
+transition matrices of every strategy at runtime. To create and store them
+once, together with their mixing rates, use the -p or --precompute flag::
+
+    $ python sample_scenario_generator.py --samples=1000 --precompute
 
 Note:
-    The output of this script is a file named "scenarios.json" under the
-    :py:const:`~app.environment_settings.RESOURCES_ROOT` directory. If you wish
-    to modify this behavior you need to customize the script to accept one
-    additional argument which than saves the file under a different name. You
-    also need to ensure that all other uses of "scenarios.json" are changed
-    accordingly.
+    The output of this script is a pair of ``.npy`` files per network size
+    under the :py:const:`~app.environment_settings.SCENARIOS_ROOT` directory,
+    which are read by :py:func:`app.domain.helpers.scenarios.get_scenario`.
+    Existing scenarios of the same network sizes are replaced.
 """
 
-import os
 import sys
 import ast
-import json
 import getopt
 
-import environment_settings as es
 import domain.helpers.matrices as mm
+import domain.helpers.scenarios as sc
 
-from typing import Tuple, Any
+from typing import Tuple, Optional
 
 if __name__ == "__main__":
     network_sizes: Tuple = (8, 16, 32)
     samples: int = 100
+    workers: Optional[int] = None
+    precompute: bool = False
 
-    short_opts = "n:s:"
-    long_opts = ["network_sizes=", "samples="]
+    short_opts = "n:s:w:p"
+    long_opts = ["network_sizes=", "samples=", "workers=", "precompute"]
 
     try:
         args, values = getopt.getopt(sys.argv[1:], short_opts, long_opts)
         for arg, val in args:
-            if arg in ("-n", "--network_size"):
+            if arg in ("-n", "--network_sizes"):
                 network_sizes = ast.literal_eval(str(val).strip())
+                if isinstance(network_sizes, int):
+                    network_sizes = (network_sizes,)
             if arg in ("-s", "--samples"):
                 samples = int(str(val).strip())
+            if arg in ("-w", "--workers"):
+                workers = int(str(val).strip())
+            if arg in ("-p", "--precompute"):
+                precompute = True
     except getopt.GetoptError:
         sys.exit()
     except ValueError:
         sys.exit("Execution arguments should have the following data types:\n"
-                 "  --network_size -n (comma seperated list of int)\n"
-                 "  --samples -s (int)\n")
+                 "  --network_sizes -n (comma seperated list of int)\n"
+                 "  --samples -s (int)\n"
+                 "  --workers -w (int)\n")
 
     if not network_sizes or samples < 1:
         sys.exit("Can't proceed with no samples parameter or empty networks.")
 
-    os.makedirs(es.RESOURCES_ROOT, exist_ok=True)
-
-    scenarios = {str(k): {"vectors": [], "matrices": []} for k in network_sizes}
-    for k in scenarios:
-        network_size = int(k)
-        for i in range(samples):
-            v_ = mm.new_vector(network_size).tolist()
-            m = mm.new_symmetric_connected_matrix(network_size).tolist()
-            scenarios[k]["vectors"].append(v_)
-            scenarios[k]["matrices"].append(m)
-
-    with open(os.path.join(es.RESOURCES_ROOT, "scenarios.json"), "w") as f:
-        json.dump(scenarios, f, indent=4, sort_keys=True, ensure_ascii=False)
+    for network_size in network_sizes:
+        matrices, vectors = sc.new_scenarios(network_size, samples, workers)
+        sc.save_scenarios(network_size, matrices, vectors)
+        print(f"Saved {samples} scenarios of size {network_size}.")
+        if precompute:
+            strategies = ["new_mh_transition_matrix"]
+            strategies.extend(mm.OPTIMIZATION_STRATEGIES)
+            sc.precompute_strategies(network_size, strategies, workers)
+            print(f"Precomputed {', '.join(strategies)}.")
@@ -0,0 +1,24 @@
+"""Configures the tests of the application modules, which are imported as
+they are by :py:mod:`app.hive_simulation`, i.e., relative to the app folder.
+
+Run them from the app folder with::
+
+    $ python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import environment_settings as es
+
+
+@pytest.fixture(autouse=True)
+def no_shared_files(tmp_path, monkeypatch):
+    """Keeps tests from reading or writing the stores shared by simulations."""
+    monkeypatch.setattr(es, "MATRIX_STORE_PATH", None)
+    monkeypatch.setattr(es, "SOLVER_TIMINGS_PATH", None)
+    monkeypatch.setattr(es, "OUTFILE_ROOT", str(tmp_path))
+    monkeypatch.setattr(es, "SCENARIOS_ROOT", str(tmp_path / "scenarios"))
@@ -0,0 +1,150 @@
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+import environment_settings as es
+import domain.master_servers as ms
+import domain.network_nodes as nn
+import domain.helpers.smart_dataclasses as sd
+
+from domain.helpers.outfiles import read_outfile
+
+EPOCHS = 6
+FILES = ["a.bin", "b.bin", "c.bin"]
+
+
+@pytest.fixture
+def master(tmp_path, monkeypatch):
+    """Creates an SGMasterMulti whose three files share one cluster of nodes
+    that stay online for the whole, shortened, simulation."""
+    random.seed(3)
+    np.random.seed(3)
+    for name in ("SIMULATION_ROOT", "SHARED_ROOT"):
+        os.makedirs(tmp_path / name)
+        monkeypatch.setattr(es, name, str(tmp_path / name))
+    monkeypatch.setattr(es, "OPTIMIZE", False)
+    monkeypatch.setattr(es, "OUTFILE_FORMAT", "json")
+    monkeypatch.setattr(es, "BLOCKS_COUNT", 4)
+
+    simfile = {
+        "nodes_uptime": {f"n{i}": 0.9 + i / 200 for i in range(12)},
+        "persisting": {
+            name: {"spread": "u", "cluster_size": 8} for name in FILES},
+    }
+    with open(tmp_path / "SIMULATION_ROOT" / "multi.json", "w") as file:
+        json.dump(simfile, file)
+    for name in FILES:
+        with open(tmp_path / "SHARED_ROOT" / name, "wb") as file:
+            file.write(os.urandom(4096))
+
+    master = ms.SGMasterMulti("multi.json", 1, 100, "SGClusterMulti", "SGNode")
+    monkeypatch.setattr(ms.Master, "MAX_EPOCHS", EPOCHS)
+    monkeypatch.setattr(ms.Master, "MAX_EPOCHS_PLUS_ONE", EPOCHS + 1)
+    yield master
+    for cluster in list(master.cluster_groups.values()):
+        for file in cluster.files.values():
+            file.fclose()
+
+
+def _fail_at(cluster, epoch, names):
+    """Fails the named files after the cluster evaluates ``epoch``."""
+    evaluate = cluster.evaluate
+
+    def fail_and_evaluate():
+        evaluate()
+        if cluster.current_epoch == epoch:
+            for name in names:
+                cluster.select_file(name)
+                cluster._set_fail("Failed by the test.")
+    cluster.evaluate = fail_and_evaluate
+
+
+def _read_logs(master):
+    path = os.path.join(es.OUTFILE_ROOT, "SG-Multimulti_1.json")
+    return {metadata["file_name"]: (metadata, columns)
+            for metadata, columns in read_outfile(path)}
+
+
+# region SGClusterMulti
+def test_files_with_the_same_cluster_size_share_one_matrix(master):
+    [cluster] = master.cluster_groups.values()
+
+    assert list(cluster.files) == FILES
+    for node in cluster.members.values():
+        matrices = [node.routing_table[name][0] for name in FILES]
+        assert all(m is matrices[0] for m in matrices)
+        assert len({node.routing_table[name][2] for name in FILES}) == 1
+
+
+def test_one_file_data_is_created_per_file(monkeypatch, master):
+    created = []
+    init = sd.FileData.__init__
+
+    def counting_init(self, name, *args, **kwargs):
+        created.append(name)
+        init(self, name, *args, **kwargs)
+    monkeypatch.setattr(sd.FileData, "__init__", counting_init)
+
+    ms.SGMasterMulti("multi.json", 2, 100, "SGClusterMulti", "SGNode")
+
+    assert created == FILES
+
+
+def test_failed_files_stop_being_routed_once(master, monkeypatch):
+    [cluster] = master.cluster_groups.values()
+    _fail_at(cluster, 2, ["b.bin"])
+    removed = []
+    remove_file_routing = nn.SGNode.remove_file_routing
+
+    def counting_remove(node, fid):
+        removed.append((cluster.current_epoch, fid))
+        remove_file_routing(node, fid)
+    monkeypatch.setattr(nn.SGNode, "remove_file_routing", counting_remove)
+
+    master.execute_simulation()
+
+    assert cluster._live_files() == ["a.bin", "c.bin"]
+    assert {x for x in removed if x[1] == "b.bin"} == {(2, "b.bin")}
+    assert len([x for x in removed if x[1] == "b.bin"]) == \
+        len(cluster.members)
+    for node in cluster.members.values():
+        assert "b.bin" not in node.routing_table
+        assert node.get_file_parts_count("b.bin") == 0
+        assert "a.bin" in node.routing_table
+
+
+def test_logs_of_failed_files_end_at_their_failure(master):
+    [cluster] = master.cluster_groups.values()
+    _fail_at(cluster, 2, ["b.bin"])
+
+    master.execute_simulation()
+    logs = _read_logs(master)
+
+    metadata, columns = logs["b.bin"]
+    assert metadata["terminated"] == 2
+    assert not metadata["successfull"]
+    assert len(columns["blocks_existing"]) == 2
+    for name in ("a.bin", "c.bin"):
+        metadata, columns = logs[name]
+        assert metadata["successfull"]
+        assert len(columns["blocks_existing"]) == EPOCHS
+
+
+def test_cluster_stops_when_all_files_failed(master):
+    [cluster] = master.cluster_groups.values()
+    _fail_at(cluster, 3, FILES)
+
+    master.execute_simulation()
+    logs = _read_logs(master)
+
+    assert not cluster.running
+    assert not cluster._live_files()
+    assert master.epoch == 4
+    for name in FILES:
+        metadata, columns = logs[name]
+        assert metadata["terminated"] == 3
+        assert len(columns["blocks_existing"]) == 3
+# endregion
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+import environment_settings as es
+import domain.helpers.matrices as mm
+import domain.helpers.solvers as sv
+
+from domain.cluster_groups import SGCluster
+from domain.helpers.exceptions import IllegalArgumentError, MatrixError
+
+
+def _solve(kind, a, v_, density, monkeypatch):
+    monkeypatch.setattr(es, "SPARSE_FORMULATION_DENSITY", density)
+    problem, m = mm.new_optimization_problem(kind, a, v_)
+    sv.solve(problem, kind)
+    assert problem.status in mm.OPTIMAL_STATUS
+    return problem.value, m.value
+
+
+# region Edge-sparse formulations
+@pytest.mark.parametrize("kind", ["sdp", "go"])
+def test_edge_formulation_matches_dense_optimum(kind, monkeypatch):
+    np.random.seed(7)
+    a = mm.new_k_regular_matrix(10, 4).toarray()
+    v_ = mm.new_vector(10)
+
+    dense, _ = _solve(kind, a, v_, 0.0, monkeypatch)
+    edge, m = _solve(kind, a, v_, 1.0, monkeypatch)
+
+    assert edge == pytest.approx(dense, abs=1e-3)
+    assert np.all(m[a == 0] == 0)
+
+
+def test_edge_problems_are_cached_per_edge_pattern(monkeypatch):
+    np.random.seed(7)
+    monkeypatch.setattr(es, "SPARSE_FORMULATION_DENSITY", 1.0)
+    a = mm.new_k_regular_matrix(10, 4).toarray()
+
+    first, _ = mm.new_optimization_problem("go", a, mm.new_vector(10))
+    second, _ = mm.new_optimization_problem("go", a, mm.new_vector(10))
+    other, _ = mm.new_optimization_problem(
+        "go", mm.new_k_regular_matrix(10, 2).toarray(), mm.new_vector(10))
+
+    assert first is second
+    assert other is not first
+# endregion
+
+
+# region Global optimization
+@pytest.mark.parametrize("seed", [0, 3])
+def test_mgo_matches_go_optimum_with_uniform_steady_state(seed):
+    np.random.seed(seed)
+    a = mm.new_symmetric_connected_matrices(1, 8)[0]
+    v_ = np.ones(8) / 8
+
+    _, go_rate = mm.new_go_transition_matrix(a, v_)
+    t, mgo_rate = mm.new_mgo_transition_matrix(a, v_)
+
+    assert mgo_rate == pytest.approx(go_rate, abs=1e-3)
+    assert np.allclose(t @ v_, v_)
+    assert np.all(t[a.transpose() == 0] == 0)
+# endregion
+
+
+# region Incremental Markov Matrix Repair
+def _assert_reversible(t, pi):
+    t = t.toarray()
+    pi = pi / np.sum(pi)
+    flows = t * pi
+    assert np.allclose(t.sum(axis=0), 1)
+    assert np.all(t >= 0)
+    assert np.allclose(t @ pi, pi)
+    assert np.allclose(flows, flows.transpose())
+
+
+def test_removing_and_adding_states_preserves_steady_state():
+    np.random.seed(1)
+    a = mm.new_symmetric_connected_matrices(1, 12)[0]
+    pi = mm.new_vector(12)
+    t, _ = mm.new_mh_transition_matrix(a, pi)
+
+    t = mm.remove_reversible_states(t, np.array([2, 5]))
+    pi = np.delete(pi, [2, 5])
+    _assert_reversible(t, pi)
+
+    pi_new = np.array([0.05, 0.1])
+    t = mm.add_reversible_states(
+        t, pi, pi_new, [np.array([0, 1, 3]), np.array([4, 10])])
+    pi = np.concatenate([pi, pi_new])
+    _assert_reversible(t, pi)
+    assert t.shape == (12, 12)
+    assert t[10, 0] > 0 and t[10, 11] > 0
+
+
+def test_adding_states_skips_neighbours_without_slack():
+    t = sparse.csc_matrix(np.array([[0.0, 1.0], [1.0, 0.0]]))
+    pi = np.array([0.5, 0.5])
+
+    with pytest.raises(MatrixError):
+        mm.add_reversible_states(t, pi, np.array([0.2]), [np.array([0, 1])])
+
+    t = sparse.csc_matrix(np.array([[0.5, 1.0], [0.5, 0.0]]))
+    pi = np.array([2 / 3, 1 / 3])
+    t = mm.add_reversible_states(t, pi, np.array([0.2]), [np.array([0, 1])])
+    assert t[2, 1] == 0
+    _assert_reversible(t, np.array([2 / 3, 1 / 3, 0.2]))
+# endregion
+
+
+# region Sparse Topology Generators
+def _assert_connected_topology(a):
+    assert sparse.issparse(a)
+    assert (a != a.transpose()).nnz == 0
+    assert np.all(a.diagonal() == 1)
+    assert connected_components(a, directed=False)[0] == 1
+
+
+@pytest.mark.parametrize("size, k", [(10, 4), (200, 2), (101, 6)])
+def test_k_regular_topologies_are_connected_and_regular(size, k):
+    np.random.seed(size)
+    for _ in range(5):
+        a = mm.new_k_regular_matrix(size, k)
+
+        _assert_connected_topology(a)
+        assert np.all(np.diff(a.indptr) == k + 1)
+
+
+def test_k_regular_topologies_need_more_than_one_neighbour():
+    with pytest.raises(IllegalArgumentError):
+        mm.new_k_regular_matrix(10, 1)
+    assert mm.new_k_regular_matrix(2, 1).nnz == 4
+
+
+@pytest.mark.parametrize("generator, args", [
+    (mm.new_erdos_renyi_matrix, (200, 1.5)),
+    (mm.new_watts_strogatz_matrix, (200, 4, 0.3)),
+    (mm.new_barabasi_albert_matrix, (200, 2)),
+])
+def test_sparse_topologies_are_connected(generator, args):
+    np.random.seed(3)
+    _assert_connected_topology(generator(*args))
+# endregion
+
+
+# region First order optimization
+@pytest.mark.parametrize("seed", [1, 4])
+def test_fo_approaches_sdp_optimum_with_uniform_steady_state(seed):
+    np.random.seed(seed)
+    a = mm.new_symmetric_connected_matrices(1, 10)[0]
+    v_ = np.ones(10) / 10
+
+    _, sdp_rate = mm.new_sdp_mh_transition_matrix(a, v_)
+    t, fo_rate = mm.new_fo_transition_matrix(a, v_)
+
+    # Subgradient descent converges slowly, but never beats the optimum.
+    assert sdp_rate - 1e-3 <= fo_rate <= sdp_rate + 0.03
+    assert np.allclose(t @ v_, v_)
+    assert np.all(t[a.transpose() == 0] == 0)
+
+
+def test_fo_improves_metropolis_hastings():
+    np.random.seed(0)
+    a = mm.new_symmetric_connected_matrices(1, 10)[0]
+    v_ = mm.new_vector(10)
+
+    _, mh_rate = mm.new_mh_transition_matrix(a, v_)
+    t, fo_rate = mm.new_fo_transition_matrix(a, v_)
+
+    assert fo_rate <= mh_rate
+    _assert_reversible(sparse.csc_matrix(t), v_)
+# endregion
+
+
+# region Batched Markov Matrix Construction
+def _normalized_mh(a, v_):
+    m, _ = mm.new_mh_transition_matrix(a, v_)
+    m = np.absolute(m)
+    m /= np.sum(m, axis=0, keepdims=True)
+    return m
+
+
+def test_batched_mh_matches_single_matrices():
+    np.random.seed(5)
+    a = mm.new_symmetric_connected_matrices(4, 8)
+    v_ = mm.new_vector(8)
+
+    t, rates = mm.new_mh_transition_matrices(a, v_)
+
+    for i in range(len(a)):
+        m = _normalized_mh(a[i], v_)
+        assert np.allclose(t[i], m)
+        assert rates[i] == pytest.approx(mm.get_mixing_rate(m))
+
+
+def test_batched_validation_matches_single_validation():
+    np.random.seed(5)
+    a = mm.new_symmetric_connected_matrices(3, 8)
+    v_ = mm.new_vector(8)
+    t, _ = mm.new_mh_transition_matrices(a, v_)
+    other = _normalized_mh(a[0], mm.new_vector(8))
+    t = np.concatenate([t, other[None]])
+
+    cluster = SGCluster.__new__(SGCluster)
+    valid = cluster._validate_transition_matrices(t, v_)
+    single = [cluster._validate_transition_matrix(
+        pd.DataFrame(x), pd.DataFrame(v_)) for x in t]
+
+    assert valid.tolist() == single == [True, True, True, False]
+# endregion
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from scipy import sparse
+
+import environment_settings as es
+import domain.helpers.matrices as mm
+
+import domain.helpers.matrix_store as ms
+
+from domain.helpers.matrix_store import V_QUANTUM, content_key
+
+
+@pytest.fixture
+def topology():
+    np.random.seed(5)
+    return mm.new_symmetric_connected_matrices(1, 8)[0], mm.new_vector(8)
+
+
+def test_content_key_ignores_matrix_representation(topology):
+    a, v_ = topology
+    key = content_key(a, v_, "new_go_transition_matrix")
+
+    with_explicit_zero = sparse.coo_matrix(a)
+    with_explicit_zero.data[0] = 0
+    without_edge = a.copy()
+    without_edge[with_explicit_zero.row[0], with_explicit_zero.col[0]] = 0
+
+    assert content_key(a.astype(bool), v_, "new_go_transition_matrix") == key
+    assert content_key(
+        sparse.csr_matrix(a), v_, "new_go_transition_matrix") == key
+    assert content_key(
+        sparse.csc_matrix(a), v_, "new_go_transition_matrix") == key
+    assert content_key(
+        sparse.coo_matrix(a), v_, "new_go_transition_matrix") == key
+    assert content_key(
+        with_explicit_zero, v_, "new_go_transition_matrix") == content_key(
+        without_edge, v_, "new_go_transition_matrix") != key
+
+
+def test_content_key_depends_on_the_request(topology):
+    a, v_ = topology
+    key = content_key(a, v_, "new_go_transition_matrix")
+
+    assert content_key(a, v_, "new_go_transition_matrix") == key
+    assert content_key(a, v_, "new_sdp_mh_transition_matrix") != key
+    assert content_key(a, np.roll(v_, 1), "new_go_transition_matrix") != key
+    assert content_key(a, v_ + V_QUANTUM / 10,
+                       "new_go_transition_matrix") == key
+
+
+@pytest.mark.parametrize("name, value", [
+    ("MGO_ENGINE", "matlab"),
+    ("MGO_STARTS", 5),
+    ("SOLVER_TOLERANCE", 1e-3),
+    ("SOLVER_MAX_ITERS", 10),
+    ("SPARSE_FORMULATION_DENSITY", 0.5),
+])
+def test_content_key_depends_on_settings(topology, monkeypatch, name, value):
+    a, v_ = topology
+    key = content_key(a, v_, "new_go_transition_matrix")
+
+    monkeypatch.setattr(es, name, value)
+
+    assert content_key(a, v_, "new_go_transition_matrix") != key
+
+
+def test_persistent_strategies_reuse_stored_matrices(
+        topology, tmp_path, monkeypatch):
+    a, v_ = topology
+    monkeypatch.setattr(es, "MATRIX_STORE_PATH", str(tmp_path / "m.sqlite3"))
+
+    t, rate = mm.new_fo_transition_matrix(a, v_)
+    stored, stored_rate = ms.get(content_key(
+        sparse.csr_matrix(a), v_.copy(), "new_fo_transition_matrix"))
+
+    assert stored_rate == rate
+    assert np.array_equal(stored, t)
@@ -0,0 +1,111 @@
+import json
+import os
+
+import numpy as np
+
+import outfile_aggregator as oa
+import domain.helpers.outfiles as of
+
+NAN = np.nan
+
+
+def _describe(matrix, seed=0, bootstraps=2000):
+    return oa._describe(np.array(matrix, dtype=float),
+                        np.random.default_rng(seed), bootstraps, 0.95,
+                        (0, 50, 100))
+
+
+def _write_run(path, blocks_existing, terminated, **settings):
+    metadata = {"simfile_name": "sim.json", "cluster_type": "SGCluster",
+                "terminated": terminated, "largest_convergence_window": 1,
+                **settings}
+    columns = {key: np.zeros(len(blocks_existing), dtype=dtype)
+               for key, dtype in of.SERIES.items()}
+    columns["blocks_existing"] = np.array(blocks_existing, dtype=np.int32)
+    of.write_columnar(str(path), metadata, columns)
+
+
+# region Statistics
+def test_runs_that_end_earlier_are_padded():
+    matrix = oa._pad([np.array([1, 2, 3]), np.array([4])])
+
+    assert np.array_equal(matrix, [[1, 2, 3], [4, NAN, NAN]], equal_nan=True)
+
+
+def test_padded_epochs_only_describe_the_runs_that_reached_them():
+    stats = _describe([[1, 10, 5], [3, 20, NAN], [5, 30, NAN]])
+
+    assert stats["runs"].tolist() == [3, 3, 1]
+    assert stats["mean"].tolist() == [3, 20, 5]
+    assert stats["percentiles"][1].tolist() == [3, 20, 5]
+    assert stats["percentiles"][2].tolist() == [5, 30, 5]
+
+
+def test_confidence_intervals_bound_the_mean():
+    matrix = np.random.default_rng(1).normal(10, 1, size=(200, 2))
+
+    stats = _describe(matrix)
+
+    low, high = stats["ci"]
+    assert np.all(low < stats["mean"]) and np.all(stats["mean"] < high)
+    assert np.all(high - low < 4 * 1.96 / np.sqrt(200))
+    assert np.all(low > 9.5) and np.all(high < 10.5)
+
+
+def test_constant_columns_have_degenerate_intervals():
+    stats = _describe([[2, 7], [2, NAN], [2, NAN]])
+
+    assert stats["ci"][:, 0].tolist() == [2, 2]
+    assert stats["ci"][:, 1].tolist() == [7, 7]
+
+
+def test_intervals_are_reproduced_by_their_seed():
+    matrix = np.random.default_rng(1).normal(size=(20, 3))
+
+    first, second, other = (_describe(matrix, seed) for seed in (5, 5, 6))
+
+    assert np.array_equal(first["ci"], second["ci"])
+    assert not np.array_equal(first["ci"], other["ci"])
+# endregion
+
+
+# region Grouping
+def test_runs_are_grouped_by_settings(tmp_path):
+    _write_run(tmp_path / "a.npz", [1, 2], 2, channel_loss=0.1)
+    _write_run(tmp_path / "b.npz", [3], 1, channel_loss=0.1)
+    _write_run(tmp_path / "c.npz", [4, 5, 6], 3, channel_loss=0.2)
+
+    keys = [oa._read_runs(str(tmp_path / f"{x}.npz"))[0][0][0] for x in "abc"]
+
+    assert keys[0] == keys[1] != keys[2]
+    assert json.loads(keys[2])["settings"]["channel_loss"] == 0.2
+
+
+def test_unreadable_outfiles_are_reported(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{")
+
+    runs, error = oa._read_runs(str(path))
+
+    assert runs == [] and error
+
+
+def test_summaries_store_their_seed(tmp_path, monkeypatch):
+    monkeypatch.setattr(oa, "OUTFILE_SUMMARY_ROOT", str(tmp_path / "summaries"))
+    _write_run(tmp_path / "a.npz", [1, 2], 2)
+    _write_run(tmp_path / "b.npz", [3], 1)
+
+    paths = [oa.main(str(tmp_path), workers=1, seed=s) for s in (7, 7, None)]
+    summaries = []
+    for path in paths:
+        with open(path) as file:
+            [group] = json.load(file)
+        summaries.append(group)
+
+    assert summaries[0] == summaries[1]
+    assert summaries[0]["seed"] == 7 and summaries[2]["seed"] != 7
+    assert summaries[0]["runs"] == 2
+    assert summaries[0]["epochs"]["blocks_existing"]["runs"] == [2, 1]
+    assert summaries[0]["epochs"]["blocks_existing"]["mean"] == [2, 2]
+    assert len(os.listdir(tmp_path / "summaries")) == 3
+# endregion
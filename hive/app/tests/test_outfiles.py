@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+import environment_settings as es
+import domain.master_servers as ms
+import domain.helpers.outfiles as of
+import domain.helpers.smart_dataclasses as sd
+
+from domain.helpers.enums import ClusterStatus
+
+EPOCHS = 4
+
+
+class _Cluster:
+    id = "c1"
+    critical_size = 2
+    sufficient_size = 3
+    original_size = 4
+    redundant_size = 5
+    corruption_chances = [0.0, 1.0]
+
+
+@pytest.fixture(autouse=True)
+def short_runs(monkeypatch):
+    """Shortens runs and closes the output files left open by a test."""
+    monkeypatch.setattr(ms.Master, "MAX_EPOCHS", EPOCHS + 2)
+    monkeypatch.setattr(ms.Master, "MAX_EPOCHS_PLUS_ONE", EPOCHS + 3)
+    monkeypatch.setattr(es, "OUTFILE_BUFFER_EPOCHS", 2)
+    yield
+    for path in list(of._handles):
+        of.close_outfile(path)
+
+
+def _simulate(name, origin="sim.json", summary=True):
+    file = sd.FileData(name, sim_id=1, origin=origin)
+    cluster = _Cluster()
+    for epoch in range(1, EPOCHS + 1):
+        file.logger.log_existing_file_blocks(10 + epoch, epoch)
+        file.logger.log_bandwidth_units(epoch, epoch)
+        file.logger.log_maintenance(
+            4, 3, "stable", "sufficient" if epoch % 2 else "critical", epoch)
+        file.ewrite(cluster, origin, epoch)
+    if summary:
+        file.logger.terminated = EPOCHS
+        file.jwrite(cluster, origin, EPOCHS)
+    file.fclose()
+    if file.out_file is None:
+        return f"{file.out_path}_{name}.{es.OUTFILE_FORMAT}"
+    return file.out_file
+
+
+def _assert_columns(columns):
+    assert set(columns) == set(of.SERIES)
+    for key, dtype in of.SERIES.items():
+        assert columns[key].dtype == dtype
+        assert len(columns[key]) == EPOCHS
+    assert columns["blocks_existing"].tolist() == [11, 12, 13, 14]
+    assert columns["blocks_moved"].tolist() == [1, 2, 3, 4]
+    assert columns["cluster_status_bm"].tolist() == \
+        [ClusterStatus.STABLE.value] * EPOCHS
+    assert columns["cluster_status_am"].tolist() == [
+        ClusterStatus.SUFFICIENT.value, ClusterStatus.CRITICAL.value] * 2
+
+
+# region Output file reader
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "npz"])
+def test_outfiles_are_read_back(fmt, monkeypatch):
+    monkeypatch.setattr(es, "OUTFILE_FORMAT", fmt)
+
+    [(metadata, columns)] = of.read_outfile(_simulate("f1"))
+
+    _assert_columns(columns)
+    assert not set(metadata) & set(of.SERIES)
+    assert metadata["file_name"] == "f1"
+    assert metadata["cluster_type"] == "_Cluster"
+    assert metadata["terminated"] == EPOCHS
+
+
+def test_all_formats_read_back_the_same_logs(monkeypatch):
+    outfiles = {}
+    for fmt in ["json", "ndjson", "npz"]:
+        monkeypatch.setattr(es, "OUTFILE_FORMAT", fmt)
+        [outfiles[fmt]] = of.read_outfile(_simulate("f1"))
+
+    metadata, columns = outfiles.pop("json")
+    for other_metadata, other_columns in outfiles.values():
+        assert other_metadata == metadata
+        for key in of.SERIES:
+            assert np.array_equal(other_columns[key], columns[key])
+
+
+def test_json_outfiles_shared_by_many_files(monkeypatch):
+    monkeypatch.setattr(es, "OUTFILE_FORMAT", "json")
+    path = _simulate("f1")
+    assert _simulate("f2") == path
+
+    outfile = of.read_outfile(path)
+
+    assert [x["file_name"] for x, _ in outfile] == ["f1", "f2"]
+    for _, columns in outfile:
+        _assert_columns(columns)
+
+
+def test_interrupted_ndjson_outfiles_are_read(monkeypatch):
+    monkeypatch.setattr(es, "OUTFILE_FORMAT", "ndjson")
+
+    [(metadata, columns)] = of.read_outfile(_simulate("f1", summary=False))
+
+    _assert_columns(columns)
+    assert metadata["file_name"] == "f1"
+    assert "terminated" not in metadata
+# endregion
+
+
+# region Pool of file handles
+def test_least_recently_written_outfiles_are_closed(tmp_path, monkeypatch):
+    monkeypatch.setattr(es, "OUTFILE_MAX_OPEN", 2)
+    a, b, c = (str(tmp_path / f"{x}.json") for x in "abc")
+
+    of.append_text(a, "a1\n")
+    of.append_text(b, "b1\n")
+    of.append_text(a, "a2\n")
+    of.append_text(c, "c1\n")
+
+    assert list(of._handles) == [a, c]
+    of.append_text(b, "b2\n")
+    assert list(of._handles) == [c, b]
+    for path in (a, b, c):
+        of.close_outfile(path)
+
+    assert not of._handles
+    with open(a) as file:
+        assert file.read() == "a1\na2\n"
+    with open(b) as file:
+        assert file.read() == "b1\nb2\n"
+
+
+def test_first_write_truncates_outfiles(tmp_path):
+    path = str(tmp_path / "a.json")
+    with open(path, "w") as file:
+        file.write("previous run\n")
+
+    of.append_text(path, "1\n")
+    of.close_outfile(path)
+    of.append_text(path, "2\n")
+    of.close_outfile(path)
+
+    with open(path) as file:
+        assert file.read() == "1\n2\n"
+
+
+def test_outfiles_are_flushed_while_open(tmp_path):
+    path = str(tmp_path / "a.json")
+
+    of.append_text(path, "1\n")
+
+    assert path in of._handles
+    with open(path) as file:
+        assert file.read() == "1\n"
+# endregion
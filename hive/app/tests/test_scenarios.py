@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import domain.helpers.matrices as mm
+import domain.helpers.scenarios as sc
+
+
+@pytest.fixture(autouse=True)
+def no_cached_banks(monkeypatch):
+    monkeypatch.setattr(sc, "_banks", {})
+
+
+def _new_scenarios(count, size):
+    a = mm.new_symmetric_connected_matrices(count, size)
+    v = np.stack([mm.new_vector(size) for _ in range(count)])
+    return a, v
+
+
+# region Scenario Bank
+def test_saved_scenarios_are_read_back():
+    np.random.seed(11)
+    a, v = _new_scenarios(3, 10)
+
+    sc.save_scenarios(10, a, v)
+
+    assert sc.count_scenarios(10) == 3
+    for sid in range(3):
+        a_, v_ = sc.get_scenario(10, sid)
+        assert a_.dtype == np.float64
+        assert np.array_equal(a_, a[sid])
+        assert np.array_equal(v_, v[sid])
+
+
+def test_missing_scenarios():
+    assert sc.count_scenarios(10) == 0
+    with pytest.raises(FileNotFoundError):
+        sc.get_scenario(10, 0)
+
+    sc.save_scenarios(10, *_new_scenarios(2, 10))
+    with pytest.raises(IndexError):
+        sc.get_scenario(10, 2)
+
+
+def test_saving_scenarios_replaces_the_group():
+    np.random.seed(11)
+    sc.save_scenarios(10, *_new_scenarios(3, 10))
+    sc.get_scenario(10, 0)
+
+    a, v = _new_scenarios(2, 10)
+    sc.save_scenarios(10, a, v)
+
+    assert sc.count_scenarios(10) == 2
+    assert np.array_equal(sc.get_scenario(10, 1)[0], a[1])
+
+
+def test_precomputed_strategies_are_read_back():
+    np.random.seed(11)
+    sc.save_scenarios(6, *_new_scenarios(2, 6))
+    strategies = ["new_mh_transition_matrix"]
+    assert sc.get_strategy_results(6, 0, strategies) is None
+
+    sc.precompute_strategies(6, strategies, workers=1)
+
+    for sid in range(2):
+        [(t, rate)] = sc.get_strategy_results(6, sid, strategies)
+        expected, expected_rate = mm.new_mh_transition_matrix(
+            *sc.get_scenario(6, sid))
+        assert np.allclose(t, expected)
+        assert rate == pytest.approx(expected_rate)
+
+    sc.save_scenarios(6, *_new_scenarios(2, 6))
+    assert sc.get_strategy_results(6, 0, strategies) is None
+# endregion
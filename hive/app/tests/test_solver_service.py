@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pytest
+
+import environment_settings as es
+import domain.helpers.solver_service as ss
+
+
+def _slow_strategy(a, v_):
+    time.sleep(60)
+    return a, 0.5
+
+
+def _fast_strategy(a, v_):
+    return a, 0.25
+
+
+def _settings_strategy(a, v_):
+    return a, es.SOLVER_TOLERANCE
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    monkeypatch.setattr(es, "SOLVER_WORKERS", 1)
+    with ss._lock:
+        ss._reset_executor()
+    yield
+    with ss._lock:
+        ss._reset_executor()
+
+
+def test_overdue_requests_free_their_workers(one_worker):
+    a = np.eye(3)
+    v_ = np.ones(3) / 3
+
+    start = time.monotonic()
+    assert ss.solve(a, v_, [_slow_strategy], deadline=1) == \
+        [(None, float('inf'))]
+    (m, rate), = ss.solve(a, v_, [_fast_strategy], deadline=30)
+
+    assert rate == 0.25
+    assert time.monotonic() - start < 30
+    assert not ss._in_flight
+
+
+def test_overdue_requests_waiting_for_a_worker_are_cancelled(one_worker):
+    a = np.eye(3)
+    v_ = np.ones(3) / 3
+
+    results = ss.solve(a, v_, [_slow_strategy, _fast_strategy], deadline=1)
+
+    assert results == [(None, float('inf'))] * 2
+    assert not ss._in_flight
+
+
+def test_identical_requests_share_one_job(one_worker):
+    a = np.eye(3)
+    v_ = np.ones(3) / 3
+
+    first = ss.submit(_fast_strategy, a, v_)
+    second = ss.submit(_fast_strategy, a.copy(), v_.copy())
+
+    assert first is second
+    assert first.result(timeout=30)[1] == 0.25
+
+
+def test_requests_without_deadline_are_limited_by_job_timeout(
+        one_worker, monkeypatch):
+    monkeypatch.setattr(es, "SOLVER_JOB_TIMEOUT", 1)
+    a = np.eye(3)
+    v_ = np.ones(3) / 3
+
+    start = time.monotonic()
+    assert ss.solve(a, v_, [_slow_strategy]) == [(None, float('inf'))]
+    (m, rate), = ss.solve(a, v_, [_fast_strategy])
+
+    assert rate == 0.25
+    assert time.monotonic() - start < 30
+
+
+def test_warm_up_starts_the_workers(one_worker):
+    ss.warm_up()
+
+    with ss._lock:
+        executor = ss._get_executor()
+    assert len(executor._processes) == 1
+
+
+def test_workers_receive_the_settings(one_worker, monkeypatch):
+    monkeypatch.setattr(es, "SOLVER_TOLERANCE", 0.125)
+
+    (m, tolerance), = ss.solve(np.eye(3), np.ones(3) / 3, [_settings_strategy])
+
+    assert ss._START_METHOD != "fork"
+    assert tolerance == 0.125
@@ -0,0 +1,88 @@
+import json
+
+import cvxpy as cvx
+import pytest
+
+import environment_settings as es
+import domain.helpers.solvers as sv
+
+
+def _fail(problem, **options):
+    raise cvx.SolverError("Failed by the test.")
+
+
+def _solve_with_scs(problem, **options):
+    return problem.solve(solver=cvx.SCS)
+
+
+def _backend(name, cones=("SDP",), method=_solve_with_scs):
+    return sv.SolverBackend(
+        name, frozenset(cones), lambda tol, iters: {}, method)
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Replaces the registry and timings with empty ones."""
+    monkeypatch.setattr(sv, "_BACKENDS", {})
+    monkeypatch.setattr(sv, "_available", None)
+    monkeypatch.setattr(sv, "_timings", {})
+
+
+def _problem(variables):
+    x = cvx.Variable(variables)
+    return cvx.Problem(cvx.Minimize(cvx.sum(x)), [x >= 1])
+
+
+# region Backend selection
+def test_estimates_use_the_closest_size_in_logarithmic_scale():
+    by_size = {"8": 1.0, "32": 2.0, "1024": 3.0}
+
+    assert sv._estimate_time(by_size, 9) == 1.0
+    assert sv._estimate_time(by_size, 16) == 2.0  # Ties favour larger sizes.
+    assert sv._estimate_time(by_size, 100) == 2.0
+    assert sv._estimate_time(by_size, 4096) == 3.0
+
+
+def test_timed_backends_are_ranked_before_untimed_ones(monkeypatch):
+    for name in ("first", "lp_only", "slow", "fast"):
+        cones = ("LP",) if name == "lp_only" else ("LP", "SDP")
+        sv.register_backend(_backend(name, cones))
+    monkeypatch.setattr(sv, "_timings", {"sdp": {
+        "slow": {"16": 1.0, "1024": 0.1},
+        "fast": {"16": 0.5, "1024": 2.0},
+        "lp_only": {"16": 0.01},
+    }})
+
+    assert sv.select_backends("sdp", _problem(16)) == ["fast", "slow", "first"]
+    assert sv.select_backends("sdp", _problem(1000)) == ["slow", "fast", "first"]
+    assert sv.select_backends("go", _problem(16)) == ["first", "slow", "fast"]
+
+
+def test_failed_backends_fall_back_to_the_next_one():
+    sv.register_backend(_backend("broken", method=_fail))
+    sv.register_backend(_backend("working"))
+    problem = _problem(4)
+
+    assert sv.solve(problem, "sdp") == "working"
+    assert problem.value == pytest.approx(4, abs=1e-3)
+
+
+def test_solving_fails_when_every_backend_fails():
+    sv.register_backend(_backend("broken", method=_fail))
+
+    with pytest.raises(cvx.SolverError):
+        sv.solve(_problem(4), "sdp")
+
+
+def test_recorded_timings_are_read_by_other_processes(tmp_path, monkeypatch):
+    path = tmp_path / "timings.json"
+    monkeypatch.setattr(es, "SOLVER_TIMINGS_PATH", str(path))
+
+    sv.record_timings("sdp", "working", _problem(8), 0.5)
+    sv.record_timings("sdp", "working", _problem(8), 0.25)
+    monkeypatch.setattr(sv, "_timings", None)
+
+    assert sv.get_timings() == {"sdp": {"working": {"8": 0.25}}}
+    with open(path) as file:
+        assert json.load(file) == sv.get_timings()
+# endregion
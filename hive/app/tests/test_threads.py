@@ -0,0 +1,31 @@
+import os
+
+import environment_settings as es
+
+from utils.threads import get_thread_budget
+
+
+# region Thread budget
+def test_threads_per_worker_overrides_the_default_budget(monkeypatch):
+    monkeypatch.setattr(es, "THREADS_PER_WORKER", 3)
+
+    assert get_thread_budget(2) == 3
+    assert get_thread_budget(None) == 3
+
+
+def test_processors_are_shared_equally_by_default(monkeypatch):
+    monkeypatch.setattr(es, "THREADS_PER_WORKER", None)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    assert get_thread_budget(2) == 4
+    assert get_thread_budget(3) == 2
+    assert get_thread_budget(None) == 1
+    assert get_thread_budget(16) == 1
+
+
+def test_unknown_processor_counts_give_one_thread(monkeypatch):
+    monkeypatch.setattr(es, "THREADS_PER_WORKER", None)
+    monkeypatch.setattr(os, "cpu_count", lambda: None)
+
+    assert get_thread_budget(4) == 1
+# endregion
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import Dict, Union
+from typing import Dict, Union, Tuple
+
+import numpy as np
+
+from scipy import sparse
 
 import domain.master_servers as ms
 import domain.cluster_groups as cg
@@ -12,10 +16,13 @@ NodeDict: Dict[str, NodeType]
 ClusterDict: Dict[str, ClusterType]
 ReplicasDict: Dict[int, sd.FileBlockData]
 HttpResponse: Union[int, e.HttpCodes]
+RoutingEntry: Tuple[sparse.csc_matrix, np.ndarray, int]
+TransitionMatrix: Union[np.ndarray, sparse.spmatrix]
 
 MasterType: Union[
     ms.Master,
     ms.SGMaster,
+    ms.SGMasterMulti,
     ms.HDFSMaster,
     ms.NewscastMaster
 ]
@@ -24,6 +31,7 @@ ClusterType: Union[
     cg.Cluster,
     cg.SGCluster,
     cg.SGClusterExt,
+    cg.SGClusterMulti,
     cg.HDFSCluster,
     cg.NewscastCluster
 ]
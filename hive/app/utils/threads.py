@@ -0,0 +1,73 @@
+"""This module implements functions that limit the threads used by the native
+libraries, e.g., MKL, OpenBLAS or OpenMP, behind numpy, scipy and the solvers.
+
+When multiple simulations or solver processes run in parallel, each of them
+would otherwise spawn one native thread per processor, and the resulting
+oversubscription makes eigen-decompositions and solves slower than running
+them serially. Each worker is given a budget of
+:py:const:`~app.environment_settings.THREADS_PER_WORKER` threads or, by
+default, an equal share of the processors.
+
+Note:
+    Libraries that are already loaded, e.g., those of the parallel
+    simulations of :py:mod:`app.hive_simulation`, are only limited by
+    `threadpoolctl <https://github.com/joblib/threadpoolctl>`_. Without it
+    only the environment variables read by libraries when they load, e.g.,
+    in spawned worker processes, are set and a warning is issued.
+"""
+import os
+import warnings
+
+from typing import Optional
+
+import environment_settings as es
+
+__threadpoolctl_available__ = True
+try:
+    from threadpoolctl import threadpool_limits
+except ModuleNotFoundError:
+    __threadpoolctl_available__ = False
+
+_THREAD_VARIABLES = ("OMP_NUM_THREADS",
+                     "MKL_NUM_THREADS",
+                     "OPENBLAS_NUM_THREADS",
+                     "VECLIB_MAXIMUM_THREADS",
+                     "NUMEXPR_NUM_THREADS")
+
+
+def get_thread_budget(workers: Optional[int]) -> int:
+    """Computes how many native threads each parallel worker may use.
+
+    Args:
+        workers:
+            The number of workers running in parallel. If ``None`` one
+            worker per processor is assumed.
+
+    Returns:
+        :py:const:`~app.environment_settings.THREADS_PER_WORKER` if it is
+        set, otherwise the number of processors divided by ``workers``,
+        but at least one.
+    """
+    if es.THREADS_PER_WORKER is not None:
+        return es.THREADS_PER_WORKER
+    cores = os.cpu_count() or 1
+    return max(1, cores // max(1, workers or cores))
+
+
+def apply_thread_budget(threads: int) -> None:
+    """Limits the native threads used by the calling process.
+
+    Can be used as the ``initializer`` of a
+    :py:class:`~py:concurrent.futures.ProcessPoolExecutor`.
+
+    Args:
+        threads:
+            The maximum number of threads each native thread pool may use.
+    """
+    for variable in _THREAD_VARIABLES:
+        os.environ[variable] = str(threads)
+    if __threadpoolctl_available__:
+        threadpool_limits(limits=threads)
+    else:
+        warnings.warn("threadpoolctl is not installed, native libraries that "
+                      "are already loaded ignore the thread budget.")